@@ -1,9 +1,28 @@
+import functools
+import hmac
 import os
+import tempfile
+import threading
+import time
 import pandas as pd
 import numpy as np
 import streamlit as st
 import altair as alt
-from pyathena import connect
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from backends import FETCH_MODES, AthenaBackend, DuckDBBackend
+from cube import build_cube, cube_months, cube_sql, month_window, slice_cube, state_month_totals
+from data_version import DataVersion, probe_version
+from dispatch import QueryDispatcher
+from exports import EXPORT_FORMATS, export_frame, export_sql
+from facility_index import FACILITY_INDEX_SQL, FacilityIndex
+from map_layers import CARTO_TILES, POINT_ZOOM, map_layer_data
+from metrics import Metrics, process_metrics
+from paging import count_sql, last_key, ranked_sql, strip_keys
+from queries import Filters, Query, build
+from result_cache import ResultCache
+from warmer import QUERY_LOG_NAME, QueryLog
+from stats import describe, group_stats, summary_sql
 
 # -----------------------------
 # App config & env
@@ -15,75 +34,299 @@ ATHENA_S3_OUTPUT = os.getenv("ATHENA_S3_OUTPUT")  # REQUIRED
 ATHENA_WORKGROUP = os.getenv("ATHENA_WORKGROUP", "primary")
 ATHENA_DATABASE = os.getenv("ATHENA_DATABASE", "kerok-healthcare-bronze")
 ATHENA_CATALOG  = os.getenv("ATHENA_CATALOG",  "AwsDataCatalog")
+# Athena result reuse window for identical statement + parameters (0 disables)
+ATHENA_RESULT_REUSE_MINUTES = int(os.getenv("ATHENA_RESULT_REUSE_MINUTES", "60"))
 
-if not ATHENA_S3_OUTPUT:
+# Query backend: "athena" (default) or "duckdb" (local Parquet/CSV gold extracts, no AWS)
+QUERY_BACKEND = os.getenv("QUERY_BACKEND", "athena").strip().lower()
+DUCKDB_DATA_DIR = os.getenv("DUCKDB_DATA_DIR", "data/gold")
+DUCKDB_DATABASE = os.getenv("DUCKDB_DATABASE", ":memory:")
+
+# Result fetch path: arrow (bulk typed read of the result file, default), unload (Parquet), dbapi (legacy)
+QUERY_FETCH_MODE = os.getenv("QUERY_FETCH_MODE", "arrow").strip().lower()
+
+# Disk result cache shared by all Streamlit processes on the host (0 MB disables)
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "kerok-healthcare-results")
+RESULT_CACHE_MAX_MB = int(os.getenv("RESULT_CACHE_MAX_MB", "512"))
+RESULT_CACHE_TTL_SECONDS = int(os.getenv("RESULT_CACHE_TTL_SECONDS", "86400"))
+
+# Max queries in flight per app process (shared by all sessions)
+QUERY_MAX_CONCURRENCY = int(os.getenv("QUERY_MAX_CONCURRENCY", "8"))
+
+# Warm connection pool per app process; idle connections are closed after QUERY_POOL_IDLE_SECONDS
+QUERY_POOL_SIZE = int(os.getenv("QUERY_POOL_SIZE", str(QUERY_MAX_CONCURRENCY)))
+QUERY_POOL_IDLE_SECONDS = float(os.getenv("QUERY_POOL_IDLE_SECONDS", "300"))
+
+# Instrumentation: query/render records kept per process; the diagnostics page is
+# served at ?diagnostics=<DIAGNOSTICS_TOKEN> (not served while the token is unset)
+METRICS_HISTORY = int(os.getenv("METRICS_HISTORY", "2000"))
+DIAGNOSTICS_TOKEN = os.getenv("DIAGNOSTICS_TOKEN", "")
+
+# Facilities offered per sidebar search (the directory itself is searched in memory)
+FACILITY_SEARCH_LIMIT = int(os.getenv("FACILITY_SEARCH_LIMIT", "50"))
+
+# Cached results are kept until new data is published (data_version.py); the
+# version is probed at most every DATA_VERSION_CHECK_SECONDS per process, and
+# QUERY_CACHE_MAX_ENTRIES bounds the in-process result cache
+DATA_VERSION_CHECK_SECONDS = float(os.getenv("DATA_VERSION_CHECK_SECONDS", "60"))
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "500"))
+
+# Requested queries are counted into <RESULT_CACHE_DIR>/query_log.json every
+# QUERY_LOG_FLUSH_SECONDS (0 disables) so warmer.py can replay the popular ones
+QUERY_LOG_FLUSH_SECONDS = float(os.getenv("QUERY_LOG_FLUSH_SECONDS", "60"))
+
+if QUERY_BACKEND not in ("athena", "duckdb"):
+    st.error(f"Unknown QUERY_BACKEND={QUERY_BACKEND!r} (expected 'athena' or 'duckdb').")
+    st.stop()
+
+if QUERY_FETCH_MODE not in FETCH_MODES:
+    st.error(f"Unknown QUERY_FETCH_MODE={QUERY_FETCH_MODE!r} (expected one of {', '.join(FETCH_MODES)}).")
+    st.stop()
+
+if QUERY_BACKEND == "athena" and not ATHENA_S3_OUTPUT:
     st.error("Environment variable ATHENA_S3_OUTPUT is required (e.g., s3://kerok-athena-query-output-storage-v1/).")
     st.stop()
 
 # -----------------------------
-# Athena connection
+# Query backend
 # -----------------------------
-def _connect():
-    return connect(
-        region_name=AWS_REGION,
-        s3_staging_dir=ATHENA_S3_OUTPUT,
-        work_group=ATHENA_WORKGROUP,
-        schema_name=ATHENA_DATABASE,
-        catalog_name=ATHENA_CATALOG,
+@st.cache_resource(show_spinner=False)
+def _backend() -> AthenaBackend | DuckDBBackend:
+    # One backend (and its connection pool) per process, shared by all sessions
+    pool = {"pool_size": QUERY_POOL_SIZE, "pool_idle_seconds": QUERY_POOL_IDLE_SECONDS}
+    if QUERY_BACKEND == "duckdb":
+        return DuckDBBackend(DUCKDB_DATA_DIR, database=DUCKDB_DATABASE, fetch_mode=QUERY_FETCH_MODE, **pool)
+    return AthenaBackend(
+        region=AWS_REGION,
+        s3_output=ATHENA_S3_OUTPUT,
+        workgroup=ATHENA_WORKGROUP,
+        database=ATHENA_DATABASE,
+        catalog=ATHENA_CATALOG,
+        fetch_mode=QUERY_FETCH_MODE,
+        result_reuse_minutes=ATHENA_RESULT_REUSE_MINUTES,
+        **pool,
     )
 
-def _quote_str(x: str) -> str:
-    return "'" + str(x).replace("'", "''") + "'"
+@st.cache_resource(show_spinner=False)
+def _result_cache() -> ResultCache | None:
+    if RESULT_CACHE_MAX_MB <= 0:
+        return None
+    return ResultCache(RESULT_CACHE_DIR,
+                       max_bytes=RESULT_CACHE_MAX_MB * 1024 * 1024,
+                       ttl_seconds=RESULT_CACHE_TTL_SECONDS or None)
+
+@st.cache_resource(show_spinner=False)
+def _query_log() -> QueryLog | None:
+    if RESULT_CACHE_MAX_MB <= 0 or QUERY_LOG_FLUSH_SECONDS <= 0:
+        return None
+    return QueryLog(os.path.join(RESULT_CACHE_DIR, QUERY_LOG_NAME), flush_seconds=QUERY_LOG_FLUSH_SECONDS)
+
+@st.cache_resource(show_spinner=False)
+def _dispatcher() -> QueryDispatcher:
+    return QueryDispatcher(max_workers=QUERY_MAX_CONCURRENCY)
+
+@st.cache_resource(show_spinner=False)
+def _data_version() -> DataVersion:
+    return DataVersion(lambda: probe_version(_probe_query), interval=DATA_VERSION_CHECK_SECONDS)
+
+def _probe_query(sql: str) -> pd.DataFrame:
+    # Straight to the engine: no cache layer, no Athena result reuse
+    info = {"source": "engine", "origin": "version_probe"}
+    t0 = time.perf_counter()
+    try:
+        return _backend().query(sql, info=info, reuse_minutes=0)
+    except Exception as e:
+        info["error"] = type(e).__name__
+        raise
+    finally:
+        _metrics().record_query(sql, time.perf_counter() - t0, **info)
+
+def _metrics() -> Metrics:
+    # Process-wide (not st.cache_resource) so in-process tools can read it too
+    return process_metrics(METRICS_HISTORY)
+
+# Per-thread record for the run_query call in progress; the layers below fill in
+# where the result came from and what it cost
+_query_info = threading.local()
+
+def _fetch(backend, cache: ResultCache | None, q: Query, version: str) -> pd.DataFrame:
+    # Host disk cache -> query backend
+    info = getattr(_query_info, "info", None)
+    info = {} if info is None else info
+    key = ResultCache.make_key(backend.namespace, version, q.key)
+    if cache is not None:
+        df = cache.get(key)
+        if df is not None:
+            info.update(source="disk", rows=len(df))
+            return df
+    info["source"] = "engine"
+    # Athena may reuse a result only if it is younger than the data it reads
+    age = _data_version().age_seconds()
+    reuse = None if age is None else max(0, int(age // 60))
+    df = backend.query(q.sql, info=info, params=q.params, reuse_minutes=reuse)
+    if cache is not None:
+        cache.put(key, df)
+    return df
+
+@st.cache_data(max_entries=QUERY_CACHE_MAX_ENTRIES, show_spinner=False)
+def _cached_query(sql: str, params: tuple, version: str) -> pd.DataFrame:
+    # In-process cache (above) -> in-flight query for the same key, if any -> _fetch.
+    # sql/params are canonical (queries.py), so equal requests share every layer;
+    # version (data_version.py) retires every layer's entries when new data lands.
+    q = Query(sql, params)
+    backend = _backend()
+    cache = _result_cache()
+    info = getattr(_query_info, "info", None)
+    if info is not None:
+        info["source"] = "inflight"  # overwritten by _fetch if this call runs it
+    return _dispatcher().run(f"{version}:{q.key}", lambda: _fetch(backend, cache, q, version))
+
+def run_query(sql: str | Query, origin: str = "render") -> pd.DataFrame:
+    q = Query.of(sql)
+    info = _query_info.info = {"source": "memory", "origin": origin, "key": q.key[:16]}
+    t0 = time.perf_counter()
+    try:
+        df = _cached_query(q.sql, q.params, data_version)
+    except Exception as e:
+        info["error"] = type(e).__name__
+        raise
+    finally:
+        _query_info.info = None
+        _metrics().record_query(q.sql, time.perf_counter() - t0, **info)
+    info.setdefault("rows", len(df))
+    log = _query_log()
+    if log is not None and origin == "render":
+        log.record(q)
+    return df
 
-def _in_clause(col: str, values: list[str] | None):
-    if not values:
-        return "TRUE"
-    qs = ", ".join(_quote_str(v) for v in values)
-    return f"{col} IN ({qs})"
+def _prefetch_one(ctx, sql: Query):
+    add_script_run_ctx(threading.current_thread(), ctx)
+    try:
+        run_query(sql, origin="prefetch")
+    except Exception:
+        pass  # surfaced when the tab itself calls run_query
 
-@st.cache_data(ttl=600, show_spinner=False)
-def run_query(sql: str) -> pd.DataFrame:
-    with _connect() as conn:
-        return pd.read_sql(sql, conn)
+def prefetch(*sqls: str | Query):
+    # Start queries in the background; later run_query calls hit the cache or join them
+    ctx = get_script_run_ctx()
+    for sql in dict.fromkeys(Query.of(s) for s in sqls):
+        _dispatcher().submit(_prefetch_one, ctx, sql)
 
 # -----------------------------
 # Lookups
 # -----------------------------
-@st.cache_data(ttl=600, show_spinner=False)
-def get_states() -> list[str]:
-    # Use any view guaranteed to have state
-    sql = "SELECT DISTINCT state FROM gold_vw_hprd_by_state WHERE state IS NOT NULL ORDER BY state"
-    df = run_query(sql)
+# Lookups and HPRD read the materialized monthly tables (sql/gold_monthly_ddl.sql),
+# a few thousand rows per month, instead of re-aggregating the daily fact.
+STATES_SQL = "SELECT DISTINCT state FROM gold_state_monthly WHERE state IS NOT NULL ORDER BY state"
+
+MONTH_BOUNDS_SQL = """
+  SELECT MIN(month) AS min_m, MAX(month) AS max_m
+  FROM gold_state_monthly
+"""
+
+# Startup reads the manifest the pipeline publishes after each run
+# (sql/gold_publish_manifest.sql) instead of the two aggregates above, which
+# remain the fallback until a deployment has published one
+MANIFEST_SQL = "SELECT * FROM gold_dashboard_manifest ORDER BY published_ts DESC LIMIT 1"
+
+def _filters(states: list[str] | None = None, ccns: list[str] | None = None) -> Filters:
+    # Canonical state/facility filter; selecting every state = any non-null state
+    return Filters.of(state=states, ccn=ccns, universe={"state": get_states(data_version)})
+
+def facility_hprd_sql(states: list[str] | None, ccns: list[str] | None) -> Query:
+    return build("""
+      WITH m AS (
+        SELECT ccn, state,
+               SUM(days_with_residents) AS days_with_residents,
+               MIN(first_workdate) AS start_date,
+               MAX(last_workdate) AS end_date,
+               CAST(SUM(total_hours_direct) AS DECIMAL(18,6)) AS hours,
+               CAST(SUM(hrs_rn) AS DECIMAL(18,6)) AS rn_hours,
+               CAST(SUM(hrs_lpn) AS DECIMAL(18,6)) AS lpn_hours,
+               CAST(SUM(hrs_cna) AS DECIMAL(18,6)) AS cna_hours,
+               NULLIF(CAST(SUM(resident_days) AS DECIMAL(18,6)), 0) AS resident_days
+        FROM gold_facility_monthly
+        WHERE {where}
+        GROUP BY ccn, state
+      )
+      SELECT m.ccn, d.provider_name, m.state,
+             m.days_with_residents, m.start_date, m.end_date,
+             m.hours / m.resident_days AS hprd_weighted,
+             m.rn_hours / m.resident_days AS rn_hprd,
+             m.lpn_hours / m.resident_days AS lpn_hprd,
+             m.cna_hours / m.resident_days AS cna_hprd
+      FROM m
+      LEFT JOIN gold_facility_dim d ON d.ccn = m.ccn
+    """, _filters(states, ccns))
+
+# Tables offered as full extracts in the sidebar
+EXTRACT_TABLES = ["gold_facility_monthly", "gold_state_monthly", "gold_facility_dim",
+                  "gold_quarterly_provider_fact", "gold_daily_staffing_fact"]
+
+# Tab1 sort orders for SQL ranking/paging; each ends in the facility key so seeks are exact
+FACILITY_TOP_ORDER = [("CAST(hprd_weighted AS DOUBLE)", True), ("COALESCE(provider_name, '')", False),
+                      ("ccn", False), ("state", False)]
+FACILITY_PAGE_ORDER = [("CAST(COALESCE(hprd_weighted, -1) AS DOUBLE)", True), ("ccn", False), ("state", False)]
+
+def facility_top_sql(states: list[str] | None, ccns: list[str] | None, top_n: int) -> Query:
+    base = facility_hprd_sql(states, ccns).wrap(
+        lambda sql: f"SELECT * FROM ({sql}) f WHERE hprd_weighted IS NOT NULL")
+    return base.wrap(ranked_sql, FACILITY_TOP_ORDER, top_n)
+
+def state_hprd_sql(states: list[str] | None) -> Query:
+    return build("""
+      SELECT state,
+             MIN(first_workdate) AS start_date,
+             MAX(last_workdate) AS end_date,
+             CAST(SUM(total_hours_direct) AS DECIMAL(18,6)) /
+               NULLIF(CAST(SUM(resident_days) AS DECIMAL(18,6)), 0) AS hprd_weighted
+      FROM gold_state_monthly
+      WHERE {where}
+      GROUP BY state
+      ORDER BY hprd_weighted DESC
+    """, _filters(states))
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def get_manifest(version: str) -> dict | None:
+    try:
+        df = run_query(MANIFEST_SQL)
+    except Exception:
+        return None  # gold_dashboard_manifest not created yet (sql/gold_manifest_ddl.sql)
+    if df.empty or pd.isna(df.iloc[0]["min_month"]):
+        return None
+    return df.iloc[0].to_dict()
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def get_states(version: str) -> list[str]:
+    manifest = get_manifest(version)
+    if manifest is not None and manifest["states"]:
+        return str(manifest["states"]).split(",")
+    df = run_query(STATES_SQL)
     return df["state"].dropna().astype(str).tolist()
 
-@st.cache_data(ttl=600, show_spinner=False)
-def get_facilities(states: list[str]) -> pd.DataFrame:
-    where_states = _in_clause("state", states) if states else "TRUE"
-    # Use facility HPRD view for a reliable directory
-    sql = f"""
-      SELECT DISTINCT ccn, provider_name, state
-      FROM gold_vw_hprd_by_facility
-      WHERE {where_states}
-      ORDER BY provider_name
-    """
-    return run_query(sql)
-
-@st.cache_data(ttl=600, show_spinner=False)
-def get_month_bounds() -> tuple[pd.Timestamp, pd.Timestamp]:
-    # Use a monthly view to establish range
-    sql = """
-      SELECT
-        CAST(MIN(CAST(month AS DATE)) AS DATE) AS min_m,
-        CAST(MAX(CAST(month AS DATE)) AS DATE) AS max_m
-      FROM gold_vw_total_nurse_hours_facility_monthly
-    """
-    df = run_query(sql)
+@st.cache_resource(max_entries=2, show_spinner=False)
+def get_facility_index(version: str) -> FacilityIndex:
+    # Whole directory loaded once; sidebar search/state filtering is in-memory
+    return FacilityIndex(run_query(FACILITY_INDEX_SQL))
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def get_month_bounds(version: str) -> tuple[pd.Timestamp, pd.Timestamp]:
+    manifest = get_manifest(version)
+    if manifest is not None:
+        return (pd.to_datetime(manifest["min_month"]), pd.to_datetime(manifest["max_month"]))
+    df = run_query(MONTH_BOUNDS_SQL)
     if df.empty or pd.isna(df.iloc[0]["min_m"]):
         today = pd.Timestamp.today(tz="UTC").normalize()
         mstart = (today - pd.offsets.MonthBegin(3)).date()
         return (pd.to_datetime(mstart), today)
     return (pd.to_datetime(df.iloc[0]["min_m"]), pd.to_datetime(df.iloc[0]["max_m"]))
 
+@st.cache_resource(max_entries=4, show_spinner=False)
+def get_cube(version: str, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+    # Shared, read-only facility x month frame for tabs 3-6 (slices return copies),
+    # holding only the months of the selected window
+    return build_cube(run_query(cube_sql(start, end)))
+
 def paginate_df(df: pd.DataFrame, page_size: int = 25, key: str = "pager") -> pd.DataFrame:
     total = len(df)
     if total <= page_size:
@@ -98,25 +341,59 @@ def paginate_df(df: pd.DataFrame, page_size: int = 25, key: str = "pager") -> pd
     end = start + page_size
     return df.iloc[start:end]
 
-def download_csv(df: pd.DataFrame, label: str, key: str):
+def paginate_sql(base: Query, order: list[tuple[str, bool]], page_size: int = 25,
+                 key: str = "pager") -> pd.DataFrame:
+    # paginate_df, but the engine returns only the visible page (see paging.py)
+    total = int(run_query(base.wrap(count_sql))["n"].iloc[0])
+    pages = max(1, (total + page_size - 1) // page_size)
+    page = 1
+    if total > page_size:
+        col1, col2 = st.columns([1, 5])
+        with col1:
+            page = st.number_input("Page", min_value=1, max_value=pages, step=1, value=1, key=key)
+        with col2:
+            st.caption(f"{total} rows • {pages} pages • {page_size} per page")
+
+    # Last sort key of each page fetched for this query; the next page seeks past it.
+    # Jumping to a page whose predecessor was never fetched falls back to OFFSET once.
+    state = st.session_state.get(f"{key}_cursors")
+    if not state or state["sql"] != (data_version, base.key):
+        state = st.session_state[f"{key}_cursors"] = {"sql": (data_version, base.key), "after": {}}
+    after = state["after"].get(page - 1)
+    if page > 1 and after is None:
+        q = base.wrap(ranked_sql, order, page_size, offset=(page - 1) * page_size)
+    else:
+        q = base.wrap(ranked_sql, order, page_size, after=after)
+    df = run_query(q)
+    state["after"][page] = last_key(df, order)
+    return strip_keys(df, order)
+
+def download_data(df, label: str, key: str, sql: str | Query | None = None):
+    # Nothing is serialized until the button is clicked (exports.py). df is a frame
+    # or a zero-arg callable returning one; with sql, the engine writes the extract.
+    fmt = st.session_state.get("export_format", "csv")
+    mime, ext = EXPORT_FORMATS[fmt]
+    if sql is not None:
+        backend = _backend()
+        data = lambda: export_sql(backend, Query.of(sql).inline(), fmt)
+    else:
+        data = lambda: export_frame(df() if callable(df) else df, fmt)
     st.download_button(
         label=label,
-        data=df.to_csv(index=False).encode("utf-8"),
-        file_name=f"{key}.csv",
-        mime="text/csv",
+        data=data,
+        file_name=f"{key}{ext}",
+        mime=mime,
         key=f"dl_{key}",
     )
 
+KPI_STATS = {"count": "Count", "mean": "Mean", "p50": "Median", "min": "Min", "max": "Max", "p90": "P90"}
+
 def kpi_row(df: pd.DataFrame, value_col: str, fmt="{:,.2f}", extra: dict | None = None):
-    s = pd.to_numeric(df[value_col], errors="coerce").dropna()
-    stats = {
-        "Count": len(s),
-        "Mean": s.mean(),
-        "Median": s.median(),
-        "Min": s.min(),
-        "Max": s.max(),
-        "P90": s.quantile(0.90)
-    }
+    kpi_metrics(describe(df[value_col], stats=tuple(KPI_STATS)), fmt, extra)
+
+def kpi_metrics(summary: dict, fmt="{:,.2f}", extra: dict | None = None):
+    # summary: stats.describe() output or a stats.summary_sql() row
+    stats = {label: summary[k] for k, label in KPI_STATS.items()}
     if extra:
         stats.update(extra)
     cols = st.columns(min(6, len(stats)))
@@ -126,34 +403,93 @@ def kpi_row(df: pd.DataFrame, value_col: str, fmt="{:,.2f}", extra: dict | None
         else:
             col.metric(k, str(v))
 
-def coerce_numeric(df: pd.DataFrame, cols: list[str]) -> pd.DataFrame:
-    for c in cols:
-        if c in df.columns:
-            df[c] = pd.to_numeric(df[c], errors="coerce")
-    return df
+# -----------------------------
+# Diagnostics (hidden page)
+# -----------------------------
+def _diagnostics_gauges() -> dict[str, float]:
+    out = {"dashboard_queries_inflight": _dispatcher().inflight()}
+    cache = _result_cache()
+    if cache is not None:
+        out.update({f"result_cache_{k}": v for k, v in cache.stats().items() if isinstance(v, (int, float))})
+    out.update({f"query_pool_{k}": v for k, v in _backend().pool.stats().items() if isinstance(v, (int, float))})
+    version = _data_version()
+    out.update(data_version_probes=version.probes, data_version_changes=version.changes,
+               data_version_age_seconds=round(version.age_seconds() or 0.0, 1))
+    return out
+
+def render_diagnostics():
+    m = _metrics()
+    st.title("Diagnostics")
+    st.caption(f"This process since {pd.to_datetime(m.started, unit='s'):%Y-%m-%d %H:%M:%S} UTC • "
+               f"last {METRICS_HISTORY} queries and renders • data version {data_version}")
+
+    q = m.queries()
+    engine = q[q["source"] == "engine"] if not q.empty else q
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Queries", len(q))
+    c2.metric("Engine queries", len(engine))
+    c3.metric("Cache hit rate", f"{(1 - len(engine) / len(q)):.0%}" if len(q) else "–")
+    scanned = engine["bytes_scanned"].sum() if "bytes_scanned" in engine.columns else 0
+    c4.metric("Bytes scanned", f"{scanned / 1e6:,.1f} MB")
+
+    st.subheader("Cache hit rate by table")
+    st.dataframe(m.hit_rates(), use_container_width=True)
+    st.subheader("Queries by table and source")
+    st.dataframe(m.query_summary(), use_container_width=True)
+    st.subheader("Tab renders")
+    st.dataframe(m.render_summary(), use_container_width=True)
+    st.subheader("Recent queries")
+    st.dataframe(q.iloc[::-1].head(200), use_container_width=True)
+    st.subheader("Caches and connection pool")
+    st.json(_diagnostics_gauges())
+
+    d1, d2 = st.columns(2)
+    d1.download_button("Export JSON", data=m.to_json, file_name="dashboard_metrics.json",
+                       mime="application/json", key="dl_metrics_json")
+    d2.download_button("Export Prometheus text", data=lambda: m.to_prometheus(_diagnostics_gauges()),
+                       file_name="dashboard_metrics.prom", mime="text/plain", key="dl_metrics_prom")
+    with st.expander("Prometheus text"):
+        st.code(m.to_prometheus(_diagnostics_gauges()), language="text")
+
+# Data version for this rerun: every cached read below is keyed on it
+data_version = _data_version().current()
+
+_diagnostics_param = st.query_params.get("diagnostics", "").encode()
+if DIAGNOSTICS_TOKEN and hmac.compare_digest(_diagnostics_param, DIAGNOSTICS_TOKEN.encode()):
+    render_diagnostics()
+    st.stop()
 
-def coerce_datetime(df: pd.DataFrame, cols: list[str]) -> pd.DataFrame:
-    for c in cols:
-        if c in df.columns:
-            df[c] = pd.to_datetime(df[c], errors="coerce")
-    return df
+_rerun_t0 = time.perf_counter()
 
 # -----------------------------
 # Sidebar filters (global)
 # -----------------------------
+# Independent startup queries run concurrently (the cube starts once its window is known)
+prefetch(MANIFEST_SQL, FACILITY_INDEX_SQL)
+
 st.sidebar.header("Global Filters")
 
-states_all = get_states()
+states_all = get_states(data_version)
 default_states = states_all if len(states_all) <= 6 else states_all[:6]
 selected_states = st.sidebar.multiselect("States", options=states_all, default=default_states)
 
-fac_df = get_facilities(selected_states or states_all)
-facility_options = [f"{row.provider_name} ({row.ccn}) – {row.state}" for _, row in fac_df.iterrows()]
-facility_lookup = {f"{row.provider_name} ({row.ccn}) – {row.state}": row.ccn for _, row in fac_df.iterrows()}
-selected_facilities_ui = st.sidebar.multiselect("Facilities", options=facility_options, default=[])
-selected_ccns = [facility_lookup[x] for x in selected_facilities_ui]
+# Typeahead: the multiselect only offers the current matches (plus what is
+# already picked), so labels are built for a few dozen rows, not the directory
+fac_index = get_facility_index(data_version)
+fac_search = st.sidebar.text_input("Search facilities", placeholder="Name, CCN or city")
+fac_picked = st.session_state.get("facility_pick", [])
+fac_matches = fac_index.search(fac_search, selected_states, limit=FACILITY_SEARCH_LIMIT)
+selected_ccns = st.sidebar.multiselect(
+    "Facilities",
+    options=fac_picked + [c for c in fac_matches if c not in fac_picked],
+    format_func=fac_index.label,
+    key="facility_pick",
+)
+if len(fac_matches) >= FACILITY_SEARCH_LIMIT:
+    st.sidebar.caption(f"Showing the first {FACILITY_SEARCH_LIMIT} of "
+                       f"{fac_index.count(selected_states):,} facilities in scope – type to narrow")
 
-min_m, max_m = get_month_bounds()
+min_m, max_m = get_month_bounds(data_version)
 default_start = max(min_m, max_m - pd.offsets.MonthBegin(3))  # ~last 3 months by default
 month_range = st.sidebar.date_input(
     "Month range (applies to monthly views)",
@@ -167,70 +503,85 @@ if isinstance(month_range, tuple):
 else:
     start_date = pd.to_datetime(month_range)
     end_date = start_date
-
-def where_monthly(alias: str, month_col: str = "month") -> str:
-    states_clause = _in_clause(f"{alias}.state", selected_states) if selected_states else "TRUE"
-    ccns_clause = _in_clause(f"{alias}.ccn", selected_ccns) if selected_ccns else "TRUE"
-    date_clause = f"CAST({alias}.{month_col} AS DATE) BETWEEN DATE '{start_date:%Y-%m-%d}' AND DATE '{end_date:%Y-%m-%d}'"
-    return f"{states_clause} AND {ccns_clause} AND {date_clause}"
-
-def where_state_ccn_only(alias: str) -> str:
-    states_clause = _in_clause(f"{alias}.state", selected_states) if selected_states else "TRUE"
-    ccns_clause = _in_clause(f"{alias}.ccn", selected_ccns) if selected_ccns else "TRUE"
-    return f"{states_clause} AND {ccns_clause}"
+# The cube reads only the window's months; start it now, tabs 3-6 block on it
+window_months = month_window(start_date, end_date)
+prefetch(cube_sql(*window_months))
+
+st.sidebar.header("Downloads")
+st.sidebar.selectbox("File format", list(EXPORT_FORMATS), key="export_format",
+                     format_func={"csv": "CSV", "parquet": "Parquet (compact)", "arrow": "Arrow IPC"}.get)
+with st.sidebar.expander("Full extracts (unfiltered)"):
+    # Written engine-side (Athena UNLOAD / DuckDB COPY) only when clicked
+    extract_table = st.selectbox("Table", EXTRACT_TABLES, key="extract_table")
+    download_data(None, "Download extract", f"extract_{extract_table}", sql=f"SELECT * FROM {extract_table}")
+
+TAB_LABELS = [
+    "Facility HPRD",
+    "State HPRD",
+    "Total Nurse Hours",
+    "Perm vs Contract",
+    "Bed Utilization (+ Map)",
+    "Staffing vs Occupancy",
+]
+# Only the selected tab runs on a rerun (st.tabs below tracks it); its queries that
+# depend only on filters/widget state are dispatched now, before it blocks on one
+active_tab = st.session_state.get("active_tab", TAB_LABELS[0])
+facility_sql = facility_hprd_sql(selected_states, selected_ccns)
+if active_tab == TAB_LABELS[0]:
+    prefetch(
+        facility_sql.wrap(summary_sql, "hprd_weighted"),
+        facility_top_sql(selected_states, selected_ccns, st.session_state.get("hprd_topn", 50)),
+        facility_sql.wrap(count_sql),
+    )
+elif active_tab == TAB_LABELS[1]:
+    prefetch(state_hprd_sql(st.session_state.get("state_hprd_local_states", states_all)))
+else:
+    cube = get_cube(data_version, *window_months)
+    # Facility-month rows under the global state/facility/month filters
+    cube_window = slice_cube(cube, selected_states, selected_ccns, start_date, end_date)
 
 # -----------------------------
 # Tabs
 # -----------------------------
 st.title("Healthcare Staffing Analytics (Athena Gold Views)")
 
-tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
-    "Facility HPRD",
-    "State HPRD",
-    "Total Nurse Hours",
-    "Perm vs Contract",
-    "Bed Utilization (+ Map)",
-    "Staffing vs Occupancy"
-])
+# on_change="rerun": switching tabs reruns the script and only the open tab's body
+# executes (tab.open); content is computed the first time a tab is viewed
+tabs = st.tabs(TAB_LABELS, key="active_tab", on_change="rerun")
+
+def tab_fragment(name: str):
+    # Tab body as a fragment: its own widgets (sliders, radios, selectboxes) rerun
+    # only this function, not the sidebar or other tabs. Timed as `name`.
+    def wrap(fn):
+        @st.fragment
+        @functools.wraps(fn)
+        def run():
+            with _metrics().timed(name):
+                fn()
+        return run
+    return wrap
 
 # 1) Facility HPRD (all-time aggregation per your view)
-with tab1:
+@tab_fragment("tab1")
+def facility_hprd_tab():
     st.subheader("Facility HPRD (Nurse-to-patient ratio, resident-weighted, overall)")
 
-    # Query (unchanged)
-    sql = f"""
-      SELECT ccn, provider_name, state,
-             days_with_residents, start_date, end_date,
-             hprd_weighted, rn_hprd, lpn_hprd, cna_hprd
-      FROM gold_vw_hprd_by_facility
-      WHERE {where_state_ccn_only('gold_vw_hprd_by_facility')}
-    """
-    df = run_query(sql)
-
-    if not df.empty:
-        # --- KPIs (coerce to numeric first)
-        for col in ["hprd_weighted", "rn_hprd", "lpn_hprd", "cna_hprd"]:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors="coerce")
-
-        df_valid = df.dropna(subset=["hprd_weighted"]).copy()
+    # KPIs, Top-N and the table page are each computed by the engine; only the
+    # summary row, N bars and one page of rows are transferred.
+    summary = run_query(facility_sql.wrap(summary_sql, "hprd_weighted")).iloc[0]
+    n_valid = int(summary["count"])
 
-        kpi_row(df_valid, "hprd_weighted")
+    if n_valid:
+        kpi_metrics({**summary.to_dict(), "count": n_valid})
 
         # --- Top-N control
         topN = st.slider(
             "Show Top-N facilities by HPRD (overview)",
-            10, min(300, len(df_valid)), 50, 5, key="hprd_topn"
+            10, min(300, n_valid), 50, 5, key="hprd_topn"
         )
 
-        # Stable sort: highest HPRD first; tie-break by provider name
-        df_sorted = df_valid.sort_values(
-            ["hprd_weighted", "provider_name"],
-            ascending=[False, True],
-            kind="mergesort"  # stable sort
-        )
-
-        df_top = df_sorted.head(topN)
+        # Highest HPRD first; tie-break by provider name
+        df_top = strip_keys(run_query(facility_top_sql(selected_states, selected_ccns, topN)), FACILITY_TOP_ORDER)
 
         # --- Overview bar (y sorted by numeric field)
         bar = alt.Chart(df_top).mark_bar().encode(
@@ -253,28 +604,20 @@ with tab1:
 
         st.altair_chart(bar, use_container_width=True)
 
-    table = paginate_df(df.sort_values("hprd_weighted", ascending=False), page_size=25, key="t1")
+    table = paginate_sql(facility_sql, FACILITY_PAGE_ORDER, page_size=25, key="t1")
     st.dataframe(table, use_container_width=True)
-    download_csv(df, "Download CSV", "facility_hprd_overall")
+    download_data(None, "Download", "facility_hprd_overall", sql=facility_sql)
 
 
 # 2) State HPRD (overall per your view)
-with tab2:
+@tab_fragment("tab2")
+def state_hprd_tab():
     st.subheader("State HPRD (Nurse-to-patient ratio, resident-weighted, overall)")
 
     # Local override: default to all states, optional filter
-    local_states = st.multiselect("Filter states (optional)", options=states_all, default=states_all)
-    where_local = _in_clause("state", local_states) if local_states else "TRUE"
-
-    sql = f"""
-      SELECT state, start_date, end_date, hprd_weighted
-      FROM gold_vw_hprd_by_state
-      WHERE {where_local}
-      ORDER BY hprd_weighted DESC
-    """
-    df = run_query(sql)
-
-    df = coerce_numeric(df, ["hprd_weighted"])
+    local_states = st.multiselect("Filter states (optional)", options=states_all, default=states_all,
+                                  key="state_hprd_local_states")
+    df = run_query(state_hprd_sql(local_states))
 
     # ...
     if not df.empty:
@@ -290,11 +633,12 @@ with tab2:
 
     table = paginate_df(df, page_size=50, key="t2")
     st.dataframe(table, use_container_width=True)
-    download_csv(df, "Download CSV", "state_hprd_overall")
+    download_data(df, "Download", "state_hprd_overall")
 
 
 # 3) Total nurse hours by facility/month
-with tab3:
+@tab_fragment("tab3")
+def nurse_hours_tab():
     st.subheader("Total Nurse Hours")
 
     view_mode = st.radio(
@@ -305,25 +649,14 @@ with tab3:
     )
 
     if view_mode.startswith("Facility"):
-        # pull facility-month hours within filters
-        sql = f"""
-          SELECT state, provider_name, ccn, month, total_hours_direct
-          FROM gold_vw_total_nurse_hours_facility_monthly
-          WHERE {where_monthly('gold_vw_total_nurse_hours_facility_monthly', 'month')}
-        """
-        df = run_query(sql)
+        # facility-month hours within filters (from the cube)
+        df = cube_window[["state", "provider_name", "ccn", "month", "total_hours_direct"]]
         if not df.empty:
-            df = coerce_numeric(df, ["total_hours_direct"])
-            df = coerce_datetime(df, ["month"])
-
             # aggregate per facility over the selected months
-            agg = (df.groupby(["ccn","provider_name","state"], as_index=False)
-                     .agg(avg_hours=("total_hours_direct","mean"),
-                          min_hours=("total_hours_direct","min"),
-                          max_hours=("total_hours_direct","max"),
-                          p10=("total_hours_direct", lambda s: s.quantile(0.10)),
-                          p90=("total_hours_direct", lambda s: s.quantile(0.90)),
-                          months=("total_hours_direct","size")))
+            agg = (group_stats(df, ["ccn","provider_name","state"], "total_hours_direct",
+                               stats=("mean", "min", "max", "p10", "p90"))
+                     .rename(columns={"mean": "avg_hours", "min": "min_hours", "max": "max_hours",
+                                      "size": "months"}))
 
             # Top-N by average hours
             topN = st.slider("Top-N facilities by average monthly hours", 10, min(200, len(agg)), 50, 5, key="hours_fac_topn")
@@ -359,7 +692,7 @@ with tab3:
             # detail table (Top-N)
             table = paginate_df(keep, 50, key="t3_fac_summary")
             st.dataframe(table, use_container_width=True)
-            download_csv(keep, "Download CSV", "total_hours_facility_summary")
+            download_data(keep, "Download", "total_hours_facility_summary")
 
 
     else:
@@ -382,93 +715,9 @@ with tab3:
 
         )
 
-        # Predicates (avoid global state filter)
-
-        month_pred = f"CAST(month AS DATE) BETWEEN DATE '{start_date:%Y-%m-%d}' AND DATE '{end_date:%Y-%m-%d}'"
-
-        where_local_s = _in_clause("s.state", local_states) if local_states else "TRUE"
-
-        where_local_fc = _in_clause("state", local_states) if local_states else "TRUE"
+        # State-month totals + MoM% and # facilities (cube, avoids global state/facility filters)
 
-        # Pull state-month totals + MoM% and # facilities to enable multiple comparisons
-
-        sql = f"""
-
-          WITH fac_counts AS (
-
-            SELECT state, month, COUNT(DISTINCT ccn) AS n_facilities
-
-            FROM gold_vw_total_nurse_hours_facility_monthly
-
-            WHERE {where_local_fc}
-
-              AND {month_pred}
-
-            GROUP BY 1,2
-
-          ),
-
-          state_month AS (
-
-            SELECT s.state,
-
-                   s.month,
-
-                   s.total_hours_direct,
-
-                   date_format(s.month, '%%Y-%%m') AS month_label
-
-            FROM gold_vw_total_nurse_hours_state_monthly s
-
-            WHERE {where_local_s}
-
-              AND {month_pred}
-
-          ),
-
-          joined AS (
-
-            SELECT sm.state,
-
-                   sm.month,
-
-                   sm.month_label,
-
-                   sm.total_hours_direct,
-
-                   COALESCE(fc.n_facilities, 0) AS n_facilities
-
-            FROM state_month sm
-
-            LEFT JOIN fac_counts fc
-
-              ON fc.state = sm.state AND fc.month = sm.month
-
-          ),
-
-          with_change AS (
-
-            SELECT j.*,
-
-                   (j.total_hours_direct
-
-                     - LAG(j.total_hours_direct) OVER (PARTITION BY j.state ORDER BY j.month))
-
-                   / NULLIF(LAG(j.total_hours_direct) OVER (PARTITION BY j.state ORDER BY j.month), 0) AS mom_change
-
-            FROM joined j
-
-          )
-
-          SELECT *
-
-          FROM with_change
-
-          ORDER BY month
-
-        """
-
-        df = run_query(sql)
+        df = state_month_totals(slice_cube(cube, local_states, None, start_date, end_date))
 
         if df.empty:
 
@@ -476,8 +725,6 @@ with tab3:
 
         else:
 
-            df = coerce_numeric(df, ["total_hours_direct", "n_facilities", "mom_change"])
-            df = coerce_datetime(df, ["month"])
             df["avg_per_fac"] = np.where(df["n_facilities"] > 0,
                                          df["total_hours_direct"] / df["n_facilities"], np.nan)
             view_mode = st.radio(
@@ -528,7 +775,7 @@ with tab3:
                 st.altair_chart(bar, use_container_width=True)
                 table = paginate_df(dfm, 100, key="t3_state_ranked")
                 st.dataframe(table, use_container_width=True)
-                download_csv(dfm, "Download CSV", "total_hours_state_ranked")
+                download_data(dfm, "Download", "total_hours_state_ranked")
 
             else:
                 # Dumbbell: first vs last month in the selection
@@ -547,13 +794,12 @@ with tab3:
                 fac_last = (base[base["month"] == last_m][["state", "n_facilities"]]
                             .rename(columns={"n_facilities": "n_fac_last"}))
                 piv = piv.merge(fac_first, on="state", how="left").merge(fac_last, on="state", how="left")
-                piv = coerce_numeric(piv, ["first_hours", "last_hours", "n_fac_first", "n_fac_last"])
                 piv["delta"] = piv["last_hours"] - piv["first_hours"]
                 piv["pct"] = np.where(piv["first_hours"] > 0, piv["delta"] / piv["first_hours"], np.nan)
                 # KPIs
                 kpi_row(piv, "last_hours", fmt="{:,.0f}",
                         extra={"Δ total": f"{piv['delta'].sum():,.0f}",
-                               "Median %Δ": f"{np.nanmedian(piv['pct']):.1%}"})
+                               "Median %Δ": f"{describe(piv['pct'], stats=('p50',))['p50']:.1%}"})
                 # Top-N by max(first,last) to keep chart readable
                 topN = st.slider("Top-N states by size (ma of first/last)", 5, min(50, len(piv)), min(20, len(piv)), 1,
                                  key="state_dumbbell_topn")
@@ -584,40 +830,24 @@ with tab3:
                 st.altair_chart((line + updown).properties(height=max(260, 22 * len(keep))), use_container_width=True)
                 table = paginate_df(keep.drop(columns=["rank_key"]), 100, key="t3_state_dumbbell")
                 st.dataframe(table, use_container_width=True)
-                download_csv(keep.drop(columns=["rank_key"]), "Download CSV", "total_hours_state_dumbbell")
+                download_data(keep.drop(columns=["rank_key"]), "Download", "total_hours_state_dumbbell")
 
 # 4) Permanent vs Contract (monthly)
-with tab4:
+@tab_fragment("tab4")
+def perm_contract_tab():
     st.subheader("Permanent vs Contract")
 
     # pick a single month for clarity
-    m_sql = f"""
-      SELECT DISTINCT month
-      FROM gold_vw_perm_vs_contract_facility_monthly
-      WHERE {_in_clause("state", selected_states) if selected_states else "TRUE"}
-        AND CAST(month AS DATE) BETWEEN DATE '{start_date:%Y-%m-%d}' AND DATE '{end_date:%Y-%m-%d}'
-      ORDER BY month
-    """
-    months = run_query(m_sql)
-    if months.empty:
+    months = cube_months(slice_cube(cube, selected_states, None, start_date, end_date))
+    if not months:
         st.info("No monthly data for the selected filters.")
     else:
-        chosen = st.selectbox("Month", months["month"].tolist(), index=len(months)-1,
+        chosen = st.selectbox("Month", months, index=len(months)-1,
                               format_func=lambda x: str(pd.to_datetime(x).date()), key="perm_contract_month_select")
-        sql = f"""
-          SELECT state, ccn, month, emp_hours, ctr_hours
-          FROM gold_vw_perm_vs_contract_facility_monthly
-          WHERE {_in_clause("state", selected_states) if selected_states else "TRUE"}
-            AND CAST(month AS DATE) = DATE '{pd.to_datetime(chosen):%Y-%m-%d}'
-            AND {_in_clause("ccn", selected_ccns) if selected_ccns else "TRUE"}
-        """
-        df = run_query(sql)
-
+        df = slice_cube(cube, selected_states, selected_ccns, month=chosen)[
+            ["state", "ccn", "provider_name", "month", "emp_hours", "ctr_hours"]].copy()
 
         if not df.empty:
-            fac_names = get_facilities(selected_states or states_all)[["ccn","provider_name","state"]]
-            df = df.merge(fac_names, on=["ccn","state"], how="left")
-            df = coerce_numeric(df, ["emp_hours", "ctr_hours"])
             df["total_hours"] = df["emp_hours"].fillna(0) + df["ctr_hours"].fillna(0)
             df["pct_contract"] = np.where(df["total_hours"] > 0,
                                           df["ctr_hours"].fillna(0) / df["total_hours"], np.nan)
@@ -657,9 +887,6 @@ with tab4:
                 )
                 topN = st.slider("Top-N facilities", 10, min(200, len(df)), 50, 5, key="pc_topn_bubble")
 
-                # Ensure numerics exist (safe if already coerced earlier)
-                df = coerce_numeric(df, ["pct_contract", "total_hours", "emp_hours", "ctr_hours"])
-
                 # Stable ranking
                 if rank_by.startswith("Contract"):
                     df_sorted = df.sort_values(
@@ -684,7 +911,7 @@ with tab4:
                     extra={
                         "Facilities": len(keep),
                         "Total hours": f"{keep['total_hours'].sum():,.0f}",
-                        "Median % contract": f"{keep['pct_contract'].median():.1%}"
+                        "Median % contract": f"{describe(keep['pct_contract'], stats=('p50',))['p50']:.1%}"
                     }
                 )
 
@@ -715,28 +942,17 @@ with tab4:
                     keep[["provider_name", "state", "pct_contract", "total_hours", "emp_hours", "ctr_hours"]],
                     50, key="t4_bubble_table")
                 st.dataframe(table, use_container_width=True)
-                download_csv(keep, "Download CSV", "perm_contract_topn_bubbles")
+                download_data(keep, "Download", "perm_contract_topn_bubbles")
 
 # 5) Bed Utilization (reworked)
-with tab5:
+@tab_fragment("tab5")
+def bed_utilization_tab():
     st.subheader("Bed Utilization by Facility / Month")
 
-    sql = f"""
-      SELECT v.state, v.provider_name, v.ccn, v.month,
-             v.bed_utilization_rate_monthly AS utilization,
-             v.resident_days, v.observed_days, v.certified_beds_reported,
-             d.latitude AS lat, d.longitude AS lon
-      FROM gold_vw_bed_utilization_facility_monthly v
-      LEFT JOIN gold_facility_dim d ON d.ccn = v.ccn
-      WHERE {where_monthly('v', 'month')}
-      ORDER BY v.month
-    """
-    df = run_query(sql)
+    df = cube_window[["state", "provider_name", "ccn", "month", "utilization",
+                      "resident_days", "observed_days", "certified_beds_reported", "lat", "lon"]]
 
     if not df.empty:
-        df = coerce_numeric(df, ["utilization","resident_days","observed_days","certified_beds_reported","lat","lon"])
-        df = coerce_datetime(df, ["month"])
-
         # KPIs across selection
         kpi_row(df, "utilization", fmt="{:.2f}",
                 extra={"Facilities": df["ccn"].nunique(), "Months": df["month"].nunique()})
@@ -783,17 +999,16 @@ with tab5:
 
             table = paginate_df(dfm, 50, key="t5_rank_table")
             st.dataframe(table, use_container_width=True)
-            download_csv(dfm, "Download CSV", "bed_util_ranked")
+            download_data(dfm, "Download", "bed_util_ranked")
 
         elif "Variability" in view_mode:
             # Facility scatter: x=avg utilization, y=variability, size=exposure
-            agg = (df.groupby(["ccn","provider_name","state"], as_index=False)
-                     .agg(avg_util=("utilization","mean"),
-                          std_util=("utilization","std"),
-                          p10=("utilization", lambda s: s.quantile(0.10)),
-                          p90=("utilization", lambda s: s.quantile(0.90)),
-                          res_days=("resident_days","sum"),
-                          months=("utilization","size")))
+            agg = (group_stats(df, ["ccn","provider_name","state"], "utilization",
+                               stats=("mean", "std", "p10", "p90"))
+                     .rename(columns={"mean": "avg_util", "std": "std_util", "size": "months"}))
+            # group_stats rows are sorted by the group keys, as is this sum
+            agg["res_days"] = (df.groupby(["ccn","provider_name","state"], observed=True, sort=True)
+                                 ["resident_days"].sum().to_numpy())
             # choose variability metric
             var_metric = st.radio("Variability metric", ["Std dev", "P90 − P10"], horizontal=True, key="bed_scatter_var_metric")
             agg["var_util"] = agg["std_util"] if var_metric=="Std dev" else (agg["p90"] - agg["p10"])
@@ -802,7 +1017,7 @@ with tab5:
             topN = st.slider("Top-N facilities by resident-days", 10, min(300, len(agg)), 100, 10, key="bed_scatter_topn")
             keep = (agg.sort_values(["res_days","provider_name"], ascending=[False, True], kind="mergesort")
                         .head(topN))
-            kpi_row(keep, "avg_util", fmt="{:.2f}", extra={"Median variability": f"{keep['var_util'].median():.2f}"})
+            kpi_row(keep, "avg_util", fmt="{:.2f}", extra={"Median variability": f"{describe(keep['var_util'], stats=('p50',))['p50']:.2f}"})
 
             sc = alt.Chart(keep).mark_circle(opacity=0.85).encode(
                 x=alt.X("avg_util:Q", title="Average utilization"),
@@ -821,7 +1036,7 @@ with tab5:
 
             table = paginate_df(keep.drop(columns=["std_util","p10","p90"]), 50, key="t5_scatter_table")
             st.dataframe(table, use_container_width=True)
-            download_csv(keep, "Download CSV", "bed_util_scatter")
+            download_data(keep, "Download", "bed_util_scatter")
 
         else:
             # Dumbbell: first vs last month change per facility
@@ -831,11 +1046,11 @@ with tab5:
                 first_m, last_m = months_sorted[0], months_sorted[-1]
                 base = df[df["month"].isin([first_m, last_m])].copy()
                 piv = (base.pivot_table(index=["ccn","provider_name","state"],
-                                        columns="month", values="utilization", aggfunc="mean")
+                                        columns="month", values="utilization", aggfunc="mean", observed=True)
                               .reset_index()
                               .rename(columns={first_m:"first_util", last_m:"last_util"}))
                 # exposure for ranking
-                exposure = (df.groupby("ccn", as_index=False)["resident_days"].sum().rename(columns={"resident_days":"res_days"}))
+                exposure = (df.groupby("ccn", as_index=False, observed=True)["resident_days"].sum().rename(columns={"resident_days":"res_days"}))
                 piv = piv.merge(exposure, on="ccn", how="left")
                 piv["delta"] = piv["last_util"] - piv["first_util"]
 
@@ -867,9 +1082,9 @@ with tab5:
                 st.altair_chart((line + pts).properties(height=max(240, min(30*len(keep), 700))),
                                 use_container_width=True)
 
-                table = paginate_df(keep.drop(columns=[]), 50, key="t5_dumbbell_table")
+                table = paginate_df(keep, 50, key="t5_dumbbell_table")
                 st.dataframe(table, use_container_width=True)
-                download_csv(keep, "Download CSV", "bed_util_dumbbell")
+                download_data(keep, "Download", "bed_util_dumbbell")
 
         # --- Distribution (always visible)
         with st.expander("Distribution across selected period", expanded=True):
@@ -882,84 +1097,70 @@ with tab5:
 
         # --- Map (latest month), no Mapbox token needed (Carto/OSM tiles)
         import pydeck as pdk
-        import numpy as np
 
         latest_m = df["month"].max()
-        latest_df = df[(df["month"] == latest_m) & df["lat"].notna() & df["lon"].notna()].copy()
+        latest_df = df[(df["month"] == latest_m) & df["lat"].notna() & df["lon"].notna()]
         st.caption(f"Map — {pd.to_datetime(latest_m).strftime('%Y-%m')} (color by utilization, size by resident-days)")
 
         if not latest_df.empty:
-            # Build color array from utilization (blue→red)
-            def util_to_color(u):
-                if pd.isna(u):
-                    return [160, 160, 160, 140]
-                v = float(max(0.0, min(1.0, u)))
-                r = int(20 + 235 * v)
-                g = int(60 + 40 * (1 - v))
-                b = int(210 - 190 * v)
-                return [r, g, b, 170]
-
-
-            latest_df["color"] = latest_df["utilization"].apply(util_to_color)
-
-            # PRECOMPUTE radius (no functions in JSON accessors!)
-            # radius ~ 20*sqrt(resident_days), clipped to [2000, 12000]
-            latest_df["radius"] = (
-                latest_df["resident_days"]
-                .fillna(0)
-                .clip(lower=0)
-                .apply(lambda x: int(np.clip(20 * np.sqrt(x), 2000, 12000)))
-            )
-
-            view = pdk.ViewState(
-                latitude=float(latest_df["lat"].mean()),
-                longitude=float(latest_df["lon"].mean()),
-                zoom=4
-            )
+            map_states = sorted(latest_df["state"].astype(str).unique())
+            mc1, mc2 = st.columns([1, 2])
+            with mc1:
+                focus = st.selectbox("Center on", ["All selected"] + map_states, key="bed_map_focus")
+            focus_df = latest_df if focus == "All selected" else latest_df[latest_df["state"] == focus]
+            with mc2:
+                zoom = st.select_slider("Zoom (grid cells below %d, facilities at %d+)" % (POINT_ZOOM, POINT_ZOOM),
+                                        options=list(range(3, 10)),
+                                        value=4 if focus == "All selected" else 6,
+                                        key=f"bed_map_zoom_{focus}")
+            center = (float(focus_df["lat"].mean()), float(focus_df["lon"].mean()))
+            kind, layer_df, n_in_view = map_layer_data(latest_df, zoom, center)
 
             tile_layer = pdk.Layer(
                 "TileLayer",
-                data="https://c.basemaps.cartocdn.com/light_all/{z}/{x}/{y}{r}.png",
+                data=CARTO_TILES,
                 min_zoom=0, max_zoom=19, tile_size=256
             )
-
-            points = pdk.Layer(
-                "ScatterplotLayer",
-                data=latest_df,
-                get_position='[lon, lat]',  # OK as a field list
-                get_fill_color='color',  # uses the precomputed RGBA list
-                get_radius='radius',  # uses the precomputed numeric column
-                pickable=True
-            )
+            if kind == "points":
+                layer = pdk.Layer(
+                    "ScatterplotLayer",
+                    data=layer_df,
+                    get_position="[lon, lat]",
+                    get_fill_color="color",
+                    get_radius="radius",
+                    pickable=True
+                )
+                st.caption(f"{len(layer_df):,} of {n_in_view:,} facilities in view")
+            else:
+                layer = pdk.Layer(
+                    "PolygonLayer",
+                    data=layer_df,
+                    get_polygon="polygon",
+                    get_fill_color="color",
+                    get_line_color=[255, 255, 255, 90],
+                    line_width_min_pixels=0.5,
+                    pickable=True
+                )
+                st.caption(f"{n_in_view:,} facilities in {len(layer_df):,} grid cells — zoom to {POINT_ZOOM}+ for individual facilities")
 
             deck = pdk.Deck(
-                layers=[tile_layer, points],
-                initial_view_state=view,
-                tooltip={
-                    "text": "{provider_name}\nState: {state}\nUtil: {utilization}\nRes-days: {resident_days}"
-                }
+                layers=[tile_layer, layer],
+                initial_view_state=pdk.ViewState(latitude=center[0], longitude=center[1], zoom=zoom),
+                tooltip={"text": "{label}"}
             )
             st.pydeck_chart(deck, use_container_width=True)
         else:
             st.info("No coordinates available for the selected filters/month.")
 
 # 6) Staffing vs Occupancy (scatter, computed monthly HPRD via two monthly views)
-with tab6:
+@tab_fragment("tab6")
+def staffing_occupancy_tab():
     st.subheader("Staffing vs Occupancy (Monthly HPRD vs Utilization)")
-    # Month choices (from bed util view, respects filters)
-    month_sql = f"""
-      SELECT DISTINCT month
-      FROM gold_vw_bed_utilization_facility_monthly
-      WHERE {_in_clause("state", selected_states) if selected_states else "TRUE"}
-        AND CAST(month AS DATE) BETWEEN DATE '{start_date:%Y-%m-%d}' AND DATE '{end_date:%Y-%m-%d}'
-        AND {_in_clause("ccn", selected_ccns) if selected_ccns else "TRUE"}
-      ORDER BY month
-    """
-    months = run_query(month_sql)
-    if months.empty:
+    # Month choices (respects filters)
+    month_choices = cube_months(cube_window)
+    if not month_choices:
         st.info("No monthly data for the selected filters.")
     else:
-        month_choices = months["month"].tolist()
         chosen_month = st.selectbox(
             "Month",
             options=month_choices,
@@ -967,32 +1168,11 @@ with tab6:
             format_func=lambda x: str(pd.to_datetime(x).date()),
             key="staffing_vs_occupancy_month_select"
         )
-        # Join monthly hours with monthly bed util to compute HPRD = total_hours_direct / resident_days
-        sql = f"""
-          SELECT bu.state,
-                 bu.provider_name,
-                 bu.ccn,
-                 bu.month,
-                 bu.bed_utilization_rate_monthly AS utilization,
-                 bu.resident_days,
-                 bu.observed_days,
-                 CAST(bu.resident_days / NULLIF(bu.observed_days, 0) AS DECIMAL(18,4)) AS monthly_avg_residents,
-                 th.total_hours_direct,
-                 CAST(th.total_hours_direct / NULLIF(CAST(bu.resident_days AS DECIMAL(18,4)), 0) AS DECIMAL(18,4)) AS hprd_monthly
-          FROM gold_vw_bed_utilization_facility_monthly bu
-          INNER JOIN gold_vw_total_nurse_hours_facility_monthly th
-            ON th.ccn = bu.ccn AND th.month = bu.month
-          WHERE {_in_clause("bu.state", selected_states) if selected_states else "TRUE"}
-            AND CAST(bu.month AS DATE) = DATE '{pd.to_datetime(chosen_month):%Y-%m-%d}'
-            AND {_in_clause("bu.ccn", selected_ccns) if selected_ccns else "TRUE"}
-        """
-        df = run_query(sql)
+        # HPRD = total_hours_direct / resident_days, per facility for the chosen month
+        df = slice_cube(cube_window, month=chosen_month)[
+            ["state", "provider_name", "ccn", "month", "utilization", "resident_days", "observed_days",
+             "monthly_avg_residents", "total_hours_direct", "hprd_monthly"]]
         if not df.empty:
-            df = coerce_numeric(df,
-                                ["utilization", "resident_days", "observed_days", "total_hours_direct", "hprd_monthly",
-                                 "monthly_avg_residents"])
-            df = coerce_datetime(df, ["month"])
-
             sc = alt.Chart(df).mark_circle().encode(
                 x=alt.X("utilization:Q", title="Bed Utilization Rate"),
                 y=alt.Y("hprd_monthly:Q", title="HPRD (Monthly, Weighted)"),
@@ -1009,8 +1189,20 @@ with tab6:
             st.altair_chart(sc, use_container_width=True)
         table = paginate_df(df, page_size=100, key="t6")
         st.dataframe(table, use_container_width=True)
-        download_csv(df, "Download CSV", "staffing_vs_occupancy_hprd_vs_utilization")
+        download_data(df, "Download", "staffing_vs_occupancy_hprd_vs_utilization")
+
+
+for tab, render in zip(tabs, [facility_hprd_tab, state_hprd_tab, nurse_hours_tab, perm_contract_tab,
+                              bed_utilization_tab, staffing_occupancy_tab]):
+    if tab.open:
+        with tab:
+            render()
+
+if QUERY_BACKEND == "duckdb":
+    st.caption(f"Views queried from local DuckDB (Gold extracts) • Data dir: {DUCKDB_DATA_DIR}")
+else:
+    st.caption("Views queried from Athena (Gold) • "
+               f"Workgroup: {ATHENA_WORKGROUP} • Database: {ATHENA_DATABASE} • "
+               f"Catalog: {ATHENA_CATALOG} • Region: {AWS_REGION}")
 
-st.caption("Views queried from Athena (Gold) • "
-           f"Workgroup: {ATHENA_WORKGROUP} • Database: {ATHENA_DATABASE} • "
-           f"Catalog: {ATHENA_CATALOG} • Region: {AWS_REGION}")
+_metrics().record_render("rerun", time.perf_counter() - _rerun_t0)
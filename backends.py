@@ -0,0 +1,390 @@
+import glob
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from exports import CHUNK_ROWS, write_batches
+from queries import sql_literal
+from schemas import to_frame
+
+# -----------------------------
+# Query backends
+# -----------------------------
+# "athena": PyAthena against the Glue catalog (production).
+# "duckdb": in-process DuckDB over local Parquet/CSV extracts of the gold tables,
+#           with the gold views recreated locally (offline dev + perf testing).
+#
+# Fetch modes (how result rows reach pandas):
+# "arrow":  bulk-read the engine's result file as typed Arrow columns (default).
+# "unload": have the engine write the result as Parquet to a staging location
+#           (Athena UNLOAD / DuckDB COPY TO) and read that file back.
+# "dbapi":  row-by-row DB-API fetch via pd.read_sql (legacy path).
+# Every path decodes through schemas.to_frame (typed columns, categoricals).
+#
+# query(sql, params=...) takes "?" placeholders (queries.py): DuckDB binds them
+# as prepared-statement parameters, Athena as execution parameters (literals).
+
+FETCH_MODES = ("arrow", "unload", "dbapi")
+
+SQL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sql")
+
+GOLD_TABLES = ["gold_daily_staffing_fact", "gold_quarterly_provider_fact", "gold_facility_dim"]
+
+# Summary tables and views are created in this order; later files depend on earlier ones
+LOCAL_VIEW_FILES = [
+    os.path.join(SQL_DIR, "local", "gold_monthly.sql"),
+    os.path.join(SQL_DIR, "views_hours.sql"),
+    os.path.join(SQL_DIR, "views_bed_utilization.sql"),
+    os.path.join(SQL_DIR, "local", "views_dashboard.sql"),
+    os.path.join(SQL_DIR, "local", "dashboard_manifest.sql"),
+]
+
+# Athena/Trino functions the dashboard SQL uses that DuckDB spells differently
+DUCKDB_COMPAT_MACROS = [
+    "CREATE OR REPLACE MACRO date_format(ts, fmt) AS strftime(ts, fmt)",
+    "CREATE OR REPLACE MACRO approx_percentile(x, p) AS approx_quantile(x, p)",
+    "CREATE OR REPLACE MACRO array_join(a, sep) AS array_to_string(a, sep)",
+    # Pipeline SQL (pipeline/local.py): Trino's ISO-8601 parse and date_add(unit, n, d)
+    "CREATE OR REPLACE MACRO from_iso8601_timestamp(s) AS CAST(s AS TIMESTAMP)",
+    "CREATE OR REPLACE MACRO date_add(d, i) AS d + i, "
+    "(unit, n, d) AS d + CASE lower(unit) WHEN 'day' THEN to_days(n) WHEN 'month' THEN to_months(n) "
+    "WHEN 'year' THEN to_years(n) END",
+]
+
+
+class ConnectionPool:
+    # Bounded pool of warm connections shared by all sessions/threads of a process.
+    # A connection is used by one thread at a time. Idle connections past
+    # idle_timeout are closed; ones idle longer than check_after are health-checked
+    # before reuse; any error raised while a connection is checked out discards it.
+
+    def __init__(self, factory, max_size: int = 8, idle_timeout: float = 300.0, check_after: float = 60.0,
+                 health_check=None, close=None):
+        self._factory = factory
+        self._health_check = health_check
+        self._close = close or (lambda conn: conn.close())
+        self.idle_timeout = idle_timeout
+        self.check_after = check_after
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._idle: list[tuple[object, float]] = []  # LIFO: warmest connection last
+        self._lock = threading.Lock()
+        self.max_size = max_size
+        self.counters = {"created": 0, "reused": 0, "evicted_idle": 0, "failed_checks": 0, "discarded": 0}
+
+    def _bump(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _safe_close(self, conn):
+        try:
+            self._close(conn)
+        except Exception:
+            pass
+
+    def _prune(self) -> list:
+        # Caller holds the lock; returns expired connections to close outside it
+        now = time.monotonic()
+        keep, expired = [], []
+        for conn, last_used in self._idle:
+            (expired if now - last_used > self.idle_timeout else keep).append((conn, last_used))
+        self._idle = keep
+        self.counters["evicted_idle"] += len(expired)
+        return [conn for conn, _ in expired]
+
+    def _checkout(self):
+        while True:
+            with self._lock:
+                expired = self._prune()
+                item = self._idle.pop() if self._idle else None
+            for conn in expired:
+                self._safe_close(conn)
+            if item is None:
+                conn = self._factory()
+                self._bump("created")
+                return conn
+            conn, last_used = item
+            if self._health_check is not None and time.monotonic() - last_used > self.check_after:
+                try:
+                    healthy = self._health_check(conn)
+                except Exception:
+                    healthy = False
+                if not healthy:
+                    self._bump("failed_checks")
+                    self._safe_close(conn)
+                    continue
+            self._bump("reused")
+            return conn
+
+    @contextmanager
+    def connection(self):
+        self._slots.acquire()
+        conn = None
+        try:
+            conn = self._checkout()
+            yield conn
+        except BaseException:
+            if conn is not None:
+                self._bump("discarded")
+                self._safe_close(conn)
+                conn = None
+            raise
+        finally:
+            if conn is not None:
+                with self._lock:
+                    self._idle.append((conn, time.monotonic()))
+            self._slots.release()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self._safe_close(conn)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self.counters, "idle": len(self._idle), "max_size": self.max_size}
+
+
+def split_sql(text: str) -> list[str]:
+    # Strip "--" comment lines, then split on ";" (the sql/ files use no ";" in literals)
+    lines = [ln for ln in text.splitlines() if not ln.strip().startswith("--")]
+    return [s.strip() for s in "\n".join(lines).split(";") if s.strip()]
+
+
+class AthenaBackend:
+    name = "athena"
+
+    def __init__(self, region: str, s3_output: str, workgroup: str, database: str, catalog: str,
+                 fetch_mode: str = "arrow", pool_size: int = 8, pool_idle_seconds: float = 300.0,
+                 result_reuse_minutes: int = 0):
+        if fetch_mode not in FETCH_MODES:
+            raise ValueError(f"Unknown fetch mode {fetch_mode!r} (expected one of {FETCH_MODES})")
+        self.region = region
+        self.s3_output = s3_output
+        self.workgroup = workgroup
+        self.database = database
+        self.catalog = catalog
+        self.fetch_mode = fetch_mode
+        # Athena query result reuse: an identical statement + parameters within the
+        # window is answered from the earlier result without scanning (0 = off)
+        self.result_reuse_minutes = result_reuse_minutes
+        # Reuses boto3 session/client + resolved credentials across queries
+        self.pool = ConnectionPool(self.connect, max_size=pool_size, idle_timeout=pool_idle_seconds,
+                                   health_check=self._healthy)
+
+    @property
+    def namespace(self) -> str:
+        return f"athena:{self.catalog}:{self.database}:{self.workgroup}"
+
+    def connect(self):
+        from pyathena import connect
+        kwargs = {}
+        if self.fetch_mode != "dbapi":
+            # ArrowCursor reads the whole result object from the S3 staging dir
+            # (CSV, or Parquet when unloading) instead of paging GetQueryResults
+            from pyathena.arrow.cursor import ArrowCursor
+            kwargs = {"cursor_class": ArrowCursor,
+                      "cursor_kwargs": {"unload": self.fetch_mode == "unload"}}
+        return connect(
+            region_name=self.region,
+            s3_staging_dir=self.s3_output,
+            work_group=self.workgroup,
+            schema_name=self.database,
+            catalog_name=self.catalog,
+            **kwargs,
+        )
+
+    @staticmethod
+    def _healthy(conn) -> bool:
+        # Local check only (no API call): credentials still resolvable/unexpired.
+        # Connections that fail mid-query are discarded by the pool anyway.
+        creds = conn.session.get_credentials()
+        if creds is None:
+            return False
+        refresh_needed = getattr(creds, "refresh_needed", None)
+        return not (refresh_needed and refresh_needed())
+
+    def query(self, sql: str, info: dict | None = None, params: tuple = (),
+              reuse_minutes: int | None = None) -> pd.DataFrame:
+        # info, if given, receives timings/cost for instrumentation (metrics.py).
+        # reuse_minutes caps the result reuse window for this call (0 = never reuse).
+        info = {} if info is None else info
+        kwargs = {}
+        if params:
+            kwargs.update(parameters=[sql_literal(p) for p in params], paramstyle="qmark")
+        reuse = self.result_reuse_minutes if reuse_minutes is None else min(reuse_minutes, self.result_reuse_minutes)
+        if reuse > 0:
+            kwargs.update(result_reuse_enable=True, result_reuse_minutes=reuse)
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                t0 = time.perf_counter()
+                cur.execute(sql, **kwargs)
+                t1 = time.perf_counter()
+                if self.fetch_mode == "dbapi":
+                    cols = [d[0] for d in cur.description]
+                    df = to_frame(pa.Table.from_pandas(pd.DataFrame.from_records(cur.fetchall(), columns=cols),
+                                                       preserve_index=False))
+                else:
+                    df = to_frame(cur.as_arrow())
+                info.update(
+                    query_id=cur.query_id,
+                    execute_s=round(t1 - t0, 6),
+                    fetch_s=round(time.perf_counter() - t1, 6),
+                    queue_ms=cur.query_queue_time_in_millis,
+                    planning_ms=cur.query_planning_time_in_millis,
+                    engine_ms=cur.engine_execution_time_in_millis,
+                    bytes_scanned=cur.data_scanned_in_bytes,
+                    reused=cur.reused_previous_result,
+                    rows=len(df),
+                )
+                return df
+
+    def statement_cursor(self, conn):
+        # Cursor for statements whose rows are not read (UNLOAD, MERGE, INSERT, ...).
+        # Pooled connections pass their cursor_kwargs (ArrowCursor's unload=) to every
+        # cursor they open, which a plain pyathena Cursor rejects, so keep the
+        # connection's cursor class with unload off.
+        if self.fetch_mode == "dbapi":
+            return conn.cursor()
+        from pyathena.arrow.cursor import ArrowCursor
+        return conn.cursor(ArrowCursor, unload=False)
+
+    def export(self, sql: str, fmt: str, sink) -> int:
+        # Full extract: Athena UNLOADs Parquet to S3, which is streamed batch by
+        # batch into `sink` in the requested format and then removed
+        import pyarrow.dataset as ds
+        import pyarrow.fs as pafs
+
+        prefix = f"{self.s3_output.rstrip('/')}/exports/{uuid.uuid4().hex}/"
+        with self.pool.connection() as conn:
+            with self.statement_cursor(conn) as cur:
+                cur.execute(f"UNLOAD ({sql}) TO '{prefix}' WITH (format = 'PARQUET', compression = 'SNAPPY')")
+        fs = pafs.S3FileSystem(region=self.region)
+        path = prefix.removeprefix("s3://")
+        try:
+            dataset = ds.dataset(path, format="parquet", filesystem=fs)
+            return write_batches(dataset.to_batches(batch_size=CHUNK_ROWS), dataset.schema, sink, fmt)
+        finally:
+            fs.delete_dir(path)
+
+
+class DuckDBBackend:
+    name = "duckdb"
+
+    def __init__(self, data_dir: str, database: str = ":memory:", fetch_mode: str = "arrow",
+                 staging_dir: str | None = None, pool_size: int = 8, pool_idle_seconds: float = 300.0):
+        if fetch_mode not in FETCH_MODES:
+            raise ValueError(f"Unknown fetch mode {fetch_mode!r} (expected one of {FETCH_MODES})")
+        self.data_dir = data_dir
+        self.database = database
+        self.fetch_mode = fetch_mode
+        # Local stand-in for the Athena S3 staging dir (used by "unload")
+        self.staging_dir = staging_dir or os.path.join(tempfile.gettempdir(), "kerok-duckdb-staging")
+        self._con = None
+        self._lock = threading.Lock()
+        self.pool = ConnectionPool(self.connect, max_size=pool_size, idle_timeout=pool_idle_seconds,
+                                   health_check=lambda cur: cur.execute("SELECT 1").fetchone() == (1,))
+
+    @property
+    def namespace(self) -> str:
+        return f"duckdb:{os.path.abspath(self.data_dir)}"
+
+    def _source_for(self, table: str) -> str:
+        # <table>.parquet | <table>/**/*.parquet | <table>.csv
+        base = os.path.join(self.data_dir, table)
+        if os.path.isfile(base + ".parquet"):
+            return f"read_parquet('{base}.parquet')"
+        if os.path.isdir(base) and glob.glob(os.path.join(base, "**", "*.parquet"), recursive=True):
+            return f"read_parquet('{base}/**/*.parquet', hive_partitioning = true)"
+        if os.path.isfile(base + ".csv"):
+            return f"read_csv_auto('{base}.csv', header = true)"
+        raise FileNotFoundError(f"No Parquet/CSV extract for {table} under {self.data_dir}")
+
+    def _extracts_mtime(self) -> float:
+        # Newest modification time of the gold extracts: the local "publish" time
+        paths = [p for table in GOLD_TABLES for p in glob.glob(os.path.join(self.data_dir, table) + "*")]
+        paths += glob.glob(os.path.join(self.data_dir, "**", "*.parquet"), recursive=True)
+        return max((os.path.getmtime(p) for p in paths), default=time.time())
+
+    def _initialize(self, con):
+        for stmt in DUCKDB_COMPAT_MACROS:
+            con.execute(stmt)
+        for table in GOLD_TABLES:
+            con.execute(f"CREATE OR REPLACE TABLE {table} AS SELECT * FROM {self._source_for(table)}")
+        # Same extracts -> same manifest version in every process (sql/local/dashboard_manifest.sql)
+        con.execute(f"SET VARIABLE gold_extracts_ts = to_timestamp({self._extracts_mtime()!r})")
+        for path in LOCAL_VIEW_FILES:
+            with open(path, encoding="utf-8") as f:
+                for stmt in split_sql(f.read()):
+                    con.execute(stmt)
+
+    def connect(self):
+        with self._lock:
+            if self._con is None:
+                import duckdb
+                con = duckdb.connect(self.database)
+                self._initialize(con)
+                self._con = con
+        # cursor() = new connection to the same database; safe to use per thread
+        return self._con.cursor()
+
+    def query(self, sql: str, info: dict | None = None, params: tuple = (),
+              reuse_minutes: int | None = None) -> pd.DataFrame:
+        # info, if given, receives timings for instrumentation (no queue/scan stats locally);
+        # reuse_minutes is accepted for interface parity (DuckDB has no result reuse)
+        info = {} if info is None else info
+        with self.pool.connection() as cur:
+            t0 = time.perf_counter()
+            if self.fetch_mode == "unload":
+                df = self._unload_and_read(cur, sql, params)
+                t1 = time.perf_counter()
+            else:
+                cur.execute(sql, list(params))
+                t1 = time.perf_counter()
+                if self.fetch_mode == "dbapi":
+                    cols = [d[0] for d in cur.description]
+                    df = to_frame(pa.Table.from_pandas(pd.DataFrame.from_records(cur.fetchall(), columns=cols),
+                                                       preserve_index=False))
+                else:
+                    df = to_frame(cur.fetch_arrow_table())
+            info.update(execute_s=round(t1 - t0, 6), fetch_s=round(time.perf_counter() - t1, 6), rows=len(df))
+            return df
+
+    def export(self, sql: str, fmt: str, sink) -> int:
+        # Full extract: CSV/Parquet are written by the engine (COPY, like Athena
+        # UNLOAD) and the file is copied into `sink`; Arrow streams record batches
+        with self.pool.connection() as cur:
+            if fmt == "arrow":
+                reader = cur.execute(sql).fetch_record_batch(CHUNK_ROWS)
+                return write_batches(reader, reader.schema, sink, fmt)
+            out_dir = os.path.join(self.staging_dir, uuid.uuid4().hex)
+            os.makedirs(out_dir)
+            try:
+                path = os.path.join(out_dir, "export")
+                options = "FORMAT CSV, HEADER" if fmt == "csv" else "FORMAT PARQUET, COMPRESSION ZSTD"
+                rows = cur.execute(f"COPY ({sql}) TO '{path}' ({options})").fetchone()[0]
+                with open(path, "rb") as f:
+                    shutil.copyfileobj(f, sink, 1 << 20)
+                return rows
+            finally:
+                shutil.rmtree(out_dir, ignore_errors=True)
+
+    def _unload_and_read(self, cur, sql: str, params: tuple = ()) -> pd.DataFrame:
+        # Mirrors Athena UNLOAD: engine writes Parquet to staging, client bulk-reads it
+        out_dir = os.path.join(self.staging_dir, uuid.uuid4().hex)
+        os.makedirs(out_dir)
+        try:
+            path = os.path.join(out_dir, "result.parquet")
+            cur.execute(f"COPY ({sql}) TO '{path}' (FORMAT PARQUET)", list(params))
+            return to_frame(pq.read_table(path))
+        finally:
+            shutil.rmtree(out_dir, ignore_errors=True)
+
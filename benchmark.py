@@ -0,0 +1,283 @@
+import argparse
+import datetime as dt
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+# -----------------------------
+# Benchmark suite (synthetic data, local engine)
+# -----------------------------
+# One `run` = generate bronze CSVs (pipeline/synthetic.py) -> convert them to
+# Parquet (pipeline/bronze_to_parquet.py) -> run every landed file through the
+# pipeline SQL in DuckDB (pipeline/local.py) -> export gold -> run the same files
+# again as one batched drop (pipeline/runner.py) -> render app.py headless
+# (streamlit AppTest) on the DuckDB backend, cold and warm, reading per-tab and
+# per-query times from the app's own instrumentation (metrics.py).
+# The result is one JSON document; `compare` flags timings that regressed
+# between two of them. Timing fields end in "_s".
+#
+#   python benchmark.py run --facilities 15000 --quarters 4 --out data/benchmarks/base.json
+#   python benchmark.py compare data/benchmarks/base.json data/benchmarks/new.json
+
+RESULT_VERSION = 1
+DEFAULT_OUT_DIR = os.path.join("data", "benchmarks")
+REGRESSION_RATIO = 1.25
+REGRESSION_MIN_DELTA_S = 0.05
+
+
+def _git_rev() -> str:
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(APP_PATH), check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                               text=True, cwd=os.path.dirname(APP_PATH)).stdout.strip()
+        return rev + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _environment() -> dict:
+    import duckdb
+    import pandas as pd
+    import pyarrow as pa
+    import streamlit as st
+    return {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+            "duckdb": duckdb.__version__, "pandas": pd.__version__, "pyarrow": pa.__version__,
+            "streamlit": st.__version__}
+
+
+# -----------------------------
+# Stages
+# -----------------------------
+def bench_generate(landing_dir: str, facilities: int, quarters: int, start_quarter: str, seed: int,
+                   dirty_rate: float) -> dict:
+    from pipeline.synthetic import generate
+    t0 = time.perf_counter()
+    out = generate(landing_dir, facilities, quarters, start_quarter, seed, dirty_rate)
+    out["total_s"] = round(time.perf_counter() - t0, 4)
+    return out
+
+
+def bench_bronze_parquet(files: list[dict], out_dir: str) -> dict:
+    from pipeline.bronze_to_parquet import convert
+    runs = []
+    for f in files:
+        r = convert(f["path"], os.path.join(out_dir, f["dataset"]), f["dataset"])
+        runs.append({"dataset": f["dataset"], "quarter": f["quarter"], "rows": r["rows"], "convert_s": r["seconds"]})
+    return {"files": runs, "total_s": round(sum(r["convert_s"] for r in runs), 4)}
+
+
+def bench_pipeline(files: list[dict], gold_dir: str, threads: int | None = None) -> dict:
+    # Land files in quarter order, ProviderInfo before PBJ (as the dim must exist for the app)
+    from pipeline.local import LocalLakehouse
+    lake = LocalLakehouse(threads=threads)
+    runs, steps = [], {}
+    for f in sorted(files, key=lambda f: (f["quarter"], f["dataset"] != "providerinfo")):
+        t0 = time.perf_counter()
+        timings = lake.ingest(f["path"], f["dataset"])
+        runs.append({"dataset": f["dataset"], "quarter": f["quarter"], "total_s": round(time.perf_counter() - t0, 4),
+                     "steps_s": timings})
+        for step, s in timings.items():
+            key = f"{f['dataset']}.{step}"
+            steps[key] = round(steps.get(key, 0.0) + s, 4)
+    t0 = time.perf_counter()
+    lake.export_gold(gold_dir)
+    return {"files": runs, "steps_s": steps, "export_gold_s": round(time.perf_counter() - t0, 4),
+            "total_s": round(sum(r["total_s"] for r in runs), 4), "statements": dict(lake.statements),
+            "rows": lake.row_counts()}
+
+
+def bench_pipeline_batched(files: list[dict], threads: int | None = None) -> dict:
+    # The same files as one drop through pipeline/runner.py (one MERGE per table)
+    from pipeline.local import LocalLakehouse
+    from pipeline.runner import Runner
+    drop = {}
+    for f in sorted(files, key=lambda f: f["quarter"]):
+        drop.setdefault(f["dataset"], []).append(f["path"])
+    report = Runner(LocalLakehouse(threads=threads)).run_drop(drop)
+    return {"steps_s": report["steps_s"], "statements": report["statements"], "total_s": report["total_s"]}
+
+
+def _window(metrics, since: float) -> dict:
+    # Per-tab render time and per-(table, source) query time recorded since `since`
+    tabs = metrics.render_summary(since)
+    queries = metrics.query_summary(since)
+    hits = metrics.hit_rates(since)
+    return {
+        "cache_hit_rate": float(hits["hit_rate"].iloc[0]) if len(hits) else None,
+        "tabs": {r["name"]: {"renders": int(r["count"]), "mean_s": round(r["mean"], 4), "max_s": round(r["max"], 4)}
+                 for r in tabs.to_dict("records")},
+        "queries": {f"{r['label']} [{r['source']}]": {"count": int(r["count"]),
+                                                       "total_s": round(r["mean"] * r["count"], 4)}
+                    for r in queries.sort_values(["label", "source"]).to_dict("records")} if len(queries) else {},
+    }
+
+
+def bench_dashboard(gold_dir: str, warm_runs: int = 3, timeout: float = 600) -> dict:
+    # Headless reruns of app.py; disk result cache off so "cold" measures the engine
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    from metrics import process_metrics
+    os.environ.update(QUERY_BACKEND="duckdb", DUCKDB_DATA_DIR=gold_dir, RESULT_CACHE_MAX_MB="0")
+    st.cache_data.clear()
+    st.cache_resource.clear()
+
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    scenarios = {}
+
+    def scenario(name, actions):
+        since = time.time()
+        walls = []
+        for act in actions:
+            t0 = time.perf_counter()
+            act()
+            walls.append(time.perf_counter() - t0)
+            if at.exception:
+                raise RuntimeError(f"{name}: app raised {at.exception[0].value}")
+        scenarios[name] = {"runs": len(walls), "mean_s": round(sum(walls) / len(walls), 4),
+                           "max_s": round(max(walls), 4), **_window(process_metrics(), since)}
+
+    # First render: backend init + the first tab's queries on the engine
+    scenario("cold", [at.run])
+    # Unchanged reruns: cached results, so this is the pandas/chart work per rerun
+    scenario("warm", [at.run] * warm_runs)
+
+    # Every tab, then every radio option in it (chart/measure switches), like a user
+    # clicking around. Built lazily from the current tree: only the open tab is
+    # rendered and some radios' options depend on others. The browser sends the
+    # selected tab back on every rerun; AppTest does not, so it is set each time.
+    def show(label):
+        at.session_state["active_tab"] = label
+        at.run()
+
+    def clicks():
+        for label in [t.label for t in at.tabs]:
+            yield lambda: show(label)
+            for i in range(len(at.radio)):
+                for option in list(at.radio[i].options):
+                    yield lambda: (at.radio[i].set_value(option), show(label))
+    scenario("interact", clicks())
+    return scenarios
+
+
+# -----------------------------
+# Run / compare
+# -----------------------------
+def run(args) -> dict:
+    work = args.work_dir or tempfile.mkdtemp(prefix="kerok-bench-")
+    landing, gold = os.path.join(work, "landing"), os.path.join(work, "gold")
+    result = {
+        "version": RESULT_VERSION,
+        "revision": _git_rev(),
+        "started": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"),
+        "environment": _environment(),
+        "params": {"facilities": args.facilities, "quarters": args.quarters, "start_quarter": args.start_quarter,
+                   "seed": args.seed, "dirty_rate": args.dirty_rate, "warm_runs": args.warm_runs},
+    }
+
+    def stage(name, fn, *a):
+        print(f"[{name}] ...", file=sys.stderr, flush=True)
+        result[name] = fn(*a)
+        print(f"[{name}] {result[name].get('total_s', '')}", file=sys.stderr, flush=True)
+        return result[name]
+
+    gen = stage("generate", bench_generate, landing, args.facilities, args.quarters, args.start_quarter,
+                args.seed, args.dirty_rate)
+    if not args.skip_parquet:
+        stage("bronze_to_parquet", bench_bronze_parquet, gen["files"], os.path.join(work, "bronze_parquet"))
+    stage("pipeline", bench_pipeline, gen["files"], gold, args.threads)
+    stage("pipeline_batched", bench_pipeline_batched, gen["files"], args.threads)
+    stage("dashboard", bench_dashboard, gold, args.warm_runs)
+    return result
+
+
+def _timings(doc, prefix: str = "", timed: bool = False) -> dict[str, float]:
+    # Flatten to {"a.b.c_s": seconds}: numbers under a key ending in "_s" (e.g. a
+    # {"steps_s": {step: seconds}} map); list items are keyed by dataset/quarter
+    out = {}
+    if isinstance(doc, dict):
+        for k, v in doc.items():
+            path = f"{prefix}.{k}" if prefix else str(k)
+            is_timed = timed or str(k).endswith("_s")
+            if is_timed and isinstance(v, (int, float)) and not isinstance(v, bool):
+                out[path] = float(v)
+            else:
+                out.update(_timings(v, path, is_timed))
+    elif isinstance(doc, list):
+        for i, v in enumerate(doc):
+            name = "/".join(str(v[k]) for k in ("dataset", "quarter") if isinstance(v, dict) and k in v) or str(i)
+            out.update(_timings(v, f"{prefix}[{name}]", timed))
+    return out
+
+
+def compare(base: dict, new: dict, ratio: float = REGRESSION_RATIO,
+            min_delta: float = REGRESSION_MIN_DELTA_S) -> list[dict]:
+    # Timings present in both results; regression = slower by `ratio` and by at least `min_delta` seconds
+    a, b = _timings(base), _timings(new)
+    rows = []
+    for key in sorted(a.keys() & b.keys()):
+        r = b[key] / a[key] if a[key] else float("inf") if b[key] else 1.0
+        rows.append({"timing": key, "base_s": a[key], "new_s": b[key], "ratio": round(r, 3),
+                     "regressed": r >= ratio and b[key] - a[key] >= min_delta})
+    return rows
+
+
+def main(argv: list[str] | None = None) -> int:
+    p = argparse.ArgumentParser(description="Benchmark the pipeline SQL and dashboard on synthetic data.")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    r = sub.add_parser("run", help="Generate data, run all stages, write a JSON result")
+    r.add_argument("--facilities", type=int, default=15_000)
+    r.add_argument("--quarters", type=int, default=1)
+    r.add_argument("--start-quarter", default="2024Q2")
+    r.add_argument("--seed", type=int, default=0)
+    r.add_argument("--dirty-rate", type=float, default=0.001)
+    r.add_argument("--warm-runs", type=int, default=3)
+    r.add_argument("--threads", type=int, default=None, help="DuckDB threads for the pipeline stage")
+    r.add_argument("--skip-parquet", action="store_true", help="Skip the bronze CSV -> Parquet conversion stage")
+    r.add_argument("--work-dir", help="Keep generated data here (default: a temp dir)")
+    r.add_argument("--out", help=f"Result JSON (default: {DEFAULT_OUT_DIR}/<timestamp>_<revision>.json)")
+
+    c = sub.add_parser("compare", help="Compare two results; exit 1 if any timing regressed")
+    c.add_argument("base")
+    c.add_argument("new")
+    c.add_argument("--ratio", type=float, default=REGRESSION_RATIO)
+    c.add_argument("--min-delta", type=float, default=REGRESSION_MIN_DELTA_S)
+    c.add_argument("--all", action="store_true", help="List every timing, not only regressions")
+
+    args = p.parse_args(argv)
+    if args.cmd == "run":
+        result = run(args)
+        out = args.out or os.path.join(
+            DEFAULT_OUT_DIR, f"{dt.datetime.now(dt.timezone.utc):%Y%m%dT%H%M%SZ}_{result['revision']}.json")
+        os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(out)
+        return 0
+
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+    if base.get("params") != new.get("params"):
+        print(f"warning: params differ: {base.get('params')} vs {new.get('params')}", file=sys.stderr)
+    rows = compare(base, new, args.ratio, args.min_delta)
+    shown = [row for row in rows if args.all or row["regressed"]]
+    for row in shown:
+        flag = "REGRESSED" if row["regressed"] else ""
+        print(f"{row['timing']:<80} {row['base_s']:>10.4f} {row['new_s']:>10.4f} {row['ratio']:>7.2f}x {flag}")
+    n = sum(row["regressed"] for row in rows)
+    print(f"{n} of {len(rows)} timings regressed ({base.get('revision')} -> {new.get('revision')})")
+    return 1 if n else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
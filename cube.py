@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+
+from queries import Filters, Query, build
+
+# -----------------------------
+# Facility x month analytics cube
+# -----------------------------
+# One read of gold_facility_monthly (facility/month grain) per month window feeds
+# tabs 3-6. Filter changes (states, facilities, picked month) are answered by
+# slicing this frame in memory instead of issuing new SQL; only a new window
+# reads again. The window is a plain range on the partition column (no casts or
+# date_trunc around `month`), so the engine reads only those months' partitions
+# (sql/gold_monthly_ddl.sql) and bytes scanned follow the window, not the history.
+
+CUBE_SQL = """
+  WITH b AS (
+    SELECT ccn, state, max_by(certified_beds_reported, reporting_period_end) AS certified_beds_reported
+    FROM gold_quarterly_provider_fact
+    GROUP BY 1, 2
+  )
+  SELECT m.month, m.state, m.ccn, d.provider_name,
+         m.hrs_rn, m.hrs_lpn, m.hrs_cna, m.emp_hours, m.ctr_hours,
+         m.resident_days, m.observed_days, b.certified_beds_reported,
+         d.latitude AS lat, d.longitude AS lon
+  FROM gold_facility_monthly m
+  LEFT JOIN b ON b.ccn = m.ccn AND b.state = m.state
+  LEFT JOIN gold_facility_dim d ON d.ccn = m.ccn
+  WHERE {where}
+"""
+
+def month_window(start, end) -> tuple[pd.Timestamp, pd.Timestamp]:
+    # First and last month starts inside [start, end]: the months slice_cube keeps,
+    # so any two dates in the same months share one query (and cache entry)
+    lo, hi = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize().replace(day=1)
+    if lo.day != 1:
+        lo = lo.replace(day=1) + pd.DateOffset(months=1)
+    return lo, hi
+
+
+def cube_sql(start, end) -> Query:
+    return build(CUBE_SQL, Filters.of(ranges={"m.month": month_window(start, end)}))
+
+
+def build_cube(raw: pd.DataFrame) -> pd.DataFrame:
+    # raw arrives typed (schemas.py): float measures, datetime month, categorical
+    # state/ccn/provider_name; only the derived measures are added here
+    df = raw.copy(deep=False)
+
+    # Derived measures, matching the gold views' definitions
+    df["total_hours_direct"] = df["hrs_rn"] + df["hrs_lpn"] + df["hrs_cna"]
+    denom = df["certified_beds_reported"] * df["observed_days"]
+    df["utilization"] = (df["resident_days"] / denom.where(denom > 0)).round(4)
+    df["monthly_avg_residents"] = (df["resident_days"] / df["observed_days"].where(df["observed_days"] > 0)).round(4)
+    df["hprd_monthly"] = (df["total_hours_direct"] / df["resident_days"].where(df["resident_days"] > 0)).round(4)
+
+    return df.sort_values(["month", "state", "ccn"], kind="mergesort").reset_index(drop=True)
+
+
+def slice_cube(cube: pd.DataFrame,
+               states: list[str] | None = None,
+               ccns: list[str] | None = None,
+               start: pd.Timestamp | None = None,
+               end: pd.Timestamp | None = None,
+               month: pd.Timestamp | None = None) -> pd.DataFrame:
+    mask = np.ones(len(cube), dtype=bool)
+    if states:
+        mask &= cube["state"].isin(states).to_numpy()
+    if ccns:
+        mask &= cube["ccn"].isin(ccns).to_numpy()
+    months = cube["month"].to_numpy()
+    if start is not None:
+        mask &= months >= np.datetime64(pd.Timestamp(start).normalize())
+    if end is not None:
+        mask &= months <= np.datetime64(pd.Timestamp(end).normalize())
+    if month is not None:
+        mask &= months == np.datetime64(pd.Timestamp(month).normalize())
+    out = cube.loc[mask]
+    # Drop categories not present in the slice so groupbys/charts stay small
+    return out.assign(**{c: out[c].cat.remove_unused_categories()
+                         for c in ["state", "ccn", "provider_name"]})
+
+
+def cube_months(cube_slice: pd.DataFrame) -> list[pd.Timestamp]:
+    return sorted(pd.unique(cube_slice["month"].dropna()))
+
+
+def state_month_totals(cube_slice: pd.DataFrame) -> pd.DataFrame:
+    # State/month totals, facility counts and month-over-month change
+    g = (cube_slice.groupby(["state", "month"], observed=True, as_index=False)
+                   .agg(total_hours_direct=("total_hours_direct", "sum"),
+                        n_facilities=("ccn", "nunique")))
+    g["state"] = g["state"].astype(str)
+    g = g.sort_values(["state", "month"], kind="mergesort")
+    prev = g.groupby("state")["total_hours_direct"].shift(1)
+    g["mom_change"] = (g["total_hours_direct"] - prev) / prev.where(prev != 0)
+    g["month_label"] = g["month"].dt.strftime("%Y-%m")
+    return g.sort_values("month", kind="mergesort").reset_index(drop=True)
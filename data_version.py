@@ -0,0 +1,86 @@
+import datetime as dt
+import threading
+import time
+
+import pandas as pd
+
+# -----------------------------
+# Data version (cache invalidation)
+# -----------------------------
+# Every cache layer (in-process, in-flight, disk) is keyed on the data version:
+# when the pipeline last published new gold data. Cached results then live until
+# new PBJ/ProviderInfo data lands instead of expiring on a timer. The version is
+# read with one tiny, uncached query at most once per `interval` seconds per
+# process; while a probe is running, other callers keep the last known version.
+# If no probe source answers, versions fall back to fixed time buckets (the
+# dashboard's old 10-minute TTL).
+
+# Tried in order; the first non-null timestamp wins
+VERSION_PROBE_SQLS = [
+    # Appended by PublishManifest after every pipeline run (sql/gold_publish_manifest.sql)
+    "SELECT MAX(published_ts) AS v FROM gold_dashboard_manifest",
+    # Deployments without the manifest: latest MarkDone
+    "SELECT MAX(processed_ts) AS v FROM kerok_healthcare_ops_file_log WHERE status = 'DONE'",
+]
+
+FALLBACK_BUCKET_SECONDS = 600
+
+
+def probe_version(query) -> pd.Timestamp | None:
+    # query(sql) -> DataFrame, run without any caching
+    for sql in VERSION_PROBE_SQLS:
+        try:
+            df = query(sql)
+        except Exception:
+            continue  # table not deployed here
+        if len(df) and not pd.isna(df.iloc[0, 0]):
+            ts = pd.Timestamp(df.iloc[0, 0])
+            return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+    return None
+
+
+class DataVersion:
+    def __init__(self, probe, interval: float = 60.0):
+        # probe() -> UTC timestamp of the latest publish, or None
+        self.probe = probe
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._published: pd.Timestamp | None = None
+        self._checked = float("-inf")
+        self.probes = 0
+        self.changes = 0
+
+    def _refresh(self):
+        try:
+            published = self.probe()
+        except Exception:
+            published = None  # keep the last known version
+        self.probes += 1
+        if published is not None:
+            if self._published is not None and published != self._published:
+                self.changes += 1
+            self._published = published
+        self._checked = time.monotonic()
+
+    def current(self) -> str:
+        if time.monotonic() - self._checked >= self.interval:
+            # Only the first caller after the interval probes; a first-ever probe is waited for
+            if self._lock.acquire(blocking=self._checked == float("-inf")):
+                try:
+                    if time.monotonic() - self._checked >= self.interval:
+                        self._refresh()
+                finally:
+                    self._lock.release()
+        if self._published is None:
+            return f"t{int(time.time() // FALLBACK_BUCKET_SECONDS)}"
+        return self._published.isoformat()
+
+    def age_seconds(self) -> float | None:
+        # Seconds since the current version was published (None = unknown)
+        if self._published is None:
+            return None
+        return (dt.datetime.now(dt.timezone.utc) - self._published.to_pydatetime()).total_seconds()
+
+    def stats(self) -> dict:
+        return {"version": self.current(), "probes": self.probes, "changes": self.changes,
+                "interval_s": self.interval, "checked_ago_s": round(time.monotonic() - self._checked, 1)}
@@ -0,0 +1,45 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# -----------------------------
+# Concurrent query dispatch
+# -----------------------------
+# A rerun submits every query it can already build up front, so wall-clock time
+# approaches the slowest query instead of the sum. Identical queries in flight at
+# the same time (prefetch vs. the tab that needs it, or two sessions) are
+# coalesced: the first caller runs it, later callers wait on its future.
+
+
+class QueryDispatcher:
+    def __init__(self, max_workers: int = 8):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="query")
+        self._inflight: dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def run(self, key: str, fn):
+        with self._lock:
+            fut = self._inflight.get(key)
+            owner = fut is None
+            if owner:
+                fut = Future()
+                self._inflight[key] = fut
+        if not owner:
+            return fut.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        else:
+            fut.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def submit(self, fn, *args) -> Future:
+        return self._pool.submit(fn, *args)
+
+    def inflight(self) -> int:
+        with self._lock:
+            return len(self._inflight)
@@ -0,0 +1,85 @@
+import itertools
+import tempfile
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+# -----------------------------
+# Lazy, chunked exports
+# -----------------------------
+# Files are only produced when a download is requested (st.download_button with
+# a callable). Rows are written in fixed-size record batches straight into a
+# temporary file, so no full CSV string / encoded copy of the frame is built,
+# and engine-side extracts (backend.export) never materialize a DataFrame.
+
+EXPORT_FORMATS = {
+    # name: (mime, extension)
+    "csv": ("text/csv", ".csv"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+    "arrow": ("application/vnd.apache.arrow.file", ".arrow"),
+}
+
+CHUNK_ROWS = 65_536
+
+
+def _writer(sink, schema: pa.Schema, fmt: str):
+    # All three writers accept record batches via .write() and finalize on .close()
+    if fmt == "csv":
+        return pacsv.CSVWriter(sink, schema)
+    if fmt == "parquet":
+        return pq.ParquetWriter(sink, schema, compression="zstd")
+    if fmt == "arrow":
+        return ipc.new_file(sink, schema, options=ipc.IpcWriteOptions(compression="zstd"))
+    raise ValueError(f"Unknown export format {fmt!r} (expected one of {tuple(EXPORT_FORMATS)})")
+
+
+def write_batches(batches, schema: pa.Schema, sink, fmt: str) -> int:
+    # Stream record batches into `sink` (path or binary file); returns rows written
+    writer = _writer(sink, schema, fmt)
+    rows = 0
+    try:
+        for batch in batches:
+            writer.write(batch)
+            rows += batch.num_rows
+    finally:
+        writer.close()
+    return rows
+
+
+def frame_batches(df: pd.DataFrame, chunk_rows: int = CHUNK_ROWS):
+    # Convert CHUNK_ROWS rows at a time; categoricals are exported as their values
+    df = df.reset_index(drop=True)
+    schema = None
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        chunk = chunk.astype({c: chunk[c].cat.categories.dtype for c in chunk.columns
+                              if isinstance(chunk[c].dtype, pd.CategoricalDtype)})
+        batch = pa.RecordBatch.from_pandas(chunk, schema=schema, preserve_index=False)
+        schema = schema or batch.schema
+        yield batch
+
+
+def export_frame(df: pd.DataFrame, fmt: str):
+    # -> rewound anonymous temp file (deleted when closed / garbage-collected)
+    out = tempfile.TemporaryFile()
+    batches = frame_batches(df)
+    first = next(batches, None)
+    if first is None:
+        schema = pa.Schema.from_pandas(df, preserve_index=False)
+        write_batches([], schema, out, fmt)
+    else:
+        write_batches(itertools.chain([first], batches), first.schema, out, fmt)
+    out.seek(0)
+    return out
+
+
+def export_sql(backend, sql: str, fmt: str):
+    # Engine-side extract (Athena UNLOAD / DuckDB COPY) streamed into a temp file
+    out = tempfile.TemporaryFile()
+    backend.export(sql, fmt, out)
+    out.seek(0)
+    return out
+
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# -----------------------------
+# Facility directory index (sidebar typeahead)
+# -----------------------------
+# Built once per load from gold_facility_dim. Rows are sorted by (state, name,
+# ccn), so each state is one contiguous slice [offsets[i], offsets[i+1]) and a
+# state filter is a few slice assignments, not a scan. Strings live in Arrow
+# arrays (one buffer per column, lower-cased copies for matching); search runs
+# Arrow's vectorized starts_with / match_substring kernels over the whole
+# column, so no per-row Python on any rerun.
+
+FACILITY_INDEX_SQL = """
+  SELECT ccn, provider_name, city, state
+  FROM gold_facility_dim
+  WHERE ccn IS NOT NULL
+"""
+
+SEARCH_FIELDS = ("provider_name", "ccn", "city")
+
+
+class FacilityIndex:
+    def __init__(self, dim: pd.DataFrame):
+        df = dim.drop_duplicates("ccn").astype({c: "string" for c in ["ccn", "provider_name", "city", "state"]})
+        df = df.sort_values(["state", "provider_name", "ccn"], na_position="last", kind="mergesort")
+        state = pd.Categorical(df["state"])
+        self.states = list(state.categories)
+        codes = state.codes.astype(np.int32)
+        # offsets[i]:offsets[i+1] = rows of self.states[i]; rows with no state sort last
+        self.offsets = np.searchsorted(codes[codes >= 0], np.arange(len(self.states) + 1))
+        self._cols = {c: pa.array(df[c].fillna("").to_numpy(dtype=object), pa.string())
+                      for c in ["ccn", "provider_name", "city", "state"]}
+        self._lower = {c: pc.utf8_lower(self._cols[c]) for c in SEARCH_FIELDS}
+        self._pos = pd.Index(df["ccn"].to_numpy(dtype=object))
+
+    def __len__(self) -> int:
+        return len(self._pos)
+
+    def _state_mask(self, states: list[str] | None) -> np.ndarray:
+        if not states:
+            return np.ones(len(self), dtype=bool)
+        mask = np.zeros(len(self), dtype=bool)
+        for i in pd.Index(self.states).get_indexer(list(states)):
+            if i >= 0:
+                mask[self.offsets[i]:self.offsets[i + 1]] = True
+        return mask
+
+    def count(self, states: list[str] | None = None) -> int:
+        return int(self._state_mask(states).sum())
+
+    def search(self, text: str, states: list[str] | None = None, limit: int = 50) -> list[str]:
+        # CCNs matching `text` within `states`: prefix matches on name/CCN/city
+        # first, then substring matches, each in (state, name) order
+        mask = self._state_mask(states)
+        needle = (text or "").strip().lower()
+        if not needle:
+            return self._ccns(np.flatnonzero(mask)[:limit])
+        prefix = np.zeros(len(self), dtype=bool)
+        substr = np.zeros(len(self), dtype=bool)
+        for c in SEARCH_FIELDS:
+            prefix |= pc.starts_with(self._lower[c], needle).to_numpy(zero_copy_only=False)
+            substr |= pc.match_substring(self._lower[c], needle).to_numpy(zero_copy_only=False)
+        hits = np.concatenate([np.flatnonzero(mask & prefix), np.flatnonzero(mask & substr & ~prefix)])
+        return self._ccns(hits[:limit])
+
+    def _ccns(self, rows: np.ndarray) -> list[str]:
+        return self._cols["ccn"].take(pa.array(rows, pa.int64())).to_pylist()
+
+    def label(self, ccn: str) -> str:
+        i = self._pos.get_indexer([ccn])[0]
+        if i < 0:
+            return str(ccn)
+        name, state = self._cols["provider_name"][i].as_py(), self._cols["state"][i].as_py()
+        city = self._cols["city"][i].as_py()
+        return f"{name or '(unnamed)'} ({ccn}) – {city + ', ' if city else ''}{state}"
@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+
+# -----------------------------
+# Bed-utilization map layers
+# -----------------------------
+# Streamlit never learns the client's map zoom, so the zoom is chosen in the UI
+# and drives what is built server-side: grid cells (aggregated, payload bounded
+# by MAX_CELLS) at country/state zoom, facility points (bounded by MAX_POINTS,
+# clipped to the viewport) once zoomed in. Colors, radii and labels are computed
+# with whole-column NumPy/pandas operations, no per-row Python.
+
+MAX_POINTS = 3000
+MAX_CELLS = 1500
+POINT_ZOOM = 7            # at this zoom and above, draw individual facilities
+GRID_COLUMNS = 48         # grid cells across the viewport width
+
+MAP_WIDTH_PX = 1000
+MAP_HEIGHT_PX = 500
+
+NA_COLOR = (160, 160, 160, 140)
+
+CARTO_TILES = "https://c.basemaps.cartocdn.com/light_all/{z}/{x}/{y}{r}.png"
+
+
+def util_colors(util: np.ndarray, alpha: int = 170) -> np.ndarray:
+    # (n, 4) uint8 RGBA, blue (0) -> red (1); NaN -> grey
+    u = np.asarray(util, dtype="float64")
+    v = np.clip(np.nan_to_num(u, nan=0.0), 0.0, 1.0)
+    out = np.empty((len(u), 4), dtype=np.uint8)
+    out[:, 0] = (20 + 235 * v).astype(np.uint8)
+    out[:, 1] = (60 + 40 * (1 - v)).astype(np.uint8)
+    out[:, 2] = (210 - 190 * v).astype(np.uint8)
+    out[:, 3] = alpha
+    out[np.isnan(u)] = NA_COLOR
+    return out
+
+
+def point_radius(resident_days: np.ndarray, lo: float = 2000, hi: float = 12000) -> np.ndarray:
+    # ~20 * sqrt(resident_days) meters, clipped
+    rd = np.clip(np.nan_to_num(np.asarray(resident_days, dtype="float64")), 0, None)
+    return np.clip(20 * np.sqrt(rd), lo, hi).astype(np.int32)
+
+
+def viewport(lat: float, lon: float, zoom: int) -> tuple[float, float, float, float]:
+    # Approximate Web Mercator bounds (lat_min, lat_max, lon_min, lon_max) for the map frame
+    lon_span = 360.0 * MAP_WIDTH_PX / (256 * 2 ** zoom)
+    lat_span = lon_span * MAP_HEIGHT_PX / MAP_WIDTH_PX * np.cos(np.radians(lat))
+    return (lat - lat_span / 2, lat + lat_span / 2, lon - lon_span / 2, lon + lon_span / 2)
+
+
+def _pct_label(util: pd.Series) -> pd.Series:
+    return ((util * 100).round(1).astype("string") + "%").fillna("n/a")
+
+
+def facility_points(df: pd.DataFrame) -> pd.DataFrame:
+    # One row per facility; expects lat, lon, utilization, resident_days, provider_name, state
+    label = (df["provider_name"].astype("string").fillna("")
+             + "\nState: " + df["state"].astype("string")
+             + "\nUtil: " + _pct_label(df["utilization"])
+             + "\nRes-days: " + df["resident_days"].round(0).astype("Int64").astype("string").fillna("n/a"))
+    return pd.DataFrame({
+        "lon": df["lon"].round(4).to_numpy(),
+        "lat": df["lat"].round(4).to_numpy(),
+        "color": util_colors(df["utilization"].to_numpy()).tolist(),
+        "radius": point_radius(df["resident_days"].to_numpy()),
+        "label": label.to_numpy(),
+    })
+
+
+def grid_cells(df: pd.DataFrame, cell_deg: float) -> pd.DataFrame:
+    # Square lat/lon cells; utilization is capacity-weighted (resident-days / bed-days)
+    lat = df["lat"].to_numpy(dtype="float64")
+    lon = df["lon"].to_numpy(dtype="float64")
+    bed_days = (df["certified_beds_reported"] * df["observed_days"]).to_numpy(dtype="float64")
+    res_days = df["resident_days"].to_numpy(dtype="float64")
+    has_cap = np.isfinite(bed_days) & (bed_days > 0) & np.isfinite(res_days)
+
+    g = pd.DataFrame({
+        "iy": np.floor(lat / cell_deg).astype(np.int64),
+        "ix": np.floor(lon / cell_deg).astype(np.int64),
+        "res_days": np.where(has_cap, res_days, 0.0),
+        "bed_days": np.where(has_cap, bed_days, 0.0),
+        "all_res_days": np.nan_to_num(res_days),
+    }).groupby(["iy", "ix"], sort=False).agg(
+        facilities=("res_days", "size"),
+        res_days=("res_days", "sum"),
+        bed_days=("bed_days", "sum"),
+        all_res_days=("all_res_days", "sum"),
+    ).reset_index()
+
+    util = (g["res_days"] / g["bed_days"].where(g["bed_days"] > 0)).to_numpy()
+    y0 = g["iy"].to_numpy() * cell_deg
+    x0 = g["ix"].to_numpy() * cell_deg
+    # Closed-ring rectangles, shape (n, 4, 2)
+    poly = np.stack([np.column_stack([x0, y0]),
+                     np.column_stack([x0 + cell_deg, y0]),
+                     np.column_stack([x0 + cell_deg, y0 + cell_deg]),
+                     np.column_stack([x0, y0 + cell_deg])], axis=1).round(4)
+    label = (g["facilities"].astype("string") + " facilities"
+             + "\nUtil: " + _pct_label(pd.Series(util))
+             + "\nRes-days: " + g["all_res_days"].round(0).astype("int64").astype("string"))
+    return pd.DataFrame({
+        "polygon": poly.tolist(),
+        "color": util_colors(util, alpha=150).tolist(),
+        "label": label.to_numpy(),
+    })
+
+
+def map_layer_data(df: pd.DataFrame, zoom: int, center: tuple[float, float]) -> tuple[str, pd.DataFrame, int]:
+    # -> ("points" | "grid", layer frame, facilities in view)
+    lat_min, lat_max, lon_min, lon_max = viewport(center[0], center[1], zoom)
+    lat = df["lat"].to_numpy(dtype="float64")
+    lon = df["lon"].to_numpy(dtype="float64")
+    in_view = df.loc[(lat >= lat_min) & (lat <= lat_max) & (lon >= lon_min) & (lon <= lon_max)]
+
+    if zoom >= POINT_ZOOM or len(in_view) <= MAX_POINTS:
+        # Largest facilities first if the viewport still holds too many
+        if len(in_view) > MAX_POINTS:
+            in_view = in_view.nlargest(MAX_POINTS, "resident_days")
+        return "points", facility_points(in_view), len(in_view)
+
+    cell_deg = (lon_max - lon_min) / GRID_COLUMNS
+    cells = grid_cells(in_view, cell_deg)
+    while len(cells) > MAX_CELLS:
+        cell_deg *= 1.5
+        cells = grid_cells(in_view, cell_deg)
+    return "grid", cells, len(in_view)
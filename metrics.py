@@ -0,0 +1,170 @@
+import json
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import pandas as pd
+
+from stats import group_stats
+
+# -----------------------------
+# Query + render instrumentation
+# -----------------------------
+# Every run_query call and every tab render appends one record to a bounded,
+# in-process history (shared by all sessions of the process). Query records carry
+# where the result came from (memory / inflight / disk / engine) and, for engine
+# runs, the backend's own timings: Athena queue/planning/engine time and bytes
+# scanned, plus client-side execute and fetch time.
+# Views: the hidden diagnostics page (?diagnostics=<token>), JSON and Prometheus text.
+
+QUERY_SOURCES = ("memory", "inflight", "disk", "engine")
+
+_TABLE_RE = re.compile(r"\b(?:FROM|JOIN)\s+([A-Za-z_][\w.]*)", re.I)
+
+
+def query_label(sql: str) -> str:
+    # Tables/views a query reads (ignoring subqueries), e.g. "gold_facility_monthly+gold_facility_dim"
+    names = dict.fromkeys(m.split(".")[-1].lower() for m in _TABLE_RE.findall(sql))
+    return "+".join(names) or "other"
+
+
+class Metrics:
+    def __init__(self, max_queries: int = 2000, max_renders: int = 2000):
+        self._queries = deque(maxlen=max_queries)
+        self._renders = deque(maxlen=max_renders)
+        # Per-process totals for the Prometheus counters: unlike the bounded
+        # history they never drop, so rate() over them stays valid
+        self._query_totals: dict[tuple[str, str], list[float]] = {}  # (label, source) -> [count, seconds, bytes]
+        self._render_totals: dict[str, list[float]] = {}  # tab -> [count, seconds]
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def record_query(self, sql: str, seconds: float, **fields):
+        rec = {"ts": time.time(), "label": query_label(sql), "seconds": round(seconds, 6),
+               "source": "memory", "sql": " ".join(sql.split())[:2000]}
+        rec.update(fields)
+        with self._lock:
+            self._queries.append(rec)
+            t = self._query_totals.setdefault((rec["label"], rec["source"]), [0, 0.0, 0])
+            t[0] += 1
+            t[1] += rec["seconds"]
+            t[2] += rec.get("bytes_scanned") or 0
+
+    def record_render(self, name: str, seconds: float, error: str | None = None):
+        with self._lock:
+            self._renders.append({"ts": time.time(), "name": name, "seconds": round(seconds, 6), "error": error})
+            t = self._render_totals.setdefault(name, [0, 0.0])
+            t[0] += 1
+            t[1] += round(seconds, 6)
+
+    @contextmanager
+    def timed(self, name: str):
+        t0 = time.perf_counter()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            self.record_render(name, time.perf_counter() - t0, error)
+
+    def queries(self, since: float = 0.0) -> pd.DataFrame:
+        with self._lock:
+            rows = [r for r in self._queries if r["ts"] >= since]
+        return pd.DataFrame(rows)
+
+    def renders(self, since: float = 0.0) -> pd.DataFrame:
+        with self._lock:
+            rows = [r for r in self._renders if r["ts"] >= since]
+        return pd.DataFrame(rows)
+
+    def query_summary(self, since: float = 0.0) -> pd.DataFrame:
+        # Per (label, source): calls, latency distribution, engine cost
+        q = self.queries(since)
+        if q.empty:
+            return q
+        out = group_stats(q, ["label", "source"], "seconds", stats=("count", "mean", "p50", "p90", "max"))
+        for col in ["bytes_scanned", "rows", "engine_ms", "queue_ms"]:
+            if col in q.columns:
+                out[col] = (q.groupby(["label", "source"], sort=True)[col].sum(min_count=1).to_numpy())
+        return out.sort_values("count", ascending=False, kind="mergesort").reset_index(drop=True)
+
+    def hit_rates(self, since: float = 0.0) -> pd.DataFrame:
+        # Per table label (+ an "all" row): queries, answered without the engine
+        # (memory / inflight / disk), hit rate, distinct canonical query keys
+        q = self.queries(since)
+        if q.empty:
+            return pd.DataFrame(columns=["label", "queries", "hits", "hit_rate", "keys"])
+        q = q.assign(hit=q["source"] != "engine", key=q.get("key", q["sql"]))
+        rows = [("all", q)] + list(q.groupby("label", sort=True))
+        out = pd.DataFrame([{"label": label, "queries": len(g), "hits": int(g["hit"].sum()),
+                             "keys": g["key"].nunique()} for label, g in rows])
+        out.insert(3, "hit_rate", (out["hits"] / out["queries"]).round(4))
+        return out
+
+    def render_summary(self, since: float = 0.0) -> pd.DataFrame:
+        r = self.renders(since)
+        if r.empty:
+            return r
+        return group_stats(r, ["name"], "seconds", stats=("count", "mean", "p50", "p90", "max"))
+
+    def to_json(self) -> str:
+        return json.dumps({"started": self.started, "queries": self.queries().to_dict("records"),
+                           "renders": self.renders().to_dict("records")}, default=str)
+
+    def to_prometheus(self, extra: dict[str, float] | None = None) -> str:
+        # Prometheus text exposition format: counters are per-process totals since
+        # start, the cache hit ratio is over the retained history
+        lines = []
+
+        def emit(name, kind, help_, samples):
+            lines.append(f"# HELP {name} {help_}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lab = ",".join(f'{k}="{_esc(v)}"' for k, v in labels.items())
+                lines.append(f"{name}{{{lab}}} {value}" if lab else f"{name} {value}")
+
+        with self._lock:
+            queries = sorted((k, list(v)) for k, v in self._query_totals.items())
+            renders = sorted((k, list(v)) for k, v in self._render_totals.items())
+        if queries:
+            keys = [dict(label=l, source=s) for (l, s), _ in queries]
+            emit("dashboard_queries_total", "counter", "Queries served, by table and result source",
+                 zip(keys, [t[0] for _, t in queries]))
+            emit("dashboard_query_seconds_sum", "counter", "Wall time spent in run_query",
+                 zip(keys, [round(t[1], 6) for _, t in queries]))
+            emit("dashboard_query_bytes_scanned_sum", "counter", "Bytes scanned by the engine",
+                 zip(keys, [t[2] for _, t in queries]))
+            h = self.hit_rates()
+            emit("dashboard_query_cache_hit_ratio", "gauge",
+                 f"Share of the last {self._queries.maxlen} queries answered without the engine",
+                 zip([dict(label=l) for l in h["label"]], h["hit_rate"].tolist()))
+        if renders:
+            keys = [dict(tab=n) for n, _ in renders]
+            emit("dashboard_renders_total", "counter", "Tab renders", zip(keys, [t[0] for _, t in renders]))
+            emit("dashboard_render_seconds_sum", "counter", "Wall time spent rendering tabs",
+                 zip(keys, [round(t[1], 6) for _, t in renders]))
+        for name, value in (extra or {}).items():
+            emit(name, "gauge", name.replace("_", " "), [({}, value)])
+        return "\n".join(lines) + "\n"
+
+
+_process_metrics: Metrics | None = None
+_process_lock = threading.Lock()
+
+
+def process_metrics(max_records: int = 2000) -> Metrics:
+    # The process-wide instance: the app records into it, in-process tools
+    # (benchmark.py driving app.py headless) read it back
+    global _process_metrics
+    with _process_lock:
+        if _process_metrics is None:
+            _process_metrics = Metrics(max_queries=max_records, max_renders=max_records)
+        return _process_metrics
+
+
+def _esc(v) -> str:
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
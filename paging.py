@@ -0,0 +1,75 @@
+from queries import sql_literal
+
+# -----------------------------
+# SQL ranking + keyset pagination
+# -----------------------------
+# Top-N and table pages are answered by the engine (ORDER BY ... LIMIT) so a
+# rerun transfers at most one page, however many facilities match. Pages after
+# the first seek past the previous page's last sort key instead of using OFFSET,
+# so the engine never materializes and discards the skipped rows.
+#
+# order: [(sql_expression, descending), ...]. The expressions must be non-NULL
+# and together unique per row (end with a key column, e.g. ccn) for seeks to be
+# exact; wrap nullable measures in COALESCE with an out-of-range sentinel.
+
+KEY_PREFIX = "_k"
+
+
+def key_columns(order: list[tuple[str, bool]]) -> list[str]:
+    return [f"{KEY_PREFIX}{i}" for i in range(len(order))]
+
+
+def seek_predicate(order: list[tuple[str, bool]], after: tuple) -> str:
+    # Rows strictly after `after` in the given order, expanded lexicographically:
+    # (k0 > a0) OR (k0 = a0 AND k1 > a1) OR ...
+    keys = key_columns(order)
+    terms = []
+    for i, (k, (_, desc)) in enumerate(zip(keys, order)):
+        eqs = [f"{keys[j]} = {sql_literal(after[j])}" for j in range(i)]
+        cmp = f"{k} {'<' if desc else '>'} {sql_literal(after[i])}"
+        terms.append("(" + " AND ".join(eqs + [cmp]) + ")")
+    return "(" + " OR ".join(terms) + ")"
+
+
+def ranked_sql(base_sql: str, order: list[tuple[str, bool]], limit: int,
+               after: tuple | None = None, offset: int = 0) -> str:
+    keys = key_columns(order)
+    key_select = ", ".join(f"{expr} AS {k}" for (expr, _), k in zip(order, keys))
+    order_by = ", ".join(f"{k} {'DESC' if desc else 'ASC'}" for k, (_, desc) in zip(keys, order))
+    where = f"WHERE {seek_predicate(order, after)}" if after is not None else ""
+    # OFFSET before LIMIT is accepted by both Trino and DuckDB
+    skip = f"OFFSET {int(offset)} " if offset and after is None else ""
+    return f"""
+      SELECT * FROM (
+        SELECT q.*, {key_select}
+        FROM ({base_sql}) q
+      ) p
+      {where}
+      ORDER BY {order_by}
+      {skip}LIMIT {int(limit)}
+    """
+
+
+def count_sql(base_sql: str) -> str:
+    return f"SELECT COUNT(*) AS n FROM ({base_sql}) q"
+
+
+def last_key(page, order: list[tuple[str, bool]]) -> tuple | None:
+    # Sort key of the final row of a fetched page (the cursor for the next page)
+    if page is None or len(page) == 0:
+        return None
+    row = page.iloc[-1]
+    return tuple(_plain(row[k]) for k in key_columns(order))
+
+
+def strip_keys(page, order: list[tuple[str, bool]]):
+    return page.drop(columns=key_columns(order), errors="ignore")
+
+
+def _plain(v):
+    # numpy / pandas scalars -> Python values sql_literal understands
+    if hasattr(v, "to_pydatetime"):
+        return v.to_pydatetime()
+    if hasattr(v, "item"):
+        return v.item()
+    return v
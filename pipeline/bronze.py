@@ -0,0 +1,153 @@
+import os
+import re
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# -----------------------------
+# Bronze schemas + silver normalization (vectorized, pyarrow.compute)
+# -----------------------------
+# Column lists come straight from sql/bronze_ddl.sql, and the normalization
+# mirrors sql/silver_merge_pbj.sql / sql/silver_merge_providerinfo.sql, so the
+# Python stages and the Athena MERGEs agree on what a bronze row means.
+
+SQL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sql")
+BRONZE_DDL = os.path.join(SQL_DIR, "bronze_ddl.sql")
+
+PBJ_TABLE = "bronze_pbj_daily_nurse_staffing_q2_2024_csv"
+PI_TABLE = "bronze_nh_providerinfo_oct2024_csv"
+
+_DDL_RE = re.compile(r"CREATE EXTERNAL TABLE\s+(\w+)\s*\((.*?)\)\s*ROW FORMAT", re.S | re.I)
+
+
+def bronze_columns(ddl_path: str = BRONZE_DDL) -> dict[str, list[str]]:
+    # {table: [column, ...]} in declared (positional, as OpenCSVSerde maps them) order
+    with open(ddl_path, encoding="utf-8") as f:
+        text = f.read()
+    out = {}
+    for table, body in _DDL_RE.findall(text):
+        cols = [c.strip().rsplit(None, 1)[0] for c in body.split(",") if c.strip()]
+        out[table] = cols
+    return out
+
+
+# -----------------------------
+# try_cast equivalents (invalid -> NULL, never raise)
+# -----------------------------
+_NUM_RE = r"^[+-]?(\d+\.?\d*|\.\d+)$"
+_INT_RE = r"^[+-]?\d+$"
+_DOUBLE_RE = r"^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$"
+
+
+def trim(arr: pa.Array) -> pa.Array:
+    return pc.utf8_trim_whitespace(arr)
+
+
+def nullif_empty(arr: pa.Array) -> pa.Array:
+    return pc.if_else(pc.equal(arr, ""), None, arr)
+
+
+def try_cast_decimal(arr: pa.Array, precision: int, scale: int) -> pa.Array:
+    s = trim(arr)
+    valid = pc.match_substring_regex(s, _NUM_RE)
+    # Drop fraction digits beyond what decimal(38,18) can hold, then round like Trino
+    s = pc.replace_substring_regex(pc.if_else(valid, s, None), r"(\.\d{18})\d+", r"\1")
+    wide = pc.round(pc.cast(s, pa.decimal128(38, 18)), ndigits=scale, round_mode="half_towards_infinity")
+    limit = pa.scalar(10 ** (precision - scale), pa.decimal128(38, 18))
+    fits = pc.less(pc.abs(wide), limit)
+    return pc.cast(pc.if_else(fits, wide, None), pa.decimal128(precision, scale))
+
+
+def try_cast_int(arr: pa.Array) -> pa.Array:
+    s = trim(arr)
+    valid = pc.match_substring_regex(s, _INT_RE)
+    wide = pc.cast(pc.if_else(valid, s, None), pa.decimal128(38, 0))
+    fits = pc.and_(pc.greater_equal(wide, pa.scalar(-2**31, pa.decimal128(38, 0))),
+                   pc.less(wide, pa.scalar(2**31, pa.decimal128(38, 0))))
+    return pc.cast(pc.if_else(fits, wide, None), pa.int32())
+
+
+def try_cast_double(arr: pa.Array) -> pa.Array:
+    s = trim(arr)
+    valid = pc.match_substring_regex(s, _DOUBLE_RE)
+    return pc.cast(pc.if_else(valid, s, None), pa.float64())
+
+
+def try_cast_date(arr: pa.Array) -> pa.Array:
+    # Trino's varchar->date cast accepts ISO yyyy-mm-dd only
+    ts = pc.strptime(trim(arr), format="%Y-%m-%d", unit="s", error_is_null=True)
+    return pc.cast(ts, pa.date32())
+
+
+def pbj_ccn(arr: pa.Array) -> pa.Array:
+    # lpad(trim(PROVNUM),6,'0')
+    return pc.utf8_lpad(trim(arr), width=6, padding="0")
+
+
+def providerinfo_ccn(arr: pa.Array) -> pa.Array:
+    # keep rightmost 6 digits, left-pad zeros
+    digits = pc.replace_substring_regex(trim(arr), r"[^0-9]", "")
+    return pc.utf8_lpad(pc.utf8_slice_codeunits(digits, start=-6), width=6, padding="0")
+
+
+# -----------------------------
+# Silver projections
+# -----------------------------
+PBJ_HOUR_COLS = [
+    "Hrs_RNDON", "Hrs_RNDON_emp", "Hrs_RNDON_ctr",
+    "Hrs_RNadmin", "Hrs_RNadmin_emp", "Hrs_RNadmin_ctr",
+    "Hrs_RN", "Hrs_RN_emp", "Hrs_RN_ctr",
+    "Hrs_LPNadmin", "Hrs_LPNadmin_emp", "Hrs_LPNadmin_ctr",
+    "Hrs_LPN", "Hrs_LPN_emp", "Hrs_LPN_ctr",
+    "Hrs_CNA", "Hrs_CNA_emp", "Hrs_CNA_ctr",
+]
+
+
+def normalize_pbj(batch: pa.RecordBatch) -> pa.Table:
+    c = batch.column
+    cols = {
+        "ccn": pbj_ccn(c("PROVNUM")),
+        "provider_name": trim(c("PROVNAME")),
+        "city": trim(c("CITY")),
+        "county": trim(c("COUNTY_NAME")),
+        "county_fips": try_cast_int(c("COUNTY_FIPS")),
+        "state": pc.utf8_upper(trim(c("STATE"))),
+        "cy_quarter": trim(c("CY_Qtr")),
+        "workdate": try_cast_date(c("WorkDate")),
+        "mds_census_resident_count": try_cast_int(c("MDScensus")),
+    }
+    for h in PBJ_HOUR_COLS:
+        cols[h.lower()] = try_cast_decimal(c(h), 9, 2)
+    return pa.table(cols)
+
+
+def normalize_providerinfo(batch: pa.RecordBatch) -> pa.Table:
+    c = batch.column
+    cols = {
+        "ccn": providerinfo_ccn(c("cms_certification_number_(ccn)")),
+        "state": pc.utf8_upper(trim(c("state"))),
+        "provider_name": trim(c("provider_name")),
+        "provider_address": trim(c("provider_address")),
+        "city": trim(c("city_town")),
+        "county": trim(c("county_parish")),
+        "ownership_type": trim(c("ownership_type")),
+        "zip_code": trim(c("zip_code")),
+        "telephone_number": trim(c("telephone_number")),
+        "provider_ssa_county_code": trim(c("provider_ssa_county_code")),
+        "latitude": try_cast_decimal(nullif_empty(c("latitude")), 9, 4),
+        "longitude": try_cast_decimal(nullif_empty(c("longitude")), 9, 4),
+        "facility_location": trim(c("location")),
+        "geocoding_footnote": trim(c("geocoding_footnote")),
+        "number_of_certified_beds": try_cast_int(c("number_of_certified_beds")),
+        "average_number_of_residents_per_day": try_cast_double(c("average_number_of_residents_per_day")),
+        "reported_total_nurse_staffing_hours_per_resident_per_day":
+            try_cast_double(c("reported_total_nurse_staffing_hours_per_resident_per_day")),
+        "adjusted_total_nurse_staffing_hours_per_resident_per_day":
+            try_cast_double(c("adjusted_total_nurse_staffing_hours_per_resident_per_day")),
+        "number_of_fines": try_cast_int(c("number_of_fines")),
+        "total_amount_of_fines_in_dollars": try_cast_double(c("total_amount_of_fines_in_dollars")),
+        "number_of_payment_denials": try_cast_int(c("number_of_payment_denials")),
+        "total_number_of_penalties": try_cast_int(c("total_number_of_penalties")),
+        "processing_date": c("processing_date"),
+    }
+    return pa.table(cols)
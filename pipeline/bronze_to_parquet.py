@@ -0,0 +1,116 @@
+import argparse
+import itertools
+import os
+import time
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+
+from pipeline.bronze import (
+    PBJ_TABLE, PI_TABLE, bronze_columns, normalize_pbj, normalize_providerinfo, try_cast_date,
+)
+
+# -----------------------------
+# Streaming bronze CSV -> typed, partitioned Parquet
+# -----------------------------
+# Reads a landed PBJ / ProviderInfo CSV in fixed-size blocks (bounded memory),
+# applies the silver normalization with vectorized Arrow kernels, and streams
+# the batches into a hive-partitioned Parquet dataset:
+#   pbj:          <out>/cy_quarter=2024Q2/state=CA/<file>-<i>.parquet
+#   providerinfo: <out>/quarter=2024Q4/state=CA/<file>-<i>.parquet
+# Each row keeps its source_file, so downstream MERGEs can filter on lineage
+# and partitions instead of re-parsing the raw text.
+
+DATASETS = {
+    "pbj": (PBJ_TABLE, normalize_pbj, ["cy_quarter", "state"]),
+    "providerinfo": (PI_TABLE, normalize_providerinfo, ["quarter", "state"]),
+}
+
+DEFAULT_BLOCK_MB = 64
+
+
+def resolve_fs(uri: str) -> tuple[pafs.FileSystem, str]:
+    if "://" in uri:
+        return pafs.FileSystem.from_uri(uri)
+    return pafs.LocalFileSystem(), os.path.abspath(uri)
+
+
+def _quarter_of(date_str: pa.Array) -> pa.Array:
+    # 'YYYY-MM-DD' -> 'YYYYQn' (ProviderInfo snapshots are keyed by processing date)
+    d = try_cast_date(date_str)
+    q = pc.add(pc.divide(pc.subtract(pc.month(d), 1), 3), 1)
+    return pc.binary_join_element_wise(pc.cast(pc.year(d), pa.string()),
+                                       pc.cast(q, pa.string()), "Q")
+
+
+def iter_normalized(source: str, dataset: str, block_mb: int = DEFAULT_BLOCK_MB):
+    table, normalize, _ = DATASETS[dataset]
+    columns = bronze_columns()[table]
+    fs, path = resolve_fs(source)
+    # Positional columns + skip header, exactly like OpenCSVSerde with skip.header.line.count=1
+    read_opts = pacsv.ReadOptions(column_names=columns, skip_rows=1, block_size=block_mb << 20)
+    parse_opts = pacsv.ParseOptions(delimiter=",", quote_char='"', escape_char="\\", newlines_in_values=True)
+    convert_opts = pacsv.ConvertOptions(column_types={c: pa.string() for c in columns},
+                                        strings_can_be_null=False)
+    with fs.open_input_stream(path) as f:
+        reader = pacsv.open_csv(f, read_options=read_opts, parse_options=parse_opts,
+                                convert_options=convert_opts)
+        for batch in reader:
+            out = normalize(batch)
+            if dataset == "providerinfo":
+                out = out.append_column("quarter", _quarter_of(out.column("processing_date")))
+            out = out.append_column("source_file", pa.repeat(pa.scalar(source), out.num_rows)
+                                    .dictionary_encode())
+            yield from out.to_batches()
+
+
+def convert(source: str, out_dir: str, dataset: str, block_mb: int = DEFAULT_BLOCK_MB) -> dict:
+    _, _, partition_cols = DATASETS[dataset]
+    batches = iter_normalized(source, dataset, block_mb=block_mb)
+    first = next(batches, None)
+    if first is None:
+        return {"source": source, "rows": 0, "batches": 0, "seconds": 0.0}
+
+    stats = {"rows": 0, "batches": 0}
+
+    def counted():
+        for batch in itertools.chain([first], batches):
+            stats["rows"] += batch.num_rows
+            stats["batches"] += 1
+            yield batch
+
+    t0 = time.perf_counter()
+    out_fs, out_path = resolve_fs(out_dir)
+    stem = os.path.splitext(os.path.basename(source))[0]
+    ds.write_dataset(
+        counted(),
+        out_path,
+        filesystem=out_fs,
+        schema=first.schema,
+        format="parquet",
+        partitioning=ds.partitioning(pa.schema([first.schema.field(c) for c in partition_cols]), flavor="hive"),
+        basename_template=f"{stem}-{{i}}.parquet",
+        # Re-running the same source replaces its files, other sources' files are kept
+        existing_data_behavior="overwrite_or_ignore",
+        file_options=ds.ParquetFileFormat().make_write_options(compression="zstd"),
+        max_rows_per_group=1 << 20,
+    )
+    return {"source": source, "rows": stats["rows"], "batches": stats["batches"],
+            "seconds": round(time.perf_counter() - t0, 3)}
+
+
+def main(argv: list[str] | None = None):
+    p = argparse.ArgumentParser(description="Convert a bronze PBJ/ProviderInfo CSV to typed, partitioned Parquet.")
+    p.add_argument("dataset", choices=sorted(DATASETS))
+    p.add_argument("source", help="CSV path or s3:// URI")
+    p.add_argument("out_dir", help="Output dataset root (local path or s3:// URI)")
+    p.add_argument("--block-mb", type=int, default=DEFAULT_BLOCK_MB, help="CSV read block size (bounds memory)")
+    args = p.parse_args(argv)
+    print(convert(args.source, args.out_dir, args.dataset, block_mb=args.block_mb))
+
+
+if __name__ == "__main__":
+    main()
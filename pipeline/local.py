@@ -0,0 +1,170 @@
+import datetime as dt
+import os
+import re
+import threading
+import time
+from collections import Counter
+
+from backends import DUCKDB_COMPAT_MACROS, GOLD_TABLES, SQL_DIR, split_sql
+from pipeline.bronze import PBJ_TABLE, PI_TABLE, bronze_columns
+from pipeline.validate import REJECTED, BronzeRejected, record_sql, validate
+
+# -----------------------------
+# Local lakehouse (DuckDB) running the pipeline's own SQL
+# -----------------------------
+# Mirrors one Step Functions execution per landed file: the same sql/*.sql
+# MERGEs run in the same order as orchestration/step_functions_asl.json, with
+# :source_path / :ingested_ts bound the way the state machine passes them. The
+# bronze tables are views over the landed CSVs exposing "$path" like Athena, so
+# the silver merges' file predicate works unchanged. Used for benchmarks and
+# for building gold extracts that the dashboard's DuckDB backend can read, and
+# as the local engine of the batched runner (pipeline/runner.py).
+
+LOCAL_DDL = os.path.join(SQL_DIR, "local", "lakehouse_ddl.sql")
+
+# Ops log statements issued inline by the state machine (LogPending / MarkDone).
+# :source_paths is the execution's file list (one file per state-machine run).
+LOG_PENDING_SQL = """
+  INSERT INTO kerok_healthcare_ops_file_log (dataset, s3_path, first_seen_ts, status)
+  SELECT :dataset, p, current_timestamp, 'PENDING' FROM UNNEST(ARRAY[:source_paths]) AS f(p)
+  WHERE p NOT IN (SELECT s3_path FROM kerok_healthcare_ops_file_log)  -- reruns keep one row per file
+"""
+MARK_DONE_SQL = """
+  UPDATE kerok_healthcare_ops_file_log
+  SET status = 'DONE', processed_ts = current_timestamp, ingested_ts = from_iso8601_timestamp(:ingested_ts)
+  WHERE s3_path IN (:source_paths)
+"""
+
+# dataset -> [(step, SQL file, inline statement or Python check)], in state-machine order
+STEPS = {
+    "pbj": [
+        ("log_pending", LOG_PENDING_SQL),
+        ("validate", validate),
+        ("silver_merge", "silver_merge_pbj.sql"),
+        ("gold_daily_merge", "gold_merge_daily_fact.sql"),
+        ("refresh_facility_monthly", "gold_refresh_facility_monthly.sql"),
+        ("refresh_state_monthly", "gold_refresh_state_monthly.sql"),
+        ("mark_done", MARK_DONE_SQL),
+        ("publish_manifest", "gold_publish_manifest.sql"),
+    ],
+    "providerinfo": [
+        ("log_pending", LOG_PENDING_SQL),
+        ("validate", validate),
+        ("silver_merge", "silver_merge_providerinfo.sql"),
+        ("gold_quarterly_merge", "gold_merge_quarterly_provider.sql"),
+        ("gold_facility_dim", "gold_merge_facility_dim.sql"),
+        ("mark_done", MARK_DONE_SQL),
+        ("publish_manifest", "gold_publish_manifest.sql"),
+    ],
+}
+
+BRONZE_TABLES = {"pbj": PBJ_TABLE, "providerinfo": PI_TABLE}
+
+_PARAM_RE = re.compile(r"(?<![:\w]):(dataset|source_paths|ingested_ts)\b")
+_VERB_RE = re.compile(r"^\s*(?:--[^\n]*\n\s*)*(\w+)")
+
+
+def statement_verb(sql: str) -> str:
+    # MERGE / INSERT / UPDATE / CREATE ..., for per-run statement counts
+    m = _VERB_RE.match(sql)
+    return m.group(1).upper() if m else "?"
+
+
+def execution_ts() -> str:
+    # Same shape as $$.Execution.StartTime
+    return dt.datetime.now(dt.timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def _literal(v) -> str:
+    # A list binds as comma-separated literals, for IN (...) / ARRAY[...]
+    if isinstance(v, (list, tuple)):
+        return ", ".join(_literal(x) for x in v)
+    return "'" + str(v).replace("'", "''") + "'"
+
+
+def bind(sql: str, params: dict) -> str:
+    return _PARAM_RE.sub(lambda m: _literal(params[m.group(1)]), sql)
+
+
+def _statements(step_sql: str) -> list[str]:
+    if step_sql.endswith(".sql"):
+        with open(os.path.join(SQL_DIR, step_sql), encoding="utf-8") as f:
+            return split_sql(f.read())
+    return [step_sql]
+
+
+class LocalLakehouse:
+    def __init__(self, database: str = ":memory:", threads: int | None = None):
+        import duckdb
+        self.con = duckdb.connect(database)
+        self._local = threading.local()
+        self.statements: Counter = Counter()
+        if threads:
+            self.con.execute(f"SET threads = {int(threads)}")
+        for stmt in DUCKDB_COMPAT_MACROS:
+            self.con.execute(stmt)
+        with open(LOCAL_DDL, encoding="utf-8") as f:
+            for stmt in split_sql(f.read()):
+                self.con.execute(stmt)
+
+    def execute(self, sql: str):
+        # One cursor per thread, so the runner's concurrent tracks share the database
+        cur = getattr(self._local, "cursor", None)
+        if cur is None:
+            cur = self._local.cursor = self.con.cursor()
+        self.statements[statement_verb(sql)] += 1
+        cur.execute(sql)
+
+    def bronze_view(self, dataset: str, paths: list[str]):
+        # Athena external table over the landed files; all columns text, header skipped
+        table = BRONZE_TABLES[dataset]
+        names = ", ".join("'" + c + "'" for c in bronze_columns()[table])
+        files = ", ".join("'" + os.path.abspath(p).replace("'", "''") + "'" for p in paths)
+        self.execute(f"""
+          CREATE OR REPLACE VIEW {table} AS
+          SELECT * EXCLUDE (filename), filename AS "$path"
+          FROM read_csv([{files}], header = true, names = [{names}], all_varchar = true,
+                        quote = '"', escape = '\\', filename = true)
+        """)
+
+    def run_step(self, step_sql: str, params: dict) -> float:
+        t0 = time.perf_counter()
+        for stmt in _statements(step_sql):
+            self.execute(bind(stmt, params))
+        return time.perf_counter() - t0
+
+    def validate_step(self, path: str, dataset: str) -> float:
+        # Validate Lambda + RecordValidation + the ValidationGate choice
+        t0 = time.perf_counter()
+        report = validate(path, dataset)
+        self.execute(record_sql(report))
+        if report["verdict"] == REJECTED:
+            raise BronzeRejected(report)
+        return time.perf_counter() - t0
+
+    def ingest(self, path: str, dataset: str, ingested_ts: str | None = None) -> dict[str, float]:
+        # One state-machine execution for a landed file; -> {step: seconds}.
+        # A file failing validation raises BronzeRejected before its silver merge.
+        path = os.path.abspath(path)
+        self.bronze_view(dataset, [path])
+        params = {"dataset": dataset, "source_paths": [path], "ingested_ts": ingested_ts or execution_ts()}
+        timings = {}
+        for step, sql in STEPS[dataset]:
+            seconds = self.validate_step(path, dataset) if callable(sql) else self.run_step(sql, params)
+            timings[step] = round(seconds, 4)
+        return timings
+
+    def row_counts(self) -> dict[str, int]:
+        tables = [r[0] for r in self.con.execute(
+            "SELECT table_name FROM information_schema.tables WHERE table_type = 'BASE TABLE' ORDER BY 1").fetchall()]
+        return {t: self.con.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t in tables}
+
+    def export_gold(self, out_dir: str) -> list[str]:
+        # <out_dir>/<table>.parquet for each gold table (DUCKDB_DATA_DIR layout)
+        os.makedirs(out_dir, exist_ok=True)
+        paths = []
+        for table in GOLD_TABLES:
+            path = os.path.join(os.path.abspath(out_dir), f"{table}.parquet")
+            self.con.execute(f"COPY {table} TO '{path}' (FORMAT parquet, COMPRESSION zstd)")
+            paths.append(path)
+        return paths
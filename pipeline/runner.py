@@ -0,0 +1,350 @@
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from graphlib import TopologicalSorter
+
+from pipeline.bronze_to_parquet import resolve_fs
+from pipeline.local import STEPS, _statements, bind, execution_ts, statement_verb
+from pipeline.validate import REJECTED, record_sql, validate
+
+# -----------------------------
+# Batched pipeline runner
+# -----------------------------
+# The state machine runs one LogPending -> SilverMerge -> gold merges -> MarkDone
+# -> PublishManifest chain per S3 object, so a quarterly drop of N files costs N
+# full chains: N MERGEs (and Iceberg snapshots) into every silver/gold table.
+# The runner executes the same sql/ steps (pipeline/local.py STEPS) once per
+# *drop* instead:
+#   - files landing within `window` seconds are coalesced into one execution;
+#     every step binds :source_paths to the drop's files ("$path" IN (...)),
+#     so each table sees one MERGE per drop;
+#   - steps run in dependency order (graphlib), the independent PBJ and
+#     ProviderInfo tracks concurrently; a single PublishManifest runs after both;
+#   - statements writing the same table (the ops file log) never run at once.
+# Each file is still validated (pipeline/validate.py); rejected files are left
+# out of the merges. Engines: the local DuckDB lakehouse (tests, benchmarks) or
+# Athena, configured from the same ATHENA_* environment as the app.
+#
+#   python -m pipeline.runner run data/landing --export-gold data/gold
+#   python -m pipeline.runner watch s3://kerok-healthcare-landing/bronze/ --engine athena --window 300
+
+DEFAULT_WINDOW_SECONDS = 300.0
+RETRY_BASE_SECONDS = 60.0
+RETRY_MAX_SECONDS = 3600.0
+PUBLISH_STEP = "publish_manifest"
+
+_WRITE_RE = re.compile(r"^\s*(?:--[^\n]*\n\s*)*(?:MERGE\s+INTO|INSERT\s+INTO|UPDATE|DELETE\s+FROM)\s+(\w+)", re.I)
+
+
+@dataclass(frozen=True)
+class LandedFile:
+    path: str
+    dataset: str
+    landed: float  # epoch seconds
+
+
+def dataset_of(path: str) -> str | None:
+    # Same routing as the state machine's RouteDataset: bronze/pbj/*, bronze/providerinfo/*
+    parent = os.path.basename(os.path.dirname(path.rstrip("/")))
+    return parent if parent in STEPS else None
+
+
+# -----------------------------
+# Micro-batching
+# -----------------------------
+class MicroBatcher:
+    # Collects landed files; a drop is due once its first file has waited
+    # `window` seconds (or `max_files` have arrived)
+    def __init__(self, window: float = DEFAULT_WINDOW_SECONDS, max_files: int = 0):
+        self.window = window
+        self.max_files = max_files
+        self._pending: list[LandedFile] = []
+        self._flushed: list[LandedFile] = []
+        self._hold_until = 0.0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, f: LandedFile):
+        self._pending.append(f)
+
+    def due(self, now: float) -> dict[str, list[str]] | None:
+        if not self._pending or now < self._hold_until:
+            return None
+        first = min(f.landed for f in self._pending)
+        if now - first < self.window and not (self.max_files and len(self._pending) >= self.max_files):
+            return None
+        return self.flush()
+
+    def flush(self) -> dict[str, list[str]]:
+        # {dataset: [path, ...]} in landing order (later files win in the silver merges)
+        drop = defaultdict(list)
+        for f in sorted(self._pending, key=lambda f: (f.landed, f.path)):
+            if f.path not in drop[f.dataset]:
+                drop[f.dataset].append(f.path)
+        self._flushed, self._pending = self._pending, []
+        return dict(drop)
+
+    def retry(self, not_before: float):
+        # Put the last flushed drop back after it failed (original landing times, so
+        # the merge order holds); no drop closes before `not_before`
+        self._pending.extend(self._flushed)
+        self._flushed = []
+        self._hold_until = not_before
+
+
+def group_drops(files: list[LandedFile], window: float = DEFAULT_WINDOW_SECONDS,
+                max_files: int = 0) -> list[dict[str, list[str]]]:
+    # Already-landed files -> drops, as the watcher would have formed them
+    batcher, drops = MicroBatcher(window, max_files), []
+    for f in sorted(files, key=lambda f: f.landed):
+        if (drop := batcher.due(f.landed)) is not None:
+            drops.append(drop)
+        batcher.add(f)
+    if len(batcher):
+        drops.append(batcher.flush())
+    return drops
+
+
+# -----------------------------
+# Engines
+# -----------------------------
+class AthenaEngine:
+    # Statements through the app's Athena backend (pooled PyAthena connections)
+    def __init__(self, backend):
+        self.backend = backend
+        self.statements: Counter = Counter()
+        self.bytes_scanned = 0
+
+    def execute(self, sql: str):
+        with self.backend.pool.connection() as conn:
+            with self.backend.statement_cursor(conn) as cur:
+                cur.execute(sql)
+                self.statements[statement_verb(sql)] += 1
+                self.bytes_scanned += cur.data_scanned_in_bytes or 0
+
+    def bronze_view(self, dataset: str, paths: list[str]):
+        pass  # the bronze external tables cover the landing prefix; "$path" picks the files
+
+
+def athena_engine() -> AthenaEngine:
+    from backends import AthenaBackend
+    return AthenaEngine(AthenaBackend(
+        region=os.getenv("AWS_REGION") or os.getenv("AWS_DEFAULT_REGION") or "us-east-1",
+        s3_output=os.getenv("ATHENA_S3_OUTPUT"),
+        workgroup=os.getenv("ATHENA_WORKGROUP", "primary"),
+        database=os.getenv("ATHENA_DATABASE", "kerok-healthcare-bronze"),
+        catalog=os.getenv("ATHENA_CATALOG", "AwsDataCatalog"),
+        fetch_mode="dbapi",  # statements only: no result file to download
+    ))
+
+
+# -----------------------------
+# Execution
+# -----------------------------
+def plan(datasets: list[str]) -> dict[tuple[str, str], set[tuple[str, str]]]:
+    # {(dataset, step): prerequisites}: each track is a chain in state-machine
+    # order; one shared PublishManifest after every track's last step
+    graph, tails = {}, []
+    for ds in datasets:
+        prev = None
+        for step, _ in STEPS[ds]:
+            if step == PUBLISH_STEP:
+                continue
+            graph[(ds, step)] = {prev} if prev else set()
+            prev = (ds, step)
+        tails.append(prev)
+    graph[("*", PUBLISH_STEP)] = set(tails)
+    return graph
+
+
+def _step_sql(dataset: str, step: str):
+    # "*" = the shared publish step, identical in every track
+    for ds in STEPS if dataset == "*" else [dataset]:
+        for name, step_sql in STEPS[ds]:
+            if name == step:
+                return step_sql
+    raise KeyError(step)
+
+
+class Runner:
+    def __init__(self, engine):
+        self.engine = engine
+        self._locks: dict[str, threading.Lock] = defaultdict(threading.Lock)
+        self._locks_guard = threading.Lock()
+
+    def _lock(self, table: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks[table]
+
+    def _execute(self, sql: str):
+        m = _WRITE_RE.match(sql)
+        if m is None:
+            self.engine.execute(sql)
+            return
+        with self._lock(m.group(1).lower()):
+            self.engine.execute(sql)
+
+    def _validate(self, dataset: str, paths: list[str]) -> tuple[list[str], list[dict]]:
+        accepted, rejected = [], []
+        for path in paths:
+            report = validate(path, dataset)
+            self._execute(record_sql(report))
+            if report["verdict"] == REJECTED:
+                rejected.append({"path": path, "reasons": report["reasons"]})
+            else:
+                accepted.append(path)
+        return accepted, rejected
+
+    def run_drop(self, drop: dict[str, list[str]], ingested_ts: str | None = None) -> dict:
+        # One execution for a drop {dataset: [path, ...]}; -> per-step timings and file verdicts
+        drop = {ds: paths for ds, paths in drop.items() if paths}
+        ingested_ts = ingested_ts or execution_ts()
+        files = {ds: {"accepted": list(paths), "rejected": []} for ds, paths in drop.items()}
+        for ds, paths in drop.items():
+            self.engine.bronze_view(ds, paths)
+
+        def params(ds: str) -> dict:
+            if ds == "*":
+                paths = [p for d in files.values() for p in d["accepted"]]
+            else:
+                paths = files[ds]["accepted"]
+            return {"dataset": ds, "source_paths": paths, "ingested_ts": ingested_ts}
+
+        def run_node(node: tuple[str, str]) -> float:
+            ds, step = node
+            p = params(ds)
+            if not p["source_paths"]:
+                return 0.0  # every file of the track (or drop) was rejected
+            t0 = time.perf_counter()
+            step_sql = _step_sql(ds, step)
+            if callable(step_sql):
+                files[ds]["accepted"], files[ds]["rejected"] = self._validate(ds, p["source_paths"])
+            else:
+                for stmt in _statements(step_sql):
+                    self._execute(bind(stmt, p))
+            return time.perf_counter() - t0
+
+        before = Counter(self.engine.statements)
+        timings, error = {}, None
+        sorter = TopologicalSorter(plan(list(drop)))
+        sorter.prepare()
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, len(drop)), thread_name_prefix="track") as pool:
+            running = {}
+            while sorter.is_active() and error is None:
+                for node in sorter.get_ready():
+                    running[pool.submit(run_node, node)] = node
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    node = running.pop(fut)
+                    try:
+                        timings[node[1] if node[0] == "*" else ".".join(node)] = round(fut.result(), 4)
+                    except Exception as e:  # stop scheduling; files stay PENDING for a rerun
+                        error = error or e
+                    sorter.done(node)
+            wait(running)
+        if error is not None:
+            raise error
+        statements = Counter(self.engine.statements)
+        statements.subtract(before)
+        return {"ingested_ts": ingested_ts, "files": files, "steps_s": timings,
+                "statements": {k: v for k, v in statements.items() if v},
+                "total_s": round(time.perf_counter() - t0, 4)}
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+def _list_csv(uri: str) -> list[LandedFile]:
+    import pyarrow.fs as pafs
+    fs, root = resolve_fs(uri)
+    scheme = uri.split("://", 1)[0] + "://" if "://" in uri else ""
+    info = fs.get_file_info(root)
+    infos = [info] if info.type == pafs.FileType.File else fs.get_file_info(pafs.FileSelector(root, recursive=True))
+    out = []
+    for i in infos:
+        path = scheme + i.path
+        if i.type == pafs.FileType.File and path.lower().endswith(".csv") and dataset_of(path):
+            landed = i.mtime.timestamp() if i.mtime is not None else time.time()
+            out.append(LandedFile(path, dataset_of(path), landed))
+    return out
+
+
+def _engine(args):
+    if args.engine == "athena":
+        return athena_engine()
+    from pipeline.local import LocalLakehouse
+    return LocalLakehouse(database=args.database, threads=args.threads)
+
+
+def _finish(engine, args, report: dict):
+    print(json.dumps(report), flush=True)
+    if args.export_gold and hasattr(engine, "export_gold"):
+        engine.export_gold(args.export_gold)
+
+
+def main(argv: list[str] | None = None) -> int:
+    p = argparse.ArgumentParser(description="Run landed bronze files through the pipeline SQL in batched drops.")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    run = sub.add_parser("run", help="Run already-landed files (grouped into drops by landing time)")
+    run.add_argument("paths", nargs="+", help="CSV files or directories/prefixes (local or s3://)")
+    watch = sub.add_parser("watch", help="Poll a landing prefix and run each drop as it closes")
+    watch.add_argument("prefix")
+    watch.add_argument("--poll", type=float, default=30.0, help="Seconds between listings")
+    watch.add_argument("--include-existing", action="store_true", help="Also run files present at startup")
+    for s in (run, watch):
+        s.add_argument("--engine", choices=["local", "athena"], default="local")
+        s.add_argument("--window", type=float, default=DEFAULT_WINDOW_SECONDS,
+                       help="Files landing within this many seconds form one drop")
+        s.add_argument("--max-files", type=int, default=0, help="Close a drop early at this many files (0 = no cap)")
+        s.add_argument("--database", default=":memory:", help="local: DuckDB database file")
+        s.add_argument("--threads", type=int, default=None, help="local: DuckDB threads")
+        s.add_argument("--export-gold", help="local: write gold Parquet extracts here after each drop")
+    args = p.parse_args(argv)
+
+    engine = _engine(args)
+    runner = Runner(engine)
+    if args.cmd == "run":
+        files = [f for path in args.paths for f in _list_csv(path)]
+        for drop in group_drops(files, args.window, args.max_files):
+            _finish(engine, args, runner.run_drop(drop))
+        return 0
+
+    seen = set() if args.include_existing else {f.path for f in _list_csv(args.prefix)}
+    batcher = MicroBatcher(args.window, args.max_files)
+    failures = 0
+    while True:  # until interrupted
+        for f in _list_csv(args.prefix):
+            if f.path not in seen:
+                seen.add(f.path)
+                batcher.add(LandedFile(f.path, f.dataset, time.time()))
+        drop = batcher.due(time.time())
+        if drop:
+            try:
+                _finish(engine, args, runner.run_drop(drop))
+                failures = 0
+            except Exception as e:
+                # Keep watching and rerun the drop (with any files landed since) after
+                # an exponential backoff; every step is keyed on the files, so a rerun
+                # redoes the same MERGEs. Its files stay PENDING in the ops log meanwhile.
+                failures += 1
+                delay = min(RETRY_BASE_SECONDS * 2 ** (failures - 1), RETRY_MAX_SECONDS)
+                batcher.retry(time.time() + delay)
+                print(f"drop failed ({type(e).__name__}: {e}); retrying in {delay:.0f}s",
+                      file=sys.stderr, flush=True)
+        time.sleep(args.poll if not len(batcher) else min(args.poll, args.window))
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        sys.exit(0)
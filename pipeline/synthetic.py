@@ -0,0 +1,281 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+
+from pipeline.bronze import PBJ_TABLE, PI_TABLE, bronze_columns
+
+# -----------------------------
+# Synthetic bronze data at national scale
+# -----------------------------
+# Writes landed-format CSVs (header row + the positional columns of
+# sql/bronze_ddl.sql, all values as text) for benchmarking the pipeline and the
+# dashboard without CMS downloads:
+#   <out>/pbj/PBJ_Daily_Nurse_Staffing_<quarter>.csv        facilities x days
+#   <out>/providerinfo/NH_ProviderInfo_<quarter>.csv        one row per facility
+# Everything derives from one seed: the same arguments give byte-identical
+# files. Rows are produced CHUNK_FACILITIES facilities at a time with NumPy, so
+# memory stays flat however many facilities/quarters are requested.
+# WorkDate is written ISO (yyyy-mm-dd), the form the silver try_cast accepts.
+
+CHUNK_FACILITIES = 2000
+
+# state: (CMS state code = first two CCN digits, share of nursing homes, lat, lon)
+STATES = {
+    "AL": ("01", 225, 32.8, -86.8), "AK": ("02", 20, 61.2, -149.9), "AZ": ("03", 145, 33.5, -112.0),
+    "AR": ("04", 220, 34.9, -92.4), "CA": ("05", 1180, 36.5, -119.5), "CO": ("06", 220, 39.4, -105.0),
+    "CT": ("07", 200, 41.6, -72.7), "DE": ("08", 45, 39.1, -75.5), "DC": ("09", 17, 38.9, -77.0),
+    "FL": ("10", 700, 28.2, -82.0), "GA": ("11", 355, 33.2, -83.9), "HI": ("12", 45, 21.3, -157.9),
+    "ID": ("13", 80, 43.6, -116.3), "IL": ("14", 700, 40.5, -88.9), "IN": ("15", 530, 39.9, -86.3),
+    "IA": ("16", 420, 42.0, -93.5), "KS": ("17", 320, 38.5, -97.5), "KY": ("18", 280, 37.8, -85.3),
+    "LA": ("19", 270, 30.8, -91.6), "ME": ("20", 90, 44.4, -69.8), "MD": ("21", 225, 39.1, -76.8),
+    "MA": ("22", 350, 42.3, -71.6), "MI": ("23", 440, 43.0, -84.5), "MN": ("24", 360, 45.3, -93.6),
+    "MS": ("25", 200, 32.6, -89.7), "MO": ("26", 500, 38.5, -92.4), "MT": ("27", 65, 46.7, -111.0),
+    "NE": ("28", 190, 41.0, -97.3), "NV": ("29", 65, 37.5, -116.5), "NH": ("30", 70, 43.2, -71.6),
+    "NJ": ("31", 350, 40.3, -74.5), "NM": ("32", 70, 34.6, -106.3), "NY": ("33", 610, 42.2, -75.0),
+    "NC": ("34", 420, 35.6, -79.4), "ND": ("35", 75, 47.3, -100.5), "OH": ("36", 950, 40.3, -82.8),
+    "OK": ("37", 290, 35.6, -97.2), "OR": ("38", 130, 44.6, -122.7), "PA": ("39", 680, 40.6, -77.2),
+    "RI": ("41", 75, 41.7, -71.5), "SC": ("42", 190, 34.0, -80.9), "SD": ("43", 100, 44.3, -99.4),
+    "TN": ("44", 310, 35.9, -86.4), "TX": ("45", 1200, 31.1, -97.6), "UT": ("46", 100, 40.5, -111.9),
+    "VT": ("47", 35, 44.0, -72.7), "VA": ("49", 285, 37.6, -78.2), "WA": ("50", 190, 47.4, -121.5),
+    "WV": ("51", 120, 38.6, -80.6), "WI": ("52", 340, 44.6, -89.8), "WY": ("53", 35, 42.8, -107.3),
+}
+
+OWNERSHIP_TYPES = ["For profit - Corporation", "For profit - Limited Liability company",
+                   "Non profit - Corporation", "Non profit - Church related", "Government - County",
+                   "For profit - Partnership", "Government - State"]
+
+# PBJ role -> (hours per resident per day on a weekday, facility-level spread)
+ROLE_HPRD = {"RN": (0.55, 0.35), "LPN": (0.85, 0.25), "CNA": (2.35, 0.18)}
+# Fixed-ish daily hours per facility (weekdays)
+ROLE_FIXED = {"RNDON": 8.0, "RNadmin": 6.0, "LPNadmin": 4.0}
+# Small per-resident roles
+ROLE_MINOR_HPRD = {"NAtrn": 0.05, "MedAide": 0.08}
+WEEKEND_FACTOR = 0.88
+
+# Columns blanked / garbled at `dirty_rate`, to exercise the try_cast paths
+DIRTY_PBJ_COLUMNS = ["MDScensus", "Hrs_RN", "Hrs_LPN_ctr", "Hrs_CNA_emp"]
+DIRTY_VALUES = ["", "NA", "*", " 12..5 "]
+
+
+def quarters_from(start: str, n: int) -> list[str]:
+    p = pd.Period(start, freq="Q")
+    return [f"{q.year}Q{q.quarter}" for q in pd.period_range(p, periods=n, freq="Q")]
+
+
+def quarter_days(quarter: str) -> pd.DatetimeIndex:
+    p = pd.Period(quarter, freq="Q")
+    return pd.date_range(p.start_time.normalize(), p.end_time.normalize(), freq="D")
+
+
+def facility_frame(n: int, seed: int = 0) -> pd.DataFrame:
+    # Static facility attributes (one row per facility), stable for a seed
+    rng = np.random.default_rng([seed, 0])
+    codes = list(STATES)
+    share = np.array([STATES[s][1] for s in codes], dtype="float64")
+    state_idx = np.sort(rng.choice(len(codes), size=n, p=share / share.sum()))
+    state = np.array(codes)[state_idx]
+    # Sequence within state -> 6-digit CCN "<state code><5xxx>" (SNF range)
+    seq = pd.Series(state_idx).groupby(state_idx).cumcount().to_numpy()
+    if seq.max(initial=0) >= 5000:
+        raise ValueError(f"{n} facilities exceed the 5000-per-state CCN range")
+    prefix = np.array([STATES[s][0] for s in codes])[state_idx]
+    ccn = pd.Series(prefix).str.cat(pd.Series(5000 + seq).astype(str)).to_numpy()
+
+    lat0 = np.array([STATES[s][2] for s in codes])[state_idx]
+    lon0 = np.array([STATES[s][3] for s in codes])[state_idx]
+    beds = np.clip(rng.lognormal(np.log(100), 0.45, n), 20, 400).round().astype(np.int64)
+    hprd_scale = {role: np.clip(rng.normal(1.0, spread, n), 0.3, 2.5) for role, (_, spread) in ROLE_HPRD.items()}
+    county_no = rng.integers(1, 60, n)
+    return pd.DataFrame({
+        "ccn": ccn,
+        "provider_name": pd.Series(rng.choice(["Oak", "Maple", "River", "Sunrise", "Valley", "Cedar",
+                                               "Hillside", "Lakeview", "Pine", "Meadow"], n))
+                         + " " + pd.Series(rng.choice(["Care Center", "Nursing Home", "Rehabilitation",
+                                                       "Health Center", "Manor"], n))
+                         + " " + pd.Series(seq + 1).astype(str),
+        "state": state,
+        "city": pd.Series(state).str.cat(pd.Series(rng.integers(1, 200, n)).astype(str), sep=" City "),
+        "county": "County " + pd.Series(county_no).astype(str),
+        "county_fips": (np.array([int(STATES[s][0]) for s in codes])[state_idx] * 1000 + county_no * 2 + 1),
+        "ownership_type": rng.choice(OWNERSHIP_TYPES, n, p=[.35, .3, .15, .05, .06, .06, .03]),
+        "lat": (lat0 + rng.normal(0, 1.2, n)).round(4),
+        "lon": (lon0 + rng.normal(0, 1.6, n)).round(4),
+        "beds": beds,
+        "occupancy": rng.beta(8, 2.5, n),
+        "contract_share": rng.beta(1.2, 12, n),
+        **{f"hprd_{role}": v for role, v in hprd_scale.items()},
+    })
+
+
+def _fmt(values: np.ndarray) -> pa.Array:
+    # Hours as text with at most two decimals (what CMS publishes)
+    return pc.cast(pa.array(np.round(values, 2)), pa.string())
+
+
+def pbj_chunk(fac: pd.DataFrame, quarter: str, days: pd.DatetimeIndex,
+              rng: np.random.Generator, dirty_rate: float = 0.0) -> tuple[pa.Table, np.ndarray]:
+    # -> facility-major rows (facility x day) in bronze column order, all strings;
+    #    plus each facility's mean daily census (feeds the ProviderInfo snapshot)
+    nf, nd = len(fac), len(days)
+    rep = lambda a: np.repeat(np.asarray(a), nd)
+    weekend = np.tile(days.dayofweek.to_numpy() >= 5, nf)
+    day_factor = np.where(weekend, WEEKEND_FACTOR, 1.0)
+
+    census = np.maximum(
+        np.round(rep(fac["beds"]) * rep(fac["occupancy"]) * rng.normal(1.0, 0.03, nf * nd)), 0)
+    ctr_share = np.clip(rep(fac["contract_share"]) * rng.lognormal(0, 0.25, nf * nd), 0, 1)
+
+    cols = {
+        "PROVNUM": pa.array(rep(fac["ccn"])),
+        "PROVNAME": pa.array(rep(fac["provider_name"])),
+        "CITY": pa.array(rep(fac["city"])),
+        "STATE": pa.array(rep(fac["state"])),
+        "COUNTY_NAME": pa.array(rep(fac["county"])),
+        "COUNTY_FIPS": pc.cast(pa.array(rep(fac["county_fips"])), pa.string()),
+        "CY_Qtr": pa.repeat(pa.scalar(quarter), nf * nd),
+        "WorkDate": pa.array(np.tile(days.strftime("%Y-%m-%d").to_numpy(), nf)),
+        "MDScensus": pc.cast(pa.array(census.astype(np.int64)), pa.string()),
+    }
+
+    def role(name, total):
+        total = np.maximum(total, 0)
+        ctr = np.round(total * ctr_share, 2)
+        total = np.round(total, 2)
+        cols[f"Hrs_{name}"] = _fmt(total)
+        cols[f"Hrs_{name}_emp"] = _fmt(total - ctr)
+        cols[f"Hrs_{name}_ctr"] = _fmt(ctr)
+
+    staffed = census > 0
+    role("RNDON", np.where(weekend | ~staffed, 0.0, ROLE_FIXED["RNDON"]))
+    for name in ("RNadmin", "LPNadmin"):
+        role(name, np.where(staffed, ROLE_FIXED[name] * day_factor * rng.uniform(0.3, 1.5, nf * nd), 0.0))
+    for name, (hprd, _) in ROLE_HPRD.items():
+        role(name, census * hprd * rep(fac[f"hprd_{name}"]) * day_factor * rng.lognormal(0, 0.12, nf * nd))
+    for name, hprd in ROLE_MINOR_HPRD.items():
+        role(name, census * hprd * day_factor * rng.lognormal(0, 0.3, nf * nd))
+
+    if dirty_rate > 0:
+        for c in DIRTY_PBJ_COLUMNS:
+            bad = rng.random(nf * nd) < dirty_rate
+            junk = pa.array(rng.choice(DIRTY_VALUES, nf * nd))
+            cols[c] = pc.if_else(pa.array(bad), junk, cols[c])
+        # CMS files often drop the CCN's leading zero
+        bad = pa.array(rng.random(nf * nd) < dirty_rate)
+        cols["PROVNUM"] = pc.if_else(bad, pc.utf8_ltrim(cols["PROVNUM"], characters="0"), cols["PROVNUM"])
+
+    names = bronze_columns()[PBJ_TABLE]
+    return pa.table([cols[c] for c in names], names=names), census.reshape(nf, nd).mean(axis=1)
+
+
+def providerinfo_table(fac: pd.DataFrame, quarter: str, avg_census: np.ndarray,
+                       rng: np.random.Generator) -> pa.Table:
+    # One snapshot row per facility; columns the silver merge ignores stay empty
+    n = len(fac)
+    processing_date = (pd.Period(quarter, freq="Q").end_time.normalize() + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+    total_hprd = sum(ROLE_HPRD[r][0] * fac[f"hprd_{r}"].to_numpy() for r in ROLE_HPRD)
+    fines = rng.poisson(0.6, n)
+    values = {
+        "cms_certification_number_(ccn)": fac["ccn"],
+        "provider_name": fac["provider_name"],
+        "provider_address": pd.Series(rng.integers(1, 9999, n)).astype(str) + " Main St",
+        "city_town": fac["city"],
+        "state": fac["state"],
+        "zip_code": pd.Series(rng.integers(1001, 99950, n)).astype(str).str.zfill(5),
+        "telephone_number": pd.Series(rng.integers(2002000000, 9899999999, n)).astype(str),
+        "provider_ssa_county_code": pd.Series(fac["county_fips"] % 1000).astype(str),
+        "county_parish": fac["county"],
+        "ownership_type": fac["ownership_type"],
+        "number_of_certified_beds": fac["beds"].astype(str),
+        "average_number_of_residents_per_day": pd.Series(np.round(avg_census, 1)).astype(str),
+        "provider_type": np.full(n, "Medicare and Medicaid"),
+        "overall_rating": pd.Series(rng.integers(1, 6, n)).astype(str),
+        "health_inspection_rating": pd.Series(rng.integers(1, 6, n)).astype(str),
+        "qm_rating": pd.Series(rng.integers(1, 6, n)).astype(str),
+        "staffing_rating": pd.Series(rng.integers(1, 6, n)).astype(str),
+        "reported_total_nurse_staffing_hours_per_resident_per_day": pd.Series(np.round(total_hprd, 5)).astype(str),
+        "adjusted_total_nurse_staffing_hours_per_resident_per_day":
+            pd.Series(np.round(total_hprd * rng.normal(1.0, 0.05, n), 5)).astype(str),
+        "number_of_fines": pd.Series(fines).astype(str),
+        "total_amount_of_fines_in_dollars": pd.Series(np.round(fines * rng.lognormal(9, 1, n), 2)).astype(str),
+        "number_of_payment_denials": pd.Series(rng.poisson(0.1, n)).astype(str),
+        "total_number_of_penalties": pd.Series(fines + rng.poisson(0.1, n)).astype(str),
+        "latitude": fac["lat"].astype(str),
+        "longitude": fac["lon"].astype(str),
+        "location": fac["city"] + ", " + fac["state"],
+        "processing_date": np.full(n, processing_date),
+    }
+    names = bronze_columns()[PI_TABLE]
+    empty = pa.repeat(pa.scalar(""), n)
+    return pa.table([pa.array(np.asarray(values[c], dtype=object), pa.string()) if c in values else empty
+                     for c in names], names=names)
+
+
+def _write_csv(path: str, tables) -> tuple[int, int]:
+    # Stream tables into one CSV (header once); returns (rows, bytes)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    rows, writer = 0, None
+    try:
+        for t in tables:
+            if writer is None:
+                writer = pacsv.CSVWriter(path, t.schema, write_options=pacsv.WriteOptions(quoting_style="needed"))
+            writer.write_table(t)
+            rows += t.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows, os.path.getsize(path)
+
+
+def generate(out_dir: str, facilities: int = 15_000, quarters: int = 1, start_quarter: str = "2024Q2",
+             seed: int = 0, dirty_rate: float = 0.0, chunk_facilities: int = CHUNK_FACILITIES) -> dict:
+    fac = facility_frame(facilities, seed)
+    files = []
+    for qi, quarter in enumerate(quarters_from(start_quarter, quarters)):
+        days = quarter_days(quarter)
+        avg_census = np.zeros(facilities)
+
+        def chunks():
+            for ci, start in enumerate(range(0, facilities, chunk_facilities)):
+                part = fac.iloc[start:start + chunk_facilities]
+                t, avg_census[start:start + len(part)] = pbj_chunk(
+                    part, quarter, days, np.random.default_rng([seed, 1, qi, ci]), dirty_rate)
+                yield t
+
+        t0 = time.perf_counter()
+        path = os.path.join(out_dir, "pbj", f"PBJ_Daily_Nurse_Staffing_{quarter}.csv")
+        rows, size = _write_csv(path, chunks())
+        files.append({"dataset": "pbj", "quarter": quarter, "path": path, "rows": rows, "bytes": size,
+                      "seconds": round(time.perf_counter() - t0, 3)})
+
+        t0 = time.perf_counter()
+        path = os.path.join(out_dir, "providerinfo", f"NH_ProviderInfo_{quarter}.csv")
+        pi = providerinfo_table(fac, quarter, avg_census, np.random.default_rng([seed, 2, qi]))
+        rows, size = _write_csv(path, [pi])
+        files.append({"dataset": "providerinfo", "quarter": quarter, "path": path, "rows": rows, "bytes": size,
+                      "seconds": round(time.perf_counter() - t0, 3)})
+    return {"facilities": facilities, "quarters": quarters, "start_quarter": start_quarter,
+            "seed": seed, "dirty_rate": dirty_rate, "files": files}
+
+
+def main(argv: list[str] | None = None):
+    p = argparse.ArgumentParser(description="Generate synthetic bronze PBJ/ProviderInfo CSVs.")
+    p.add_argument("out_dir")
+    p.add_argument("--facilities", type=int, default=15_000)
+    p.add_argument("--quarters", type=int, default=1)
+    p.add_argument("--start-quarter", default="2024Q2")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--dirty-rate", type=float, default=0.0, help="Share of values blanked/garbled in a few columns")
+    args = p.parse_args(argv)
+    result = generate(args.out_dir, args.facilities, args.quarters, args.start_quarter, args.seed, args.dirty_rate)
+    for f in result["files"]:
+        print(f"{f['path']}: {f['rows']:,} rows, {f['bytes'] / 1e6:,.1f} MB in {f['seconds']}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+import argparse
+import csv
+import io
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+
+from pipeline.bronze import (
+    _DOUBLE_RE, _INT_RE, _NUM_RE, PBJ_HOUR_COLS, PBJ_TABLE, PI_TABLE, bronze_columns, pbj_ccn,
+    providerinfo_ccn, trim, try_cast_date, try_cast_decimal,
+)
+from pipeline.bronze_to_parquet import DEFAULT_BLOCK_MB, resolve_fs
+
+# -----------------------------
+# Bronze file validation (gate before the silver MERGE)
+# -----------------------------
+# A bad upload (wrong header, shifted columns, text in numeric columns) used to
+# surface only after PBJ_SilverMerge / PI_SilverMerge had run a full-file MERGE,
+# with the bad values silently NULLed by try_cast. The validator streams the
+# landed CSV in fixed-size blocks (bounded memory, blocks checked in parallel)
+# and measures, with vectorized Arrow kernels:
+#   - header: names and order against sql/bronze_ddl.sql (OpenCSVSerde maps by position)
+#   - ragged rows: field count different from the header (shifted columns)
+#   - per typed column: values that are non-empty but fail the silver try_cast
+#   - merge key: rows with a NULL key and duplicate keys (ccn+workdate / ccn),
+#     which would make the MERGE match one target row more than once
+# The verdict is written to kerok_healthcare_ops_file_log (status VALIDATED or
+# REJECTED, row_count, validation = JSON report) and rejected files never reach
+# the MERGE.
+#
+#   python -m pipeline.validate pbj s3://kerok-healthcare-landing/bronze/pbj/<file>.csv
+#
+# In the state machine, `handler` runs as the kerok-healthcare-validate-bronze Lambda.
+
+
+# -----------------------------
+# try_cast failure counts
+# -----------------------------
+# Same acceptance rules as pipeline.bronze's try_cast_* (and Athena's try_cast),
+# but only counting: valid-looking values are range-checked as float64 instead of
+# being built into decimals, several times faster per column. Inputs are trimmed.
+def _present(s: pa.Array) -> pa.Array:
+    return pc.not_equal(s, "")
+
+
+def _numeric_failures(s: pa.Array, pattern: str, lo: float | None = None, hi: float | None = None) -> int:
+    valid = pc.match_substring_regex(s, pattern)
+    bad = pc.sum(pc.and_(_present(s), pc.invert(valid))).as_py() or 0
+    if lo is None:
+        return bad
+    x = pc.cast(pc.filter(s, valid), pa.float64())
+    return bad + (pc.sum(pc.or_(pc.less(x, lo), pc.greater_equal(x, hi))).as_py() or 0)
+
+
+def decimal_failures(precision: int, scale: int):
+    bound = 10.0 ** (precision - scale)
+
+    def count(s: pa.Array) -> int:
+        valid = pc.match_substring_regex(s, _NUM_RE)
+        bad = pc.sum(pc.and_(_present(s), pc.invert(valid))).as_py() or 0
+        s = pc.filter(s, valid)
+        # Only values within 1 of the limit can round past it: cast those exactly
+        edge = pc.filter(s, pc.greater_equal(pc.abs(pc.cast(s, pa.float64())), bound - 1))
+        if len(edge):
+            bad += pc.sum(pc.is_null(try_cast_decimal(edge, precision, scale))).as_py() or 0
+        return bad
+    return count
+
+
+def int_failures(s: pa.Array) -> int:
+    return _numeric_failures(s, _INT_RE, -2.0 ** 31, 2.0 ** 31)
+
+
+def double_failures(s: pa.Array) -> int:
+    return _numeric_failures(s, _DOUBLE_RE)
+
+
+def date_failures(s: pa.Array) -> int:
+    return pc.sum(pc.and_(_present(s), pc.is_null(try_cast_date(s)))).as_py() or 0
+
+
+# Bronze column -> failure counter (mirrors normalize_pbj / normalize_providerinfo)
+
+DATASETS = {
+    "pbj": {
+        "table": PBJ_TABLE,
+        "casts": {"COUNTY_FIPS": int_failures, "WorkDate": date_failures, "MDScensus": int_failures,
+                  **{h: decimal_failures(9, 2) for h in PBJ_HOUR_COLS}},
+        # silver_merge_pbj.sql: ON (t.ccn = s.ccn AND t.workdate = s.workdate)
+        "key": {"ccn": lambda c: pbj_ccn(c("PROVNUM")), "workdate": lambda c: try_cast_date(c("WorkDate"))},
+    },
+    "providerinfo": {
+        "table": PI_TABLE,
+        "casts": {
+            "latitude": decimal_failures(9, 4), "longitude": decimal_failures(9, 4),
+            "number_of_certified_beds": int_failures,
+            "average_number_of_residents_per_day": double_failures,
+            "reported_total_nurse_staffing_hours_per_resident_per_day": double_failures,
+            "adjusted_total_nurse_staffing_hours_per_resident_per_day": double_failures,
+            "number_of_fines": int_failures,
+            "total_amount_of_fines_in_dollars": double_failures,
+            "number_of_payment_denials": int_failures,
+            "total_number_of_penalties": int_failures,
+        },
+        # silver_merge_providerinfo.sql: ON (t.ccn = s.ccn)
+        "key": {"ccn": lambda c: providerinfo_ccn(c("cms_certification_number_(ccn)"))},
+    },
+}
+
+# Rejection thresholds (Lambda environment / CLI flags)
+MAX_CAST_FAILURE_RATE = float(os.getenv("VALIDATE_MAX_CAST_FAILURE_RATE", "0.05"))
+MAX_RAGGED_RATE = float(os.getenv("VALIDATE_MAX_RAGGED_RATE", "0.001"))
+MAX_DUPLICATE_RATE = float(os.getenv("VALIDATE_MAX_DUPLICATE_RATE", "0"))
+MAX_NULL_KEY_RATE = float(os.getenv("VALIDATE_MAX_NULL_KEY_RATE", "0"))
+
+VALIDATED = "VALIDATED"
+REJECTED = "REJECTED"
+
+RAGGED_SAMPLES = 3
+# Per-batch key counts are folded together every this many blocks
+KEY_COMPACT_BATCHES = 32
+
+
+class BronzeRejected(Exception):
+    def __init__(self, report: dict):
+        super().__init__(f"{report['source']}: {'; '.join(report['reasons'])}")
+        self.report = report
+
+
+# -----------------------------
+# Scan
+# -----------------------------
+def read_header(source: str) -> list[str]:
+    # First CSV record, parsed with the same quoting as the body
+    fs, path = resolve_fs(source)
+    with fs.open_input_stream(path) as f:
+        text = io.TextIOWrapper(f, encoding="utf-8-sig", errors="replace", newline="")
+        return next(csv.reader(text, quotechar='"', escapechar="\\"), [])
+
+
+def check_header(header: list[str], expected: list[str]) -> dict:
+    got = [h.strip() for h in header]
+    got_l, exp_l = [h.lower() for h in got], [e.lower() for e in expected]
+    missing = [e for e, el in zip(expected, exp_l) if el not in got_l]
+    unexpected = [g for g, gl in zip(got, got_l) if gl not in exp_l]
+    misplaced = [e for i, (e, el) in enumerate(zip(expected, exp_l))
+                 if el in got_l and (i >= len(got_l) or got_l[i] != el)]
+    return {"ok": got_l == exp_l, "columns": len(got), "expected_columns": len(expected),
+            "missing": missing, "unexpected": unexpected, "misplaced": misplaced}
+
+
+def _scan_batch(batch: pa.RecordBatch, spec: dict) -> tuple[dict, pa.Table]:
+    # -> ({column: cast failures}, key counts within the batch)
+    failures = {col: count(trim(batch.column(col))) for col, count in spec["casts"].items()}
+    keys = pa.table({name: key(batch.column) for name, key in spec["key"].items()})
+    counts = keys.group_by(keys.column_names).aggregate([([], "count_all")])
+    return failures, counts
+
+
+def _merge_counts(tables: list[pa.Table]) -> pa.Table:
+    # Per-batch key counts -> one row per distinct key (memory ~ distinct keys, not rows)
+    t = pa.concat_tables(tables)
+    names = t.column_names[:-1]
+    return t.group_by(names).aggregate([("count_all", "sum")]).rename_columns([*names, "count_all"])
+
+
+def scan(source: str, dataset: str, block_mb: int = DEFAULT_BLOCK_MB, threads: int | None = None) -> dict:
+    # Row, ragged-row, cast-failure and merge-key counts for the file body
+    spec = DATASETS[dataset]
+    columns = bronze_columns()[spec["table"]]
+    ragged, samples, lock = [0], [], threading.Lock()
+
+    def on_invalid(row) -> str:
+        with lock:
+            ragged[0] += 1
+            if len(samples) < RAGGED_SAMPLES:
+                samples.append({"fields": row.actual_columns, "text": (row.text or "")[:200]})
+        return "skip"
+
+    # Same reader settings as bronze_to_parquet (positional columns, header skipped)
+    read_opts = pacsv.ReadOptions(column_names=columns, skip_rows=1, block_size=block_mb << 20)
+    parse_opts = pacsv.ParseOptions(delimiter=",", quote_char='"', escape_char="\\", newlines_in_values=True,
+                                    invalid_row_handler=on_invalid)
+    convert_opts = pacsv.ConvertOptions(column_types={c: pa.string() for c in columns}, strings_can_be_null=False)
+
+    rows, failures, key_counts = 0, dict.fromkeys(spec["casts"], 0), []
+
+    def collect(fut):
+        f, k = fut.result()
+        for col, n in f.items():
+            failures[col] += n
+        key_counts.append(k)
+        if len(key_counts) >= KEY_COMPACT_BATCHES:
+            key_counts[:] = [_merge_counts(key_counts)]
+
+    fs, path = resolve_fs(source)
+    workers = threads or os.cpu_count() or 4
+    with fs.open_input_stream(path) as f, ThreadPoolExecutor(max_workers=workers) as pool:
+        reader = pacsv.open_csv(f, read_options=read_opts, parse_options=parse_opts, convert_options=convert_opts)
+        inflight = deque()
+        for batch in reader:
+            rows += batch.num_rows
+            inflight.append(pool.submit(_scan_batch, batch, spec))
+            # Bound memory: at most ~2 blocks per worker are held at once
+            while len(inflight) >= 2 * workers:
+                collect(inflight.popleft())
+        while inflight:
+            collect(inflight.popleft())
+
+    null_keys = duplicates = 0
+    if key_counts:
+        keyed = _merge_counts(key_counts)
+        names = list(spec["key"])
+        has_null = pc.is_null(keyed.column(names[0]))
+        for name in names[1:]:
+            has_null = pc.or_(has_null, pc.is_null(keyed.column(name)))
+        n = keyed.column("count_all")
+        null_keys = pc.sum(pc.filter(n, has_null)).as_py() or 0
+        # Every row beyond the first per key is a duplicate
+        duplicates = pc.sum(pc.subtract(pc.filter(n, pc.invert(has_null)), 1)).as_py() or 0
+    return {"rows": rows, "ragged_rows": ragged[0], "ragged_samples": samples, "cast_failures": failures,
+            "null_keys": null_keys, "duplicate_keys": duplicates}
+
+
+def _few(names: list[str], n: int = 5) -> str:
+    return ", ".join(names[:n]) + (f" (+{len(names) - n} more)" if len(names) > n else "")
+
+
+def validate(source: str, dataset: str, block_mb: int = DEFAULT_BLOCK_MB, threads: int | None = None,
+             max_cast_failure_rate: float = MAX_CAST_FAILURE_RATE, max_ragged_rate: float = MAX_RAGGED_RATE,
+             max_duplicate_rate: float = MAX_DUPLICATE_RATE, max_null_key_rate: float = MAX_NULL_KEY_RATE) -> dict:
+    t0 = time.perf_counter()
+    raw_header = read_header(source)
+    header = check_header(raw_header, bronze_columns()[DATASETS[dataset]["table"]])
+    # An empty file has no body to scan
+    body = (scan(source, dataset, block_mb=block_mb, threads=threads) if raw_header else
+            {"rows": 0, "ragged_rows": 0, "ragged_samples": [], "cast_failures": {}, "null_keys": 0,
+             "duplicate_keys": 0})
+
+    rows, ragged, duplicates, null_keys = body["rows"], body["ragged_rows"], body["duplicate_keys"], body["null_keys"]
+    rates = {c: round(n / rows, 6) for c, n in body["cast_failures"].items() if n}
+    reasons = []
+    if not header["ok"]:
+        parts = [f"{k} {_few(header[k])}" for k in ("missing", "unexpected", "misplaced") if header[k]]
+        reasons.append("header mismatch: " + ("; ".join(parts) or "column names differ"))
+    if rows == 0:
+        reasons.append("no data rows")
+    if ragged and ragged / (rows + ragged) > max_ragged_rate:
+        reasons.append(f"{ragged} of {rows + ragged} rows have the wrong number of fields")
+    bad = sorted(c for c, r in rates.items() if r > max_cast_failure_rate)
+    if bad:
+        reasons.append(f"cast failure rate above {max_cast_failure_rate:g} in {_few(bad)}")
+    if rows and duplicates / rows > max_duplicate_rate:
+        reasons.append(f"{duplicates} duplicate merge keys")
+    if rows and null_keys / rows > max_null_key_rate:
+        reasons.append(f"{null_keys} rows with a NULL merge key")
+
+    return {
+        "source": source, "dataset": dataset, "verdict": REJECTED if reasons else VALIDATED, "reasons": reasons,
+        "header": header, **body, "cast_failures": {c: n for c, n in body["cast_failures"].items() if n},
+        "cast_failure_rates": rates, "seconds": round(time.perf_counter() - t0, 3),
+    }
+
+
+# -----------------------------
+# Ops log
+# -----------------------------
+def _sql_str(v: str) -> str:
+    return "'" + str(v).replace("'", "''") + "'"
+
+
+def record_sql(report: dict) -> str:
+    # UPDATE for the file's LogPending row (Athena and the local DuckDB lakehouse)
+    summary = {k: v for k, v in report.items() if k not in ("source", "dataset", "verdict")}
+    return (f"UPDATE kerok_healthcare_ops_file_log SET status = {_sql_str(report['verdict'])}, "
+            f"validated_ts = current_timestamp, row_count = {int(report['rows'])}, "
+            f"validation = {_sql_str(json.dumps(summary, separators=(',', ':')))} "
+            f"WHERE s3_path = {_sql_str(report['source'])}")
+
+
+def handler(event, context=None) -> dict:
+    # Lambda entry point: {"s3_path": ..., "dataset": "pbj"|"providerinfo"}
+    report = validate(event["s3_path"], event["dataset"])
+    return {"verdict": report["verdict"], "rows": report["rows"], "reasons": report["reasons"],
+            "record_sql": record_sql(report)}
+
+
+def main(argv: list[str] | None = None) -> int:
+    p = argparse.ArgumentParser(description="Validate a landed bronze PBJ/ProviderInfo CSV before the silver MERGE.")
+    p.add_argument("dataset", choices=sorted(DATASETS))
+    p.add_argument("source", help="CSV path or s3:// URI")
+    p.add_argument("--block-mb", type=int, default=DEFAULT_BLOCK_MB, help="CSV read block size (bounds memory)")
+    p.add_argument("--threads", type=int, default=None, help="Blocks checked in parallel (default: CPU count)")
+    p.add_argument("--max-cast-failure-rate", type=float, default=MAX_CAST_FAILURE_RATE)
+    p.add_argument("--max-ragged-rate", type=float, default=MAX_RAGGED_RATE)
+    p.add_argument("--max-duplicate-rate", type=float, default=MAX_DUPLICATE_RATE)
+    p.add_argument("--max-null-key-rate", type=float, default=MAX_NULL_KEY_RATE)
+    args = p.parse_args(argv)
+    report = validate(args.source, args.dataset, block_mb=args.block_mb, threads=args.threads,
+                      max_cast_failure_rate=args.max_cast_failure_rate, max_ragged_rate=args.max_ragged_rate,
+                      max_duplicate_rate=args.max_duplicate_rate, max_null_key_rate=args.max_null_key_rate)
+    print(json.dumps(report, indent=2))
+    return 0 if report["verdict"] == VALIDATED else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
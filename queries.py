@@ -0,0 +1,129 @@
+import datetime as dt
+import hashlib
+import json
+import re
+from dataclasses import dataclass
+from decimal import Decimal
+
+# -----------------------------
+# Canonical, parameterized queries
+# -----------------------------
+# Every dashboard query is a Query: SQL text with "?" placeholders plus a tuple
+# of parameter values. Filters are canonicalized before rendering (columns in
+# name order, IN-lists sorted and de-duplicated, a list covering every known
+# value collapsed to "IS NOT NULL", whitespace outside literals collapsed), so
+# the same logical request always yields the same text + parameters, and so the
+# same Query.key, whatever order states/facilities were picked in. Query.key
+# is what the in-process, in-flight and disk caches are keyed on; the engine
+# receives the SQL and parameters separately (DuckDB prepared parameters /
+# Athena execution parameters) instead of hand-quoted literals.
+
+_LITERAL_RE = re.compile(r"('(?:[^']|'')*')")
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_sql(sql: str) -> str:
+    # Collapse whitespace outside string literals; trim (query text must not use "--" comments)
+    parts = _LITERAL_RE.split(sql)
+    return "".join(p if i % 2 else _WS_RE.sub(" ", p) for i, p in enumerate(parts)).strip()
+
+
+def sql_literal(v) -> str:
+    if v is None:
+        return "NULL"
+    if isinstance(v, bool):
+        return "TRUE" if v else "FALSE"
+    if isinstance(v, (int, Decimal)):
+        return str(v)
+    if isinstance(v, float):
+        return repr(v)  # shortest repr round-trips exactly through DOUBLE
+    if isinstance(v, dt.datetime):
+        return f"TIMESTAMP '{v.isoformat(sep=' ')}'"
+    if isinstance(v, dt.date):
+        return f"DATE '{v.isoformat()}'"
+    return "'" + str(v).replace("'", "''") + "'"
+
+
+def _canonical(v):
+    # Parameter values as stable, hashable Python scalars
+    if hasattr(v, "to_pydatetime"):
+        v = v.to_pydatetime()
+    elif hasattr(v, "item"):
+        v = v.item()
+    if isinstance(v, dt.datetime) and v.time() == dt.time(0) and v.tzinfo is None:
+        return v.date()
+    return v
+
+
+@dataclass(frozen=True)
+class Query:
+    sql: str
+    params: tuple = ()
+
+    @classmethod
+    def of(cls, sql: "str | Query") -> "Query":
+        return sql if isinstance(sql, Query) else cls(normalize_sql(sql))
+
+    @property
+    def key(self) -> str:
+        payload = json.dumps([self.sql, [sql_literal(p) for p in self.params]], separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def wrap(self, fn, *args, **kwargs) -> "Query":
+        # Embed in an outer statement, e.g. q.wrap(count_sql). `fn` must not add
+        # placeholders ahead of the inner query's (the wrappers in paging.py /
+        # stats.py only add literals).
+        return Query(normalize_sql(fn(self.sql, *args, **kwargs)), self.params)
+
+    def inline(self) -> str:
+        # Parameters substituted as SQL literals (engine-side extracts, logging)
+        values = iter(self.params)
+        parts = _LITERAL_RE.split(self.sql)
+        return "".join(p if i % 2 else re.sub(r"\?", lambda _: sql_literal(next(values)), p)
+                       for i, p in enumerate(parts))
+
+
+@dataclass(frozen=True)
+class Filters:
+    # ((column, values | None), ...) sorted by column; None = every known value
+    values: tuple = ()
+    # ((column, low, high), ...) sorted by column; inclusive bounds
+    ranges: tuple = ()
+
+    @classmethod
+    def of(cls, ranges: dict | None = None, universe: dict | None = None, **values) -> "Filters":
+        # values: column -> list (None/empty = no filter). universe: column -> all
+        # known values; a list covering it is the same request as "any non-null"
+        universe = universe or {}
+        vals = []
+        for col, vs in sorted(values.items()):
+            if not vs:
+                continue
+            vs = tuple(sorted({_canonical(v) for v in vs}))
+            if universe.get(col) and set(vs) >= {_canonical(v) for v in universe[col]}:
+                vs = None
+            vals.append((col, vs))
+        rng = tuple((col, _canonical(lo), _canonical(hi)) for col, (lo, hi) in sorted((ranges or {}).items()))
+        return cls(tuple(vals), rng)
+
+    def where(self) -> tuple[str, tuple]:
+        # -> (predicate with placeholders, parameters in placeholder order)
+        terms, params = [], []
+        for col, vs in self.values:
+            if vs is None:
+                terms.append(f"{col} IS NOT NULL")
+            else:
+                terms.append(f"{col} IN ({', '.join('?' * len(vs))})")
+                params.extend(vs)
+        for col, lo, hi in self.ranges:
+            terms.append(f"{col} BETWEEN ? AND ?")
+            params.extend([lo, hi])
+        return (" AND ".join(terms) or "TRUE"), tuple(params)
+
+
+def build(template: str, filters: Filters | None = None, **fmt) -> Query:
+    # template: SQL with one {where} slot (plus any literal {fmt} slots)
+    where, params = (filters or Filters()).where()
+    if template.count("{where}") != 1:
+        raise ValueError("query templates take exactly one {where} slot")
+    return Query(normalize_sql(template.format(where=where, **fmt)), params)
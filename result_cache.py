@@ -0,0 +1,168 @@
+import hashlib
+import os
+import threading
+import time
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from schemas import to_frame
+
+# -----------------------------
+# Disk-backed result cache (shared by all worker processes on a host)
+# -----------------------------
+# One Parquet file per query result. Writes go to a temp file and are renamed
+# into place, so concurrent readers never see a partial file. File mtime is the
+# write time (used for TTL); atime is bumped on every hit (used for LRU).
+# Writes keep a running byte total instead of listing the directory each time;
+# the full scan (and LRU eviction) runs only once that total passes max_bytes, or
+# every RESCAN_WRITES writes to pick up other processes' writes and removals.
+# Eviction frees down to EVICT_TO of max_bytes, so the writes that follow a full
+# cache don't each trigger another scan.
+
+RESCAN_WRITES = 64
+EVICT_TO = 0.9
+
+
+class ResultCache:
+    def __init__(self, root: str, max_bytes: int, ttl_seconds: int | None = None):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0, "errors": 0, "scans": 0}
+        self._known_bytes: int | None = None  # None until the first scan
+        self._writes_since_scan = 0
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        h = hashlib.sha256()
+        for p in parts:
+            h.update(str(p).encode("utf-8"))
+            h.update(b"\x00")
+        return h.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.parquet")
+
+    def _bump(self, name: str, n: int = 1):
+        with self._lock:
+            self._counters[name] += n
+
+    def get(self, key: str) -> pd.DataFrame | None:
+        path = self._path(key)
+        try:
+            info = os.stat(path)
+            if self.ttl_seconds and time.time() - info.st_mtime > self.ttl_seconds:
+                self._remove(path)
+                self._bump("misses")
+                return None
+            df = to_frame(pq.read_table(path))
+            os.utime(path, (time.time(), info.st_mtime))  # LRU touch, keep write time
+        except FileNotFoundError:
+            self._bump("misses")
+            return None
+        except (OSError, pa.ArrowException):
+            # Corrupt/foreign file: drop it and treat as a miss
+            self._remove(path)
+            self._bump("errors")
+            self._bump("misses")
+            return None
+        self._bump("hits")
+        return df
+
+    def has(self, key: str) -> bool:
+        # Present and unexpired; no read, no LRU touch, not counted as a lookup
+        try:
+            info = os.stat(self._path(key))
+        except FileNotFoundError:
+            return False
+        return not (self.ttl_seconds and time.time() - info.st_mtime > self.ttl_seconds)
+
+    def put(self, key: str, df: pd.DataFrame):
+        path = self._path(key)
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            pq.write_table(table, tmp, compression="zstd")
+            size = os.stat(tmp).st_size
+            try:
+                size -= os.stat(path).st_size  # overwriting an existing entry
+            except FileNotFoundError:
+                pass
+            os.replace(tmp, path)
+        except (OSError, TypeError, ValueError, pa.ArrowException):
+            # Unserializable frame or full disk: caching is best-effort
+            self._remove(tmp)
+            self._bump("errors")
+            return
+        self._bump("writes")
+        with self._lock:
+            if self._known_bytes is not None:
+                self._known_bytes += size
+            self._writes_since_scan += 1
+            scan = (self._known_bytes is None or self._known_bytes > self.max_bytes
+                    or self._writes_since_scan >= RESCAN_WRITES)
+        if scan:
+            self.evict()
+
+    def _entries(self) -> list[tuple[float, int, str]]:
+        out = []
+        for dirpath, _, files in os.walk(self.root):
+            for name in files:
+                if not name.endswith(".parquet"):
+                    continue
+                p = os.path.join(dirpath, name)
+                try:
+                    s = os.stat(p)
+                except FileNotFoundError:
+                    continue  # evicted by another process
+                out.append((s.st_atime, s.st_size, p))
+        return out
+
+    def evict(self):
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_bytes:
+            target = self.max_bytes * EVICT_TO
+            entries.sort()  # least recently used first
+            for _, size, p in entries:
+                if total <= target:
+                    break
+                if self._remove(p):
+                    self._bump("evictions")
+                total -= size
+        with self._lock:
+            self._known_bytes = total
+            self._writes_since_scan = 0
+            self._counters["scans"] += 1
+
+    def _remove(self, path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def clear(self):
+        for _, _, p in self._entries():
+            self._remove(p)
+        with self._lock:
+            self._known_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+        entries = self._entries()
+        lookups = counters["hits"] + counters["misses"]
+        counters.update({
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+            "hit_rate": (counters["hits"] / lookups) if lookups else None,
+        })
+        return counters
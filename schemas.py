@@ -0,0 +1,109 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# -----------------------------
+# Result schemas (typed fetch)
+# -----------------------------
+# Column types for every gold table/view the dashboard reads and for the columns
+# its own queries compute. Results are cast in Arrow before pandas sees them, so
+# DECIMAL arrives as float64 instead of object Decimals, DATE as datetime64, and
+# repeated text (ccn/state/provider_name/...) as pandas categoricals built from
+# Arrow dictionaries with sorted categories. Tabs receive typed frames and need
+# no to_numeric/to_datetime passes. Columns are matched by name, so a name has
+# one type across the registry (checked at import); unregistered DECIMAL columns
+# become float64 and everything else keeps its engine type.
+
+CATEGORY = "category"
+FLOAT64 = "float64"
+FLOAT32 = "float32"
+INT64 = "int64"
+DATETIME = "datetime"
+
+_MONTHLY_MEASURES = {c: FLOAT64 for c in [
+    "hrs_rn", "hrs_lpn", "hrs_cna", "total_hours_direct", "emp_hours", "ctr_hours", "resident_days"]}
+
+SCHEMAS: dict[str, dict[str, str]] = {
+    "gold_facility_dim": {
+        "ccn": CATEGORY, "provider_name": CATEGORY, "state": CATEGORY, "city": CATEGORY,
+        "county": CATEGORY, "ownership_type": CATEGORY, "latitude": FLOAT32, "longitude": FLOAT32,
+    },
+    "gold_facility_monthly": {
+        "month": DATETIME, "state": CATEGORY, "ccn": CATEGORY, **_MONTHLY_MEASURES,
+        "observed_days": FLOAT64, "days_with_residents": FLOAT64,
+        "first_workdate": DATETIME, "last_workdate": DATETIME, "refreshed_ts": DATETIME,
+    },
+    "gold_state_monthly": {
+        "month": DATETIME, "state": CATEGORY, "n_facilities": INT64, **_MONTHLY_MEASURES,
+        "first_workdate": DATETIME, "last_workdate": DATETIME, "refreshed_ts": DATETIME,
+    },
+    "gold_quarterly_provider_fact": {
+        "ccn": CATEGORY, "state": CATEGORY, "certified_beds_reported": FLOAT64,
+        "residents_per_day_reported": FLOAT64, "total_nurse_hprd_reported": FLOAT64,
+        "total_nurse_hprd_adj_reported": FLOAT64,
+    },
+    "gold_dashboard_manifest": {
+        "published_ts": DATETIME, "min_month": DATETIME, "max_month": DATETIME,
+        "n_states": INT64, "n_facilities": INT64,
+    },
+    # Columns computed by dashboard queries (app.py, cube.py, stats.py, paging.py)
+    "queries": {
+        "lat": FLOAT32, "lon": FLOAT32, "start_date": DATETIME, "end_date": DATETIME,
+        "min_m": DATETIME, "max_m": DATETIME,
+        "hprd_weighted": FLOAT64, "rn_hprd": FLOAT64, "lpn_hprd": FLOAT64, "cna_hprd": FLOAT64,
+        "count": INT64, "n": INT64, "mean": FLOAT64, "std": FLOAT64, "min": FLOAT64, "max": FLOAT64,
+        "p10": FLOAT64, "p50": FLOAT64, "p90": FLOAT64,
+    },
+}
+
+
+def _registry() -> dict[str, str]:
+    out = {}
+    for view, cols in SCHEMAS.items():
+        for col, kind in cols.items():
+            if out.setdefault(col, kind) != kind:
+                raise ValueError(f"schemas: {view}.{col} is {kind}, registered elsewhere as {out[col]}")
+    return out
+
+
+COLUMNS = _registry()
+
+_NUMERIC = {FLOAT64: pa.float64(), FLOAT32: pa.float32(), INT64: pa.int64()}
+
+
+def _categorical(col: pa.ChunkedArray) -> pa.ChunkedArray:
+    # Dictionary-encode with sorted values, so category order = value order
+    if pa.types.is_dictionary(col.type):
+        col = col.cast(col.type.value_type)
+    if not (pa.types.is_string(col.type) or pa.types.is_large_string(col.type)):
+        col = col.cast(pa.string())
+    col = col.combine_chunks()
+    values = pc.unique(col).drop_null()
+    values = values.take(pc.array_sort_indices(values))
+    return pa.chunked_array([pa.DictionaryArray.from_arrays(pc.index_in(col, value_set=values), values)])
+
+
+def _cast(col: pa.ChunkedArray, kind: str | None) -> pa.ChunkedArray:
+    t = col.type
+    try:
+        if kind == CATEGORY:
+            return _categorical(col)
+        if kind in _NUMERIC:
+            return col.cast(_NUMERIC[kind], safe=False)
+        if kind == DATETIME and (pa.types.is_string(t) or pa.types.is_large_string(t)):
+            return col.cast(pa.timestamp("us"))
+        if kind is None and pa.types.is_decimal(t):
+            return col.cast(pa.float64(), safe=False)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        pass  # unexpected engine type: leave it as fetched
+    return col
+
+
+def cast_table(table: pa.Table) -> pa.Table:
+    return pa.table([_cast(col, COLUMNS.get(name)) for name, col in zip(table.column_names, table.columns)],
+                    names=table.column_names)
+
+
+def to_frame(table: pa.Table) -> pd.DataFrame:
+    # Typed pandas frame; self_destruct frees Arrow buffers column by column, keeping peak memory ~1x
+    return cast_table(table).to_pandas(self_destruct=True, split_blocks=True, date_as_object=False)
@@ -28,4 +28,5 @@ docker run --rm -p 8501:8501 `
   -e AWS_SESSION_TOKEN `
   -e AWS_PROFILE `
   -v "${awsDir}:/root/.aws:ro" `
+  -v kerok-healthcare-results:/var/cache/kerok-healthcare/results `
   healthcare-dashboard:latest
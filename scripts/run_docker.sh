@@ -18,5 +18,8 @@ docker run --rm -p 8501:8501 \
   -e ATHENA_WORKGROUP \
   -e ATHENA_DATABASE \
   -e ATHENA_CATALOG \
+  -e RESULT_CACHE_MAX_MB \
+  -e RESULT_CACHE_TTL_SECONDS \
   -v "$HOME/.aws:/root/.aws:ro" \
+  -v kerok-healthcare-results:/var/cache/kerok-healthcare/results \
   healthcare-dashboard:latest
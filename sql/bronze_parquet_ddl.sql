@@ -0,0 +1,39 @@
+-- PBJ / ProviderInfo as typed Parquet, written by pipeline/bronze_to_parquet.py.
+-- Same normalization as the CSV-based silver MERGEs, already applied; partitioned
+-- so the MERGEs below prune to one quarter (and optionally state) per file.
+-- After a conversion run: MSCK REPAIR TABLE <table>; to register new partitions.
+
+DROP TABLE IF EXISTS bronze_pbj_daily_parquet;
+CREATE EXTERNAL TABLE bronze_pbj_daily_parquet (
+  ccn string, provider_name string, city string, county string, county_fips int,
+  workdate date, mds_census_resident_count int,
+  hrs_rndon decimal(9,2), hrs_rndon_emp decimal(9,2), hrs_rndon_ctr decimal(9,2),
+  hrs_rnadmin decimal(9,2), hrs_rnadmin_emp decimal(9,2), hrs_rnadmin_ctr decimal(9,2),
+  hrs_rn decimal(9,2), hrs_rn_emp decimal(9,2), hrs_rn_ctr decimal(9,2),
+  hrs_lpnadmin decimal(9,2), hrs_lpnadmin_emp decimal(9,2), hrs_lpnadmin_ctr decimal(9,2),
+  hrs_lpn decimal(9,2), hrs_lpn_emp decimal(9,2), hrs_lpn_ctr decimal(9,2),
+  hrs_cna decimal(9,2), hrs_cna_emp decimal(9,2), hrs_cna_ctr decimal(9,2),
+  source_file string
+)
+PARTITIONED BY (cy_quarter string, state string)
+STORED AS PARQUET
+LOCATION 's3://kerok-healthcare-landing/bronze_parquet/pbj/'
+TBLPROPERTIES ("parquet.compression"="ZSTD");
+
+DROP TABLE IF EXISTS bronze_nh_providerinfo_parquet;
+CREATE EXTERNAL TABLE bronze_nh_providerinfo_parquet (
+  ccn string, provider_name string, provider_address string, city string, county string,
+  ownership_type string, zip_code string, telephone_number string, provider_ssa_county_code string,
+  latitude decimal(9,4), longitude decimal(9,4), facility_location string, geocoding_footnote string,
+  number_of_certified_beds int, average_number_of_residents_per_day double,
+  reported_total_nurse_staffing_hours_per_resident_per_day double,
+  adjusted_total_nurse_staffing_hours_per_resident_per_day double,
+  number_of_fines int, total_amount_of_fines_in_dollars double,
+  number_of_payment_denials int, total_number_of_penalties int,
+  processing_date string,
+  source_file string
+)
+PARTITIONED BY (quarter string, state string)
+STORED AS PARQUET
+LOCATION 's3://kerok-healthcare-landing/bronze_parquet/providerinfo/'
+TBLPROPERTIES ("parquet.compression"="ZSTD");
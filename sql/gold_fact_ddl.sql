@@ -0,0 +1,25 @@
+-- Daily staffing fact (Iceberg), merged per landed PBJ drop by
+-- sql/gold_merge_daily_fact.sql. Hidden partitioning on month(workdate) prunes
+-- any predicate on the raw workdate column (workdate BETWEEN / >= / <) to the
+-- months it covers; the ccn bucket narrows facility lookups within a month.
+-- Readers must compare workdate itself: date_trunc()/CAST around it defeats pruning.
+
+CREATE TABLE IF NOT EXISTS gold_daily_staffing_fact (
+  workdate date,
+  state string,
+  ccn string,
+  hrs_rn decimal(18,2),
+  hrs_lpn decimal(18,2),
+  hrs_cna decimal(18,2),
+  hrs_total_direct decimal(18,2),
+  hrs_rn_emp decimal(18,2),
+  hrs_rn_ctr decimal(18,2),
+  hrs_lpn_emp decimal(18,2),
+  hrs_lpn_ctr decimal(18,2),
+  hrs_cna_emp decimal(18,2),
+  hrs_cna_ctr decimal(18,2),
+  residents int
+)
+PARTITIONED BY (month(workdate), bucket(16, ccn))
+LOCATION 's3://kerok-healthcare-landing/gold/daily_staffing_fact/'
+TBLPROPERTIES ('table_type'='ICEBERG');
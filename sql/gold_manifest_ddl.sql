@@ -0,0 +1,20 @@
+-- Dashboard startup manifest (Iceberg). One row per pipeline execution, appended
+-- by sql/gold_publish_manifest.sql after MarkDone; the app reads the latest row
+-- (states, month bounds, counts) instead of aggregating the gold tables on startup.
+
+CREATE TABLE IF NOT EXISTS gold_dashboard_manifest (
+  published_ts timestamp,
+  ingested_ts timestamp,
+  source_path string,
+  states string,
+  n_states bigint,
+  min_month date,
+  max_month date,
+  n_facilities bigint,
+  facility_dim_rows bigint,
+  facility_monthly_rows bigint,
+  state_monthly_rows bigint,
+  data_refreshed_ts timestamp
+)
+LOCATION 's3://kerok-healthcare-landing/gold/dashboard_manifest/'
+TBLPROPERTIES ('table_type'='ICEBERG');
@@ -11,7 +11,15 @@ USING (
     cast(hrs_cna_emp AS decimal(18,2)) AS hrs_cna_emp, cast(hrs_cna_ctr AS decimal(18,2)) AS hrs_cna_ctr,
     cast(mds_census_resident_count AS integer) AS residents
   FROM silver_pbj_daily
-  -- optionally limit to source file if you add a source_file column
+  -- Only rows written since the last completed PBJ merge (watermark from the ops
+  -- file log), plus this run's own files in case a later run finished first.
+  -- Iceberg min/max stats on ingested_ts skip every older data file.
+  WHERE ingested_ts > (
+          SELECT coalesce(max(ingested_ts), TIMESTAMP '1970-01-01 00:00:00')
+          FROM kerok_healthcare_ops_file_log
+          WHERE dataset = 'pbj' AND status = 'DONE'
+        )
+     OR source_file IN (:source_paths)
 ) s
 ON (t.ccn = s.ccn AND t.workdate = s.workdate)
 WHEN MATCHED THEN UPDATE SET
@@ -0,0 +1,45 @@
+-- Materialized monthly summaries of gold_daily_staffing_fact (Iceberg).
+-- Refreshed per landed PBJ file for the months it touched
+-- (sql/gold_refresh_facility_monthly.sql, sql/gold_refresh_state_monthly.sql);
+-- the dashboard and the monthly views read these instead of the daily fact.
+
+CREATE TABLE IF NOT EXISTS gold_facility_monthly (
+  month date,
+  state string,
+  ccn string,
+  hrs_rn decimal(38,2),
+  hrs_lpn decimal(38,2),
+  hrs_cna decimal(38,2),
+  total_hours_direct decimal(38,2),
+  emp_hours decimal(38,2),
+  ctr_hours decimal(38,2),
+  resident_days bigint,
+  observed_days bigint,
+  days_with_residents bigint,
+  first_workdate date,
+  last_workdate date,
+  refreshed_ts timestamp
+)
+-- One partition per month: the dashboard's window (month BETWEEN ? AND ?, cube.py)
+-- reads only the selected months. Compare `month` itself, without CAST/date_trunc.
+PARTITIONED BY (month)
+LOCATION 's3://kerok-healthcare-landing/gold/facility_monthly/'
+TBLPROPERTIES ('table_type'='ICEBERG');
+
+CREATE TABLE IF NOT EXISTS gold_state_monthly (
+  month date,
+  state string,
+  n_facilities bigint,
+  hrs_rn decimal(38,2),
+  hrs_lpn decimal(38,2),
+  hrs_cna decimal(38,2),
+  total_hours_direct decimal(38,2),
+  emp_hours decimal(38,2),
+  ctr_hours decimal(38,2),
+  resident_days bigint,
+  first_workdate date,
+  last_workdate date,
+  refreshed_ts timestamp
+)
+LOCATION 's3://kerok-healthcare-landing/gold/state_monthly/'
+TBLPROPERTIES ('table_type'='ICEBERG');
@@ -0,0 +1,32 @@
+-- Publish the dashboard manifest for this execution (runs after MarkDone, both
+-- datasets). Reads only the monthly summaries and the facility dim. states is
+-- a comma-separated, sorted list of state codes; source_path lists the files
+-- the execution merged, comma-separated.
+INSERT INTO gold_dashboard_manifest
+SELECT
+  current_timestamp AS published_ts,
+  from_iso8601_timestamp(:ingested_ts) AS ingested_ts,
+  array_join(ARRAY[:source_paths], ',') AS source_path,
+  s.states, s.n_states, s.min_month, s.max_month,
+  f.n_facilities,
+  d.facility_dim_rows,
+  f.facility_monthly_rows,
+  s.state_monthly_rows,
+  s.data_refreshed_ts
+FROM (
+  SELECT
+    array_join(array_sort(array_agg(DISTINCT state) FILTER (WHERE state IS NOT NULL)), ',') AS states,
+    COUNT(DISTINCT state) AS n_states,
+    MIN(month) AS min_month,
+    MAX(month) AS max_month,
+    COUNT(*) AS state_monthly_rows,
+    MAX(refreshed_ts) AS data_refreshed_ts
+  FROM gold_state_monthly
+) s
+CROSS JOIN (
+  SELECT COUNT(DISTINCT ccn) AS n_facilities, COUNT(*) AS facility_monthly_rows
+  FROM gold_facility_monthly
+) f
+CROSS JOIN (
+  SELECT COUNT(*) AS facility_dim_rows FROM gold_facility_dim
+) d;
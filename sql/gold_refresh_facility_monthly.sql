@@ -0,0 +1,52 @@
+-- Recompute facility-months touched by this run (same silver predicate as
+-- sql/gold_merge_daily_fact.sql, so it must run before MarkDone moves the
+-- watermark). Whole months are re-aggregated from the daily fact, so late or
+-- corrected days for a month replace that month's totals.
+MERGE INTO gold_facility_monthly t
+USING (
+  WITH touched AS (
+    SELECT DISTINCT CAST(date_trunc('month', workdate) AS DATE) AS month
+    FROM silver_pbj_daily
+    WHERE ingested_ts > (
+            SELECT coalesce(max(ingested_ts), TIMESTAMP '1970-01-01 00:00:00')
+            FROM kerok_healthcare_ops_file_log
+            WHERE dataset = 'pbj' AND status = 'DONE'
+          )
+       OR source_file IN (:source_paths)
+  )
+  SELECT
+    CAST(date_trunc('month', f.workdate) AS DATE) AS month,
+    f.state, f.ccn,
+    SUM(COALESCE(f.hrs_rn,0))  AS hrs_rn,
+    SUM(COALESCE(f.hrs_lpn,0)) AS hrs_lpn,
+    SUM(COALESCE(f.hrs_cna,0)) AS hrs_cna,
+    SUM(COALESCE(f.hrs_rn,0)+COALESCE(f.hrs_lpn,0)+COALESCE(f.hrs_cna,0)) AS total_hours_direct,
+    SUM(COALESCE(f.hrs_rn_emp,0)+COALESCE(f.hrs_lpn_emp,0)+COALESCE(f.hrs_cna_emp,0)) AS emp_hours,
+    SUM(COALESCE(f.hrs_rn_ctr,0)+COALESCE(f.hrs_lpn_ctr,0)+COALESCE(f.hrs_cna_ctr,0)) AS ctr_hours,
+    SUM(COALESCE(f.residents,0)) AS resident_days,
+    COUNT(DISTINCT f.workdate) AS observed_days,
+    COUNT(DISTINCT CASE WHEN COALESCE(f.residents,0) > 0 THEN f.workdate END) AS days_with_residents,
+    MIN(f.workdate) AS first_workdate,
+    MAX(f.workdate) AS last_workdate,
+    from_iso8601_timestamp(:ingested_ts) AS refreshed_ts
+  FROM gold_daily_staffing_fact f
+  WHERE f.workdate >= (SELECT MIN(month) FROM touched)
+    AND f.workdate < date_add('month', 1, (SELECT MAX(month) FROM touched))
+    AND CAST(date_trunc('month', f.workdate) AS DATE) IN (SELECT month FROM touched)
+  GROUP BY 1, 2, 3
+) s
+ON (t.ccn = s.ccn AND t.month = s.month)
+WHEN MATCHED THEN UPDATE SET
+  state = s.state,
+  hrs_rn = s.hrs_rn, hrs_lpn = s.hrs_lpn, hrs_cna = s.hrs_cna,
+  total_hours_direct = s.total_hours_direct,
+  emp_hours = s.emp_hours, ctr_hours = s.ctr_hours,
+  resident_days = s.resident_days, observed_days = s.observed_days,
+  days_with_residents = s.days_with_residents,
+  first_workdate = s.first_workdate, last_workdate = s.last_workdate,
+  refreshed_ts = s.refreshed_ts
+WHEN NOT MATCHED THEN INSERT VALUES (
+  s.month, s.state, s.ccn, s.hrs_rn, s.hrs_lpn, s.hrs_cna, s.total_hours_direct,
+  s.emp_hours, s.ctr_hours, s.resident_days, s.observed_days, s.days_with_residents,
+  s.first_workdate, s.last_workdate, s.refreshed_ts
+);
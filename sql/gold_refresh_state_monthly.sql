@@ -0,0 +1,34 @@
+-- Roll the facility-months refreshed by this run up to state-months. Reads only
+-- gold_facility_monthly (a few thousand rows per month), never the daily fact.
+MERGE INTO gold_state_monthly t
+USING (
+  SELECT
+    month, state,
+    COUNT(DISTINCT ccn) AS n_facilities,
+    SUM(hrs_rn) AS hrs_rn, SUM(hrs_lpn) AS hrs_lpn, SUM(hrs_cna) AS hrs_cna,
+    SUM(total_hours_direct) AS total_hours_direct,
+    SUM(emp_hours) AS emp_hours, SUM(ctr_hours) AS ctr_hours,
+    SUM(resident_days) AS resident_days,
+    MIN(first_workdate) AS first_workdate,
+    MAX(last_workdate) AS last_workdate,
+    from_iso8601_timestamp(:ingested_ts) AS refreshed_ts
+  FROM gold_facility_monthly
+  WHERE month IN (
+    SELECT DISTINCT month FROM gold_facility_monthly
+    WHERE refreshed_ts = from_iso8601_timestamp(:ingested_ts)
+  )
+  GROUP BY 1, 2
+) s
+ON (t.state = s.state AND t.month = s.month)
+WHEN MATCHED THEN UPDATE SET
+  n_facilities = s.n_facilities,
+  hrs_rn = s.hrs_rn, hrs_lpn = s.hrs_lpn, hrs_cna = s.hrs_cna,
+  total_hours_direct = s.total_hours_direct,
+  emp_hours = s.emp_hours, ctr_hours = s.ctr_hours,
+  resident_days = s.resident_days,
+  first_workdate = s.first_workdate, last_workdate = s.last_workdate,
+  refreshed_ts = s.refreshed_ts
+WHEN NOT MATCHED THEN INSERT VALUES (
+  s.month, s.state, s.n_facilities, s.hrs_rn, s.hrs_lpn, s.hrs_cna, s.total_hours_direct,
+  s.emp_hours, s.ctr_hours, s.resident_days, s.first_workdate, s.last_workdate, s.refreshed_ts
+);
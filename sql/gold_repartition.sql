@@ -0,0 +1,50 @@
+-- Existing deployments: move the gold fact and facility-month tables onto the
+-- month partition specs of sql/gold_fact_ddl.sql and sql/gold_monthly_ddl.sql.
+-- Athena cannot change an Iceberg table's partition spec in place, so each table
+-- is copied into a new one and swapped by rename. Run between pipeline executions
+-- (nothing may MERGE into the old table during the copy).
+
+-- 1) gold_daily_staffing_fact: state -> month(workdate), bucket(16, ccn)
+CREATE TABLE gold_daily_staffing_fact_by_month (
+  workdate date, state string, ccn string,
+  hrs_rn decimal(18,2), hrs_lpn decimal(18,2), hrs_cna decimal(18,2), hrs_total_direct decimal(18,2),
+  hrs_rn_emp decimal(18,2), hrs_rn_ctr decimal(18,2),
+  hrs_lpn_emp decimal(18,2), hrs_lpn_ctr decimal(18,2),
+  hrs_cna_emp decimal(18,2), hrs_cna_ctr decimal(18,2),
+  residents int
+)
+PARTITIONED BY (month(workdate), bucket(16, ccn))
+LOCATION 's3://kerok-healthcare-landing/gold/daily_staffing_fact_by_month/'
+TBLPROPERTIES ('table_type'='ICEBERG');
+
+INSERT INTO gold_daily_staffing_fact_by_month
+SELECT workdate, state, ccn, hrs_rn, hrs_lpn, hrs_cna, hrs_total_direct,
+       hrs_rn_emp, hrs_rn_ctr, hrs_lpn_emp, hrs_lpn_ctr, hrs_cna_emp, hrs_cna_ctr, residents
+FROM gold_daily_staffing_fact;
+
+ALTER TABLE gold_daily_staffing_fact RENAME TO gold_daily_staffing_fact_by_state;
+ALTER TABLE gold_daily_staffing_fact_by_month RENAME TO gold_daily_staffing_fact;
+
+-- 2) gold_facility_monthly: year(month) -> month
+CREATE TABLE gold_facility_monthly_by_month (
+  month date, state string, ccn string,
+  hrs_rn decimal(38,2), hrs_lpn decimal(38,2), hrs_cna decimal(38,2), total_hours_direct decimal(38,2),
+  emp_hours decimal(38,2), ctr_hours decimal(38,2),
+  resident_days bigint, observed_days bigint, days_with_residents bigint,
+  first_workdate date, last_workdate date, refreshed_ts timestamp
+)
+PARTITIONED BY (month)
+LOCATION 's3://kerok-healthcare-landing/gold/facility_monthly_by_month/'
+TBLPROPERTIES ('table_type'='ICEBERG');
+
+INSERT INTO gold_facility_monthly_by_month
+SELECT month, state, ccn, hrs_rn, hrs_lpn, hrs_cna, total_hours_direct, emp_hours, ctr_hours,
+       resident_days, observed_days, days_with_residents, first_workdate, last_workdate, refreshed_ts
+FROM gold_facility_monthly;
+
+ALTER TABLE gold_facility_monthly RENAME TO gold_facility_monthly_by_year;
+ALTER TABLE gold_facility_monthly_by_month RENAME TO gold_facility_monthly;
+
+-- After checking row counts match, drop the old copies (this deletes their data):
+-- DROP TABLE gold_daily_staffing_fact_by_state;
+-- DROP TABLE gold_facility_monthly_by_year;
@@ -0,0 +1,33 @@
+-- Local (DuckDB) dashboard manifest (sql/gold_manifest_ddl.sql): one row
+-- describing the extracts just loaded, same columns as the Athena table.
+-- published_ts is the extracts' newest file time (set by backends.DuckDBBackend),
+-- so every process serving the same extracts reports the same data version.
+
+CREATE OR REPLACE TABLE gold_dashboard_manifest AS
+SELECT
+  getvariable('gold_extracts_ts') AS published_ts,
+  CAST(NULL AS TIMESTAMP) AS ingested_ts,
+  CAST(NULL AS VARCHAR) AS source_path,
+  s.states, s.n_states, s.min_month, s.max_month,
+  f.n_facilities,
+  d.facility_dim_rows,
+  f.facility_monthly_rows,
+  s.state_monthly_rows,
+  s.data_refreshed_ts
+FROM (
+  SELECT
+    array_join(array_sort(array_agg(DISTINCT state) FILTER (WHERE state IS NOT NULL)), ',') AS states,
+    COUNT(DISTINCT state) AS n_states,
+    MIN(month) AS min_month,
+    MAX(month) AS max_month,
+    COUNT(*) AS state_monthly_rows,
+    MAX(refreshed_ts) AS data_refreshed_ts
+  FROM gold_state_monthly
+) s
+CROSS JOIN (
+  SELECT COUNT(DISTINCT ccn) AS n_facilities, COUNT(*) AS facility_monthly_rows
+  FROM gold_facility_monthly
+) f
+CROSS JOIN (
+  SELECT COUNT(*) AS facility_dim_rows FROM gold_facility_dim
+) d;
@@ -0,0 +1,37 @@
+-- Local (DuckDB) build of the monthly summary tables (sql/gold_monthly_ddl.sql).
+-- Full rebuild from the loaded daily fact; Athena refreshes them incrementally.
+
+CREATE OR REPLACE TABLE gold_facility_monthly AS
+SELECT
+  CAST(date_trunc('month', workdate) AS DATE) AS month,
+  state, ccn,
+  SUM(COALESCE(hrs_rn,0))  AS hrs_rn,
+  SUM(COALESCE(hrs_lpn,0)) AS hrs_lpn,
+  SUM(COALESCE(hrs_cna,0)) AS hrs_cna,
+  SUM(COALESCE(hrs_rn,0)+COALESCE(hrs_lpn,0)+COALESCE(hrs_cna,0)) AS total_hours_direct,
+  SUM(COALESCE(hrs_rn_emp,0)+COALESCE(hrs_lpn_emp,0)+COALESCE(hrs_cna_emp,0)) AS emp_hours,
+  SUM(COALESCE(hrs_rn_ctr,0)+COALESCE(hrs_lpn_ctr,0)+COALESCE(hrs_cna_ctr,0)) AS ctr_hours,
+  SUM(COALESCE(residents,0)) AS resident_days,
+  COUNT(DISTINCT workdate) AS observed_days,
+  COUNT(DISTINCT CASE WHEN COALESCE(residents,0) > 0 THEN workdate END) AS days_with_residents,
+  MIN(workdate) AS first_workdate,
+  MAX(workdate) AS last_workdate,
+  current_timestamp AS refreshed_ts
+FROM gold_daily_staffing_fact
+GROUP BY 1, 2, 3
+ORDER BY 1, 2, 3;
+
+CREATE OR REPLACE TABLE gold_state_monthly AS
+SELECT
+  month, state,
+  COUNT(DISTINCT ccn) AS n_facilities,
+  SUM(hrs_rn) AS hrs_rn, SUM(hrs_lpn) AS hrs_lpn, SUM(hrs_cna) AS hrs_cna,
+  SUM(total_hours_direct) AS total_hours_direct,
+  SUM(emp_hours) AS emp_hours, SUM(ctr_hours) AS ctr_hours,
+  SUM(resident_days) AS resident_days,
+  MIN(first_workdate) AS first_workdate,
+  MAX(last_workdate) AS last_workdate,
+  current_timestamp AS refreshed_ts
+FROM gold_facility_monthly
+GROUP BY 1, 2
+ORDER BY 1, 2;
@@ -0,0 +1,89 @@
+-- Local (DuckDB) silver/gold/ops tables for running the pipeline SQL end to end
+-- (pipeline/local.py). Column order matches the positional INSERT VALUES of the
+-- MERGE files; types follow docs/data_dictionary.md. Athena creates these as
+-- Iceberg tables.
+
+CREATE TABLE IF NOT EXISTS kerok_healthcare_ops_file_log (
+  dataset VARCHAR,
+  s3_path VARCHAR,
+  first_seen_ts TIMESTAMP,
+  status VARCHAR,
+  processed_ts TIMESTAMP,
+  ingested_ts TIMESTAMP,
+  validated_ts TIMESTAMP,
+  row_count BIGINT,
+  validation VARCHAR
+);
+
+CREATE TABLE IF NOT EXISTS silver_pbj_daily (
+  ccn VARCHAR, provider_name VARCHAR, city VARCHAR, county VARCHAR, county_fips INTEGER,
+  state VARCHAR, cy_quarter VARCHAR, workdate DATE, mds_census_resident_count INTEGER,
+  hrs_rndon DECIMAL(9,2), hrs_rndon_emp DECIMAL(9,2), hrs_rndon_ctr DECIMAL(9,2),
+  hrs_rnadmin DECIMAL(9,2), hrs_rnadmin_emp DECIMAL(9,2), hrs_rnadmin_ctr DECIMAL(9,2),
+  hrs_rn DECIMAL(9,2), hrs_rn_emp DECIMAL(9,2), hrs_rn_ctr DECIMAL(9,2),
+  hrs_lpnadmin DECIMAL(9,2), hrs_lpnadmin_emp DECIMAL(9,2), hrs_lpnadmin_ctr DECIMAL(9,2),
+  hrs_lpn DECIMAL(9,2), hrs_lpn_emp DECIMAL(9,2), hrs_lpn_ctr DECIMAL(9,2),
+  hrs_cna DECIMAL(9,2), hrs_cna_emp DECIMAL(9,2), hrs_cna_ctr DECIMAL(9,2),
+  source_file VARCHAR, ingested_ts TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS silver_providerinfo (
+  ccn VARCHAR, provider_name VARCHAR, provider_address VARCHAR, city VARCHAR, state VARCHAR,
+  zip_code VARCHAR, telephone_number VARCHAR, ownership_type VARCHAR, county VARCHAR,
+  provider_ssa_county_code VARCHAR,
+  number_of_certified_beds INTEGER, average_number_of_residents_per_day DOUBLE,
+  reported_total_nurse_staffing_hours_per_resident_per_day DOUBLE,
+  adjusted_total_nurse_staffing_hours_per_resident_per_day DOUBLE,
+  number_of_fines INTEGER, total_amount_of_fines_in_dollars DOUBLE,
+  number_of_payment_denials INTEGER, total_number_of_penalties INTEGER,
+  overall_rating DOUBLE, staffing_rating DOUBLE,
+  facility_location VARCHAR, latitude DECIMAL(9,4), longitude DECIMAL(9,4),
+  geocoding_footnote VARCHAR, processing_date VARCHAR
+);
+
+CREATE TABLE IF NOT EXISTS gold_daily_staffing_fact (
+  workdate DATE, state VARCHAR, ccn VARCHAR,
+  hrs_rn DECIMAL(18,2), hrs_lpn DECIMAL(18,2), hrs_cna DECIMAL(18,2), hrs_total_direct DECIMAL(18,2),
+  hrs_rn_emp DECIMAL(18,2), hrs_rn_ctr DECIMAL(18,2),
+  hrs_lpn_emp DECIMAL(18,2), hrs_lpn_ctr DECIMAL(18,2),
+  hrs_cna_emp DECIMAL(18,2), hrs_cna_ctr DECIMAL(18,2),
+  residents INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS gold_facility_dim (
+  ccn VARCHAR, provider_name VARCHAR, state VARCHAR, city VARCHAR, county VARCHAR,
+  ownership_type VARCHAR, latitude DECIMAL(9,4), longitude DECIMAL(9,4)
+);
+
+CREATE TABLE IF NOT EXISTS gold_quarterly_provider_fact (
+  ccn VARCHAR, state VARCHAR,
+  reporting_period_start DATE, reporting_period_end DATE, reporting_period_quarter VARCHAR,
+  residents_per_day_reported DECIMAL(10,2),
+  total_nurse_hprd_adj_reported DECIMAL(10,4), total_nurse_hprd_reported DECIMAL(10,4),
+  certified_beds_reported INTEGER,
+  fines_count_reported INTEGER, fines_usd_reported DECIMAL(18,2),
+  payment_denials_reported INTEGER, penalties_reported INTEGER,
+  snapshot_received_ts TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS gold_facility_monthly (
+  month DATE, state VARCHAR, ccn VARCHAR,
+  hrs_rn DECIMAL(38,2), hrs_lpn DECIMAL(38,2), hrs_cna DECIMAL(38,2),
+  total_hours_direct DECIMAL(38,2), emp_hours DECIMAL(38,2), ctr_hours DECIMAL(38,2),
+  resident_days BIGINT, observed_days BIGINT, days_with_residents BIGINT,
+  first_workdate DATE, last_workdate DATE, refreshed_ts TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS gold_state_monthly (
+  month DATE, state VARCHAR, n_facilities BIGINT,
+  hrs_rn DECIMAL(38,2), hrs_lpn DECIMAL(38,2), hrs_cna DECIMAL(38,2),
+  total_hours_direct DECIMAL(38,2), emp_hours DECIMAL(38,2), ctr_hours DECIMAL(38,2),
+  resident_days BIGINT, first_workdate DATE, last_workdate DATE, refreshed_ts TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS gold_dashboard_manifest (
+  published_ts TIMESTAMP, ingested_ts TIMESTAMP, source_path VARCHAR,
+  states VARCHAR, n_states BIGINT, min_month DATE, max_month DATE,
+  n_facilities BIGINT, facility_dim_rows BIGINT, facility_monthly_rows BIGINT,
+  state_monthly_rows BIGINT, data_refreshed_ts TIMESTAMP
+);
@@ -0,0 +1,58 @@
+-- Local (DuckDB) equivalents of the Athena gold views the dashboard queries.
+-- Month columns are DATEs, matching Athena's date_trunc on a DATE column.
+
+-- Facility HPRD (overall, resident-weighted)
+CREATE OR REPLACE VIEW gold_vw_hprd_by_facility AS
+SELECT
+  f.ccn, d.provider_name, f.state,
+  COUNT(DISTINCT CASE WHEN COALESCE(f.residents,0) > 0 THEN f.workdate END) AS days_with_residents,
+  MIN(f.workdate) AS start_date,
+  MAX(f.workdate) AS end_date,
+  CAST(SUM(COALESCE(f.hrs_rn,0)+COALESCE(f.hrs_lpn,0)+COALESCE(f.hrs_cna,0)) AS DECIMAL(18,6)) /
+    NULLIF(CAST(SUM(COALESCE(f.residents,0)) AS DECIMAL(18,6)),0) AS hprd_weighted,
+  CAST(SUM(COALESCE(f.hrs_rn,0)) AS DECIMAL(18,6))  / NULLIF(CAST(SUM(COALESCE(f.residents,0)) AS DECIMAL(18,6)),0) AS rn_hprd,
+  CAST(SUM(COALESCE(f.hrs_lpn,0)) AS DECIMAL(18,6)) / NULLIF(CAST(SUM(COALESCE(f.residents,0)) AS DECIMAL(18,6)),0) AS lpn_hprd,
+  CAST(SUM(COALESCE(f.hrs_cna,0)) AS DECIMAL(18,6)) / NULLIF(CAST(SUM(COALESCE(f.residents,0)) AS DECIMAL(18,6)),0) AS cna_hprd
+FROM gold_daily_staffing_fact f
+LEFT JOIN gold_facility_dim d ON d.ccn = f.ccn
+GROUP BY f.ccn, d.provider_name, f.state;
+
+-- State HPRD (overall, resident-weighted)
+CREATE OR REPLACE VIEW gold_vw_hprd_by_state AS
+SELECT
+  state,
+  MIN(workdate) AS start_date,
+  MAX(workdate) AS end_date,
+  CAST(SUM(COALESCE(hrs_rn,0)+COALESCE(hrs_lpn,0)+COALESCE(hrs_cna,0)) AS DECIMAL(18,6)) /
+    NULLIF(CAST(SUM(COALESCE(residents,0)) AS DECIMAL(18,6)),0) AS hprd_weighted
+FROM gold_daily_staffing_fact
+GROUP BY state;
+
+-- Total direct-care hours by facility/month
+CREATE OR REPLACE VIEW gold_vw_total_nurse_hours_facility_monthly AS
+SELECT
+  CAST(date_trunc('month', f.workdate) AS DATE) AS month,
+  f.state, f.ccn, d.provider_name,
+  SUM(COALESCE(f.hrs_rn,0)+COALESCE(f.hrs_lpn,0)+COALESCE(f.hrs_cna,0)) AS total_hours_direct
+FROM gold_daily_staffing_fact f
+LEFT JOIN gold_facility_dim d ON d.ccn = f.ccn
+GROUP BY 1, 2, 3, 4;
+
+-- Total direct-care hours by state/month
+CREATE OR REPLACE VIEW gold_vw_total_nurse_hours_state_monthly AS
+SELECT
+  CAST(date_trunc('month', workdate) AS DATE) AS month,
+  state,
+  SUM(COALESCE(hrs_rn,0)+COALESCE(hrs_lpn,0)+COALESCE(hrs_cna,0)) AS total_hours_direct
+FROM gold_daily_staffing_fact
+GROUP BY 1, 2;
+
+-- Employee vs contract hours by facility/month
+CREATE OR REPLACE VIEW gold_vw_perm_vs_contract_facility_monthly AS
+SELECT
+  CAST(date_trunc('month', workdate) AS DATE) AS month,
+  state, ccn,
+  SUM(COALESCE(hrs_rn_emp,0)+COALESCE(hrs_lpn_emp,0)+COALESCE(hrs_cna_emp,0)) AS emp_hours,
+  SUM(COALESCE(hrs_rn_ctr,0)+COALESCE(hrs_lpn_ctr,0)+COALESCE(hrs_cna_ctr,0)) AS ctr_hours
+FROM gold_daily_staffing_fact
+GROUP BY 1, 2, 3;
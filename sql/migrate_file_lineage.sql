@@ -0,0 +1,13 @@
+-- One-off migration: file lineage + ingestion watermark (see sql/ops_lineage_ddl.sql).
+-- Athena has no ADD COLUMNS IF NOT EXISTS, so run each section once, and only on a
+-- table that lacks its columns; a second run fails with "column already exists".
+
+-- 1) Ops file log created before the lineage columns (an ops log created by
+--    sql/ops_lineage_ddl.sql already has ingested_ts: skip this statement)
+ALTER TABLE kerok_healthcare_ops_file_log ADD COLUMNS (ingested_ts timestamp);
+
+-- 2) silver_pbj_daily without lineage columns (Iceberg schema evolution, no rewrite)
+ALTER TABLE silver_pbj_daily ADD COLUMNS (source_file string, ingested_ts timestamp);
+
+-- Rows merged before lineage existed are treated as already in gold (re-runnable)
+UPDATE silver_pbj_daily SET ingested_ts = TIMESTAMP '1970-01-01 00:00:00' WHERE ingested_ts IS NULL;
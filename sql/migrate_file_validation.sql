@@ -0,0 +1,6 @@
+-- One-off migration: bronze validation verdict (pipeline/validate.py) on an ops file
+-- log created before these columns. An ops log created by sql/ops_lineage_ddl.sql
+-- already has them: skip this file. Run once; a second run fails with
+-- "column already exists" (Athena has no ADD COLUMNS IF NOT EXISTS).
+
+ALTER TABLE kerok_healthcare_ops_file_log ADD COLUMNS (validated_ts timestamp, row_count bigint, validation string);
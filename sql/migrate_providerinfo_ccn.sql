@@ -0,0 +1,18 @@
+-- One-off migration: ProviderInfo tables loaded before the CCN fix (rightmost 6
+-- digits instead of 5) and the INSERT fill-in of the staffing/fines/penalty
+-- columns. Old keys can't be re-keyed in place: a 6-digit CCN whose leading digit
+-- was dropped ('155123' stored as '055123') may collide with a real '055123', and
+-- new CCNs inserted before the fill-in are missing those columns. Empty the
+-- ProviderInfo-derived tables here, then rerun every landed ProviderInfo file:
+--
+--   python -m pipeline.runner run s3://kerok-healthcare-landing/bronze/providerinfo/ --engine athena
+--
+-- The rerun rebuilds silver_providerinfo, gold_quarterly_provider_fact and
+-- gold_facility_dim from bronze and publishes a new manifest, so the dashboard
+-- caches move to the rebuilt data. Deployments created after the fix skip this file.
+
+DELETE FROM silver_providerinfo;
+
+DELETE FROM gold_quarterly_provider_fact;
+
+DELETE FROM gold_facility_dim;
@@ -0,0 +1,24 @@
+-- File lineage + ingestion watermark for incremental gold merges.
+-- Every silver_pbj_daily row remembers which landed file last wrote it and when;
+-- the ops file log records, per file, the ingest timestamp its gold merge covered.
+--
+-- Fresh deployments: run this file. It creates the ops file log with every column
+-- and is safe to re-run. Tables that already exist are not altered here; run the
+-- one-off migrations for them instead, each exactly once:
+--   sql/migrate_file_lineage.sql     ingested_ts on the ops log; source_file and
+--                                    ingested_ts on silver_pbj_daily
+--   sql/migrate_file_validation.sql  validated_ts, row_count, validation on the ops log
+
+CREATE TABLE IF NOT EXISTS kerok_healthcare_ops_file_log (
+  dataset string,
+  s3_path string,
+  first_seen_ts timestamp,
+  status string,
+  processed_ts timestamp,
+  ingested_ts timestamp,
+  validated_ts timestamp,
+  row_count bigint,
+  validation string
+)
+LOCATION 's3://kerok-healthcare-landing/ops/file_log/'
+TBLPROPERTIES ('table_type'='ICEBERG');
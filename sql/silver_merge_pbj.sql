@@ -1,35 +1,46 @@
 MERGE INTO silver_pbj_daily t
 USING (
-  SELECT
-    lpad(trim(PROVNUM),6,'0') AS ccn,
-    trim(PROVNAME) AS provider_name,
-    trim(CITY) AS city,
-    trim(COUNTY_NAME) AS county,
-    try_cast(COUNTY_FIPS AS integer) AS county_fips,
-    upper(trim(STATE)) AS state,
-    trim(CY_Qtr) AS cy_quarter,
-    try_cast(WorkDate AS date) AS workdate,
-    try_cast(MDScensus AS integer) AS mds_census_resident_count,
-    try_cast(Hrs_RNDON AS decimal(9,2)) AS hrs_rndon,
-    try_cast(Hrs_RNDON_emp AS decimal(9,2)) AS hrs_rndon_emp,
-    try_cast(Hrs_RNDON_ctr AS decimal(9,2)) AS hrs_rndon_ctr,
-    try_cast(Hrs_RNadmin AS decimal(9,2)) AS hrs_rnadmin,
-    try_cast(Hrs_RNadmin_emp AS decimal(9,2)) AS hrs_rnadmin_emp,
-    try_cast(Hrs_RNadmin_ctr AS decimal(9,2)) AS hrs_rnadmin_ctr,
-    try_cast(Hrs_RN AS decimal(9,2)) AS hrs_rn,
-    try_cast(Hrs_RN_emp AS decimal(9,2)) AS hrs_rn_emp,
-    try_cast(Hrs_RN_ctr AS decimal(9,2)) AS hrs_rn_ctr,
-    try_cast(Hrs_LPNadmin AS decimal(9,2)) AS hrs_lpnadmin,
-    try_cast(Hrs_LPNadmin_emp AS decimal(9,2)) AS hrs_lpnadmin_emp,
-    try_cast(Hrs_LPNadmin_ctr AS decimal(9,2)) AS hrs_lpnadmin_ctr,
-    try_cast(Hrs_LPN AS decimal(9,2)) AS hrs_lpn,
-    try_cast(Hrs_LPN_emp AS decimal(9,2)) AS hrs_lpn_emp,
-    try_cast(Hrs_LPN_ctr AS decimal(9,2)) AS hrs_lpn_ctr,
-    try_cast(Hrs_CNA AS decimal(9,2)) AS hrs_cna,
-    try_cast(Hrs_CNA_emp AS decimal(9,2)) AS hrs_cna_emp,
-    try_cast(Hrs_CNA_ctr AS decimal(9,2)) AS hrs_cna_ctr
-  FROM bronze_pbj_daily_nurse_staffing_q2_2024_csv
-  WHERE "$path" = :source_path
+  -- One row per (ccn, workdate) across the batch's files (:source_paths, in
+  -- landing order): a later file replaces an earlier one, like merging them in turn
+  SELECT * FROM (
+    SELECT
+      lpad(trim(PROVNUM),6,'0') AS ccn,
+      trim(PROVNAME) AS provider_name,
+      trim(CITY) AS city,
+      trim(COUNTY_NAME) AS county,
+      try_cast(COUNTY_FIPS AS integer) AS county_fips,
+      upper(trim(STATE)) AS state,
+      trim(CY_Qtr) AS cy_quarter,
+      try_cast(WorkDate AS date) AS workdate,
+      try_cast(MDScensus AS integer) AS mds_census_resident_count,
+      try_cast(Hrs_RNDON AS decimal(9,2)) AS hrs_rndon,
+      try_cast(Hrs_RNDON_emp AS decimal(9,2)) AS hrs_rndon_emp,
+      try_cast(Hrs_RNDON_ctr AS decimal(9,2)) AS hrs_rndon_ctr,
+      try_cast(Hrs_RNadmin AS decimal(9,2)) AS hrs_rnadmin,
+      try_cast(Hrs_RNadmin_emp AS decimal(9,2)) AS hrs_rnadmin_emp,
+      try_cast(Hrs_RNadmin_ctr AS decimal(9,2)) AS hrs_rnadmin_ctr,
+      try_cast(Hrs_RN AS decimal(9,2)) AS hrs_rn,
+      try_cast(Hrs_RN_emp AS decimal(9,2)) AS hrs_rn_emp,
+      try_cast(Hrs_RN_ctr AS decimal(9,2)) AS hrs_rn_ctr,
+      try_cast(Hrs_LPNadmin AS decimal(9,2)) AS hrs_lpnadmin,
+      try_cast(Hrs_LPNadmin_emp AS decimal(9,2)) AS hrs_lpnadmin_emp,
+      try_cast(Hrs_LPNadmin_ctr AS decimal(9,2)) AS hrs_lpnadmin_ctr,
+      try_cast(Hrs_LPN AS decimal(9,2)) AS hrs_lpn,
+      try_cast(Hrs_LPN_emp AS decimal(9,2)) AS hrs_lpn_emp,
+      try_cast(Hrs_LPN_ctr AS decimal(9,2)) AS hrs_lpn_ctr,
+      try_cast(Hrs_CNA AS decimal(9,2)) AS hrs_cna,
+      try_cast(Hrs_CNA_emp AS decimal(9,2)) AS hrs_cna_emp,
+      try_cast(Hrs_CNA_ctr AS decimal(9,2)) AS hrs_cna_ctr,
+      "$path" AS source_file,
+      from_iso8601_timestamp(:ingested_ts) AS ingested_ts,
+      row_number() OVER (
+        PARTITION BY lpad(trim(PROVNUM),6,'0'), try_cast(WorkDate AS date)
+        ORDER BY array_position(ARRAY[:source_paths], "$path") DESC
+      ) AS file_rank
+    FROM bronze_pbj_daily_nurse_staffing_q2_2024_csv
+    WHERE "$path" IN (:source_paths)
+  ) b
+  WHERE file_rank = 1
 ) s
 ON (t.ccn = s.ccn AND t.workdate = s.workdate)
 WHEN MATCHED THEN UPDATE SET
@@ -40,11 +51,13 @@ WHEN MATCHED THEN UPDATE SET
   hrs_rn = s.hrs_rn, hrs_rn_emp = s.hrs_rn_emp, hrs_rn_ctr = s.hrs_rn_ctr,
   hrs_lpnadmin = s.hrs_lpnadmin, hrs_lpnadmin_emp = s.hrs_lpnadmin_emp, hrs_lpnadmin_ctr = s.hrs_lpnadmin_ctr,
   hrs_lpn = s.hrs_lpn, hrs_lpn_emp = s.hrs_lpn_emp, hrs_lpn_ctr = s.hrs_lpn_ctr,
-  hrs_cna = s.hrs_cna, hrs_cna_emp = s.hrs_cna_emp, hrs_cna_ctr = s.hrs_cna_ctr
+  hrs_cna = s.hrs_cna, hrs_cna_emp = s.hrs_cna_emp, hrs_cna_ctr = s.hrs_cna_ctr,
+  source_file = s.source_file, ingested_ts = s.ingested_ts
 WHEN NOT MATCHED THEN INSERT VALUES (
   s.ccn, s.provider_name, s.city, s.county, s.county_fips, s.state, s.cy_quarter, s.workdate,
   s.mds_census_resident_count, s.hrs_rndon, s.hrs_rndon_emp, s.hrs_rndon_ctr,
   s.hrs_rnadmin, s.hrs_rnadmin_emp, s.hrs_rnadmin_ctr,
   s.hrs_rn, s.hrs_rn_emp, s.hrs_rn_ctr, s.hrs_lpnadmin, s.hrs_lpnadmin_emp, s.hrs_lpnadmin_ctr,
-  s.hrs_lpn, s.hrs_lpn_emp, s.hrs_lpn_ctr, s.hrs_cna, s.hrs_cna_emp, s.hrs_cna_ctr
+  s.hrs_lpn, s.hrs_lpn_emp, s.hrs_lpn_ctr, s.hrs_cna, s.hrs_cna_emp, s.hrs_cna_ctr,
+  s.source_file, s.ingested_ts
 );
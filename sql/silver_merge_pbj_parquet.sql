@@ -0,0 +1,45 @@
+MERGE INTO silver_pbj_daily t
+USING (
+  -- Typed Parquet from pipeline/bronze_to_parquet.py: no re-parsing, and the
+  -- quarter predicate (the batch's quarters) prunes every other partition
+  -- before the lineage filter.
+  -- One row per key across the batch's files (later files in :source_paths win)
+  SELECT * FROM (
+    SELECT
+      ccn, provider_name, city, county, county_fips, state, cy_quarter, workdate,
+      mds_census_resident_count,
+      hrs_rndon, hrs_rndon_emp, hrs_rndon_ctr,
+      hrs_rnadmin, hrs_rnadmin_emp, hrs_rnadmin_ctr,
+      hrs_rn, hrs_rn_emp, hrs_rn_ctr,
+      hrs_lpnadmin, hrs_lpnadmin_emp, hrs_lpnadmin_ctr,
+      hrs_lpn, hrs_lpn_emp, hrs_lpn_ctr,
+      hrs_cna, hrs_cna_emp, hrs_cna_ctr,
+      source_file,
+      from_iso8601_timestamp(:ingested_ts) AS ingested_ts,
+      row_number() OVER (PARTITION BY ccn, workdate ORDER BY array_position(ARRAY[:source_paths], source_file) DESC)
+        AS file_rank
+    FROM bronze_pbj_daily_parquet
+    WHERE cy_quarter IN (:cy_quarters)
+      AND source_file IN (:source_paths)
+  ) b
+  WHERE file_rank = 1
+) s
+ON (t.ccn = s.ccn AND t.workdate = s.workdate)
+WHEN MATCHED THEN UPDATE SET
+  provider_name = s.provider_name, city = s.city, county = s.county, county_fips = s.county_fips,
+  state = s.state, cy_quarter = s.cy_quarter, mds_census_resident_count = s.mds_census_resident_count,
+  hrs_rndon = s.hrs_rndon, hrs_rndon_emp = s.hrs_rndon_emp, hrs_rndon_ctr = s.hrs_rndon_ctr,
+  hrs_rnadmin = s.hrs_rnadmin, hrs_rnadmin_emp = s.hrs_rnadmin_emp, hrs_rnadmin_ctr = s.hrs_rnadmin_ctr,
+  hrs_rn = s.hrs_rn, hrs_rn_emp = s.hrs_rn_emp, hrs_rn_ctr = s.hrs_rn_ctr,
+  hrs_lpnadmin = s.hrs_lpnadmin, hrs_lpnadmin_emp = s.hrs_lpnadmin_emp, hrs_lpnadmin_ctr = s.hrs_lpnadmin_ctr,
+  hrs_lpn = s.hrs_lpn, hrs_lpn_emp = s.hrs_lpn_emp, hrs_lpn_ctr = s.hrs_lpn_ctr,
+  hrs_cna = s.hrs_cna, hrs_cna_emp = s.hrs_cna_emp, hrs_cna_ctr = s.hrs_cna_ctr,
+  source_file = s.source_file, ingested_ts = s.ingested_ts
+WHEN NOT MATCHED THEN INSERT VALUES (
+  s.ccn, s.provider_name, s.city, s.county, s.county_fips, s.state, s.cy_quarter, s.workdate,
+  s.mds_census_resident_count, s.hrs_rndon, s.hrs_rndon_emp, s.hrs_rndon_ctr,
+  s.hrs_rnadmin, s.hrs_rnadmin_emp, s.hrs_rnadmin_ctr,
+  s.hrs_rn, s.hrs_rn_emp, s.hrs_rn_ctr, s.hrs_lpnadmin, s.hrs_lpnadmin_emp, s.hrs_lpnadmin_ctr,
+  s.hrs_lpn, s.hrs_lpn_emp, s.hrs_lpn_ctr, s.hrs_cna, s.hrs_cna_emp, s.hrs_cna_ctr,
+  s.source_file, s.ingested_ts
+);
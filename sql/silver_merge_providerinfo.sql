@@ -1,52 +1,83 @@
 MERGE INTO silver_providerinfo t
 USING (
+  -- One row per CCN across the batch's files (:source_paths, in landing order):
+  -- each column takes the latest file's non-NULL value, the same result as
+  -- merging the files one at a time through the coalesce() updates below.
   SELECT
-    -- CCN normalize: keep rightmost 6 digits, left-pad zeros
-    lpad(substr(regexp_replace(trim(ccn_raw),'[^0-9]',''),
-         greatest(length(regexp_replace(trim(ccn_raw),'[^0-9]',''))-5,0)+1), 6, '0') AS ccn,
+    ccn,
+    max_by(state, file_order) FILTER (WHERE state IS NOT NULL) AS state,
+    max_by(provider_name, file_order) FILTER (WHERE provider_name IS NOT NULL) AS provider_name,
+    max_by(provider_address, file_order) FILTER (WHERE provider_address IS NOT NULL) AS provider_address,
+    max_by(city, file_order) FILTER (WHERE city IS NOT NULL) AS city,
+    max_by(county, file_order) FILTER (WHERE county IS NOT NULL) AS county,
+    max_by(ownership_type, file_order) FILTER (WHERE ownership_type IS NOT NULL) AS ownership_type,
+    max_by(zip_code, file_order) FILTER (WHERE zip_code IS NOT NULL) AS zip_code,
+    max_by(telephone_number, file_order) FILTER (WHERE telephone_number IS NOT NULL) AS telephone_number,
+    max_by(provider_ssa_county_code, file_order) FILTER (WHERE provider_ssa_county_code IS NOT NULL) AS provider_ssa_county_code,
+    max_by(latitude, file_order) FILTER (WHERE latitude IS NOT NULL) AS latitude,
+    max_by(longitude, file_order) FILTER (WHERE longitude IS NOT NULL) AS longitude,
+    max_by(facility_location, file_order) FILTER (WHERE facility_location IS NOT NULL) AS facility_location,
+    max_by(geocoding_footnote, file_order) FILTER (WHERE geocoding_footnote IS NOT NULL) AS geocoding_footnote,
+    max_by(number_of_certified_beds, file_order) FILTER (WHERE number_of_certified_beds IS NOT NULL) AS number_of_certified_beds,
+    max_by(average_number_of_residents_per_day, file_order) FILTER (WHERE average_number_of_residents_per_day IS NOT NULL) AS average_number_of_residents_per_day,
+    max_by(reported_total_nurse_staffing_hours_per_resident_per_day, file_order) FILTER (WHERE reported_total_nurse_staffing_hours_per_resident_per_day IS NOT NULL) AS reported_total_nurse_staffing_hours_per_resident_per_day,
+    max_by(adjusted_total_nurse_staffing_hours_per_resident_per_day, file_order) FILTER (WHERE adjusted_total_nurse_staffing_hours_per_resident_per_day IS NOT NULL) AS adjusted_total_nurse_staffing_hours_per_resident_per_day,
+    max_by(number_of_fines, file_order) FILTER (WHERE number_of_fines IS NOT NULL) AS number_of_fines,
+    max_by(total_amount_of_fines_in_dollars, file_order) FILTER (WHERE total_amount_of_fines_in_dollars IS NOT NULL) AS total_amount_of_fines_in_dollars,
+    max_by(number_of_payment_denials, file_order) FILTER (WHERE number_of_payment_denials IS NOT NULL) AS number_of_payment_denials,
+    max_by(total_number_of_penalties, file_order) FILTER (WHERE total_number_of_penalties IS NOT NULL) AS total_number_of_penalties,
+    max_by(processing_date, file_order) FILTER (WHERE processing_date IS NOT NULL) AS processing_date
+  FROM (
+    SELECT
+      -- CCN normalize: keep rightmost 6 digits, left-pad zeros
+      lpad(substr(regexp_replace(trim(ccn_raw),'[^0-9]',''),
+           greatest(length(regexp_replace(trim(ccn_raw),'[^0-9]',''))-6,0)+1), 6, '0') AS ccn,
 
-    upper(trim(state)) AS state,
-    trim(provider_name) AS provider_name,
-    trim(provider_address) AS provider_address,
-    trim(city_town) AS city,
-    trim(county_parish) AS county,
-    trim(ownership_type) AS ownership_type,
-    trim(zip_code) AS zip_code,
-    trim(telephone_number) AS telephone_number,
-    trim(provider_ssa_county_code) AS provider_ssa_county_code,
+      upper(trim(state)) AS state,
+      trim(provider_name) AS provider_name,
+      trim(provider_address) AS provider_address,
+      trim(city_town) AS city,
+      trim(county_parish) AS county,
+      trim(ownership_type) AS ownership_type,
+      trim(zip_code) AS zip_code,
+      trim(telephone_number) AS telephone_number,
+      trim(provider_ssa_county_code) AS provider_ssa_county_code,
 
-    try_cast(nullif(latitude,'') AS decimal(9,4)) AS latitude,
-    try_cast(nullif(longitude,'') AS decimal(9,4)) AS longitude,
-    trim(location) AS facility_location,
-    trim(geocoding_footnote) AS geocoding_footnote,
+      try_cast(nullif(latitude,'') AS decimal(9,4)) AS latitude,
+      try_cast(nullif(longitude,'') AS decimal(9,4)) AS longitude,
+      trim(location) AS facility_location,
+      trim(geocoding_footnote) AS geocoding_footnote,
 
-    try_cast(number_of_certified_beds AS integer) AS number_of_certified_beds,
-    try_cast(average_number_of_residents_per_day AS double) AS average_number_of_residents_per_day,
+      try_cast(number_of_certified_beds AS integer) AS number_of_certified_beds,
+      try_cast(average_number_of_residents_per_day AS double) AS average_number_of_residents_per_day,
 
-    -- keep common performance/ratings you’ll chart later (add more if needed)
-    try_cast(reported_total_nurse_staffing_hours_per_resident_per_day AS double) AS reported_total_nurse_staffing_hours_per_resident_per_day,
-    try_cast(adjusted_total_nurse_staffing_hours_per_resident_per_day AS double)    AS adjusted_total_nurse_staffing_hours_per_resident_per_day,
-    try_cast(number_of_fines AS integer) AS number_of_fines,
-    try_cast(total_amount_of_fines_in_dollars AS double) AS total_amount_of_fines_in_dollars,
-    try_cast(number_of_payment_denials AS integer) AS number_of_payment_denials,
-    try_cast(total_number_of_penalties AS integer) AS total_number_of_penalties,
+      -- keep common performance/ratings you’ll chart later (add more if needed)
+      try_cast(reported_total_nurse_staffing_hours_per_resident_per_day AS double) AS reported_total_nurse_staffing_hours_per_resident_per_day,
+      try_cast(adjusted_total_nurse_staffing_hours_per_resident_per_day AS double)    AS adjusted_total_nurse_staffing_hours_per_resident_per_day,
+      try_cast(number_of_fines AS integer) AS number_of_fines,
+      try_cast(total_amount_of_fines_in_dollars AS double) AS total_amount_of_fines_in_dollars,
+      try_cast(number_of_payment_denials AS integer) AS number_of_payment_denials,
+      try_cast(total_number_of_penalties AS integer) AS total_number_of_penalties,
 
-    -- leave dates as strings for now per prior decision
-    processing_date
+      -- leave dates as strings for now per prior decision
+      processing_date,
+      array_position(ARRAY[:source_paths], file_path) AS file_order
 
-  FROM (
-    SELECT
-      "cms_certification_number_(ccn)" AS ccn_raw, state, provider_name, provider_address, city_town,
-      county_parish, ownership_type, zip_code, telephone_number, provider_ssa_county_code,
-      latitude, longitude, location, geocoding_footnote,
-      number_of_certified_beds, average_number_of_residents_per_day,
-      reported_total_nurse_staffing_hours_per_resident_per_day,
-      adjusted_total_nurse_staffing_hours_per_resident_per_day,
-      number_of_fines, total_amount_of_fines_in_dollars,
-      number_of_payment_denials, total_number_of_penalties, processing_date
-    FROM bronze_nh_providerinfo_oct2024_csv
-    WHERE "$path" = :source_path
-  ) b
+    FROM (
+      SELECT
+        "cms_certification_number_(ccn)" AS ccn_raw, state, provider_name, provider_address, city_town,
+        county_parish, ownership_type, zip_code, telephone_number, provider_ssa_county_code,
+        latitude, longitude, location, geocoding_footnote,
+        number_of_certified_beds, average_number_of_residents_per_day,
+        reported_total_nurse_staffing_hours_per_resident_per_day,
+        adjusted_total_nurse_staffing_hours_per_resident_per_day,
+        number_of_fines, total_amount_of_fines_in_dollars,
+        number_of_payment_denials, total_number_of_penalties, processing_date, "$path" AS file_path
+      FROM bronze_nh_providerinfo_oct2024_csv
+      WHERE "$path" IN (:source_paths)
+    ) b
+  ) n
+  GROUP BY ccn
 ) s
 ON (t.ccn = s.ccn)
 WHEN MATCHED THEN UPDATE SET
@@ -76,6 +107,10 @@ WHEN NOT MATCHED THEN INSERT VALUES (
   s.ccn, s.provider_name, s.provider_address, s.city, s.state, s.zip_code,
   s.telephone_number, s.ownership_type, s.county, s.provider_ssa_county_code,
   s.number_of_certified_beds, s.average_number_of_residents_per_day,
-  NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL,            -- placeholders for long list if you widen later
+  s.reported_total_nurse_staffing_hours_per_resident_per_day,
+  s.adjusted_total_nurse_staffing_hours_per_resident_per_day,
+  s.number_of_fines, s.total_amount_of_fines_in_dollars,
+  s.number_of_payment_denials, s.total_number_of_penalties,
+  NULL, NULL,                                                -- overall_rating, staffing_rating (not loaded yet)
   s.facility_location, s.latitude, s.longitude, s.geocoding_footnote, s.processing_date
 );
@@ -0,0 +1,81 @@
+MERGE INTO silver_providerinfo t
+USING (
+  -- Typed Parquet from pipeline/bronze_to_parquet.py (CCN/try_cast rules already applied)
+  -- One row per CCN across the batch's files: each column takes the latest
+  -- file's non-NULL value, as merging them in turn through coalesce() would
+  SELECT
+    ccn,
+    max_by(state, file_order) FILTER (WHERE state IS NOT NULL) AS state,
+    max_by(provider_name, file_order) FILTER (WHERE provider_name IS NOT NULL) AS provider_name,
+    max_by(provider_address, file_order) FILTER (WHERE provider_address IS NOT NULL) AS provider_address,
+    max_by(city, file_order) FILTER (WHERE city IS NOT NULL) AS city,
+    max_by(county, file_order) FILTER (WHERE county IS NOT NULL) AS county,
+    max_by(ownership_type, file_order) FILTER (WHERE ownership_type IS NOT NULL) AS ownership_type,
+    max_by(zip_code, file_order) FILTER (WHERE zip_code IS NOT NULL) AS zip_code,
+    max_by(telephone_number, file_order) FILTER (WHERE telephone_number IS NOT NULL) AS telephone_number,
+    max_by(provider_ssa_county_code, file_order) FILTER (WHERE provider_ssa_county_code IS NOT NULL) AS provider_ssa_county_code,
+    max_by(latitude, file_order) FILTER (WHERE latitude IS NOT NULL) AS latitude,
+    max_by(longitude, file_order) FILTER (WHERE longitude IS NOT NULL) AS longitude,
+    max_by(facility_location, file_order) FILTER (WHERE facility_location IS NOT NULL) AS facility_location,
+    max_by(geocoding_footnote, file_order) FILTER (WHERE geocoding_footnote IS NOT NULL) AS geocoding_footnote,
+    max_by(number_of_certified_beds, file_order) FILTER (WHERE number_of_certified_beds IS NOT NULL) AS number_of_certified_beds,
+    max_by(average_number_of_residents_per_day, file_order) FILTER (WHERE average_number_of_residents_per_day IS NOT NULL) AS average_number_of_residents_per_day,
+    max_by(reported_total_nurse_staffing_hours_per_resident_per_day, file_order) FILTER (WHERE reported_total_nurse_staffing_hours_per_resident_per_day IS NOT NULL) AS reported_total_nurse_staffing_hours_per_resident_per_day,
+    max_by(adjusted_total_nurse_staffing_hours_per_resident_per_day, file_order) FILTER (WHERE adjusted_total_nurse_staffing_hours_per_resident_per_day IS NOT NULL) AS adjusted_total_nurse_staffing_hours_per_resident_per_day,
+    max_by(number_of_fines, file_order) FILTER (WHERE number_of_fines IS NOT NULL) AS number_of_fines,
+    max_by(total_amount_of_fines_in_dollars, file_order) FILTER (WHERE total_amount_of_fines_in_dollars IS NOT NULL) AS total_amount_of_fines_in_dollars,
+    max_by(number_of_payment_denials, file_order) FILTER (WHERE number_of_payment_denials IS NOT NULL) AS number_of_payment_denials,
+    max_by(total_number_of_penalties, file_order) FILTER (WHERE total_number_of_penalties IS NOT NULL) AS total_number_of_penalties,
+    max_by(processing_date, file_order) FILTER (WHERE processing_date IS NOT NULL) AS processing_date
+  FROM (
+    SELECT
+      ccn, state, provider_name, provider_address, city, county, ownership_type, zip_code,
+      telephone_number, provider_ssa_county_code, latitude, longitude,
+      facility_location, geocoding_footnote,
+      number_of_certified_beds, average_number_of_residents_per_day,
+      reported_total_nurse_staffing_hours_per_resident_per_day,
+      adjusted_total_nurse_staffing_hours_per_resident_per_day,
+      number_of_fines, total_amount_of_fines_in_dollars,
+      number_of_payment_denials, total_number_of_penalties, processing_date,
+      array_position(ARRAY[:source_paths], source_file) AS file_order
+    FROM bronze_nh_providerinfo_parquet
+    WHERE quarter IN (:quarters)
+      AND source_file IN (:source_paths)
+  ) n
+  GROUP BY ccn
+) s
+ON (t.ccn = s.ccn)
+WHEN MATCHED THEN UPDATE SET
+  state = coalesce(s.state, t.state),
+  provider_name = coalesce(s.provider_name, t.provider_name),
+  provider_address = coalesce(s.provider_address, t.provider_address),
+  city = coalesce(s.city, t.city),
+  county = coalesce(s.county, t.county),
+  ownership_type = coalesce(s.ownership_type, t.ownership_type),
+  zip_code = coalesce(s.zip_code, t.zip_code),
+  telephone_number = coalesce(s.telephone_number, t.telephone_number),
+  provider_ssa_county_code = coalesce(s.provider_ssa_county_code, t.provider_ssa_county_code),
+  latitude = coalesce(s.latitude, t.latitude),
+  longitude = coalesce(s.longitude, t.longitude),
+  facility_location = coalesce(s.facility_location, t.facility_location),
+  geocoding_footnote = coalesce(s.geocoding_footnote, t.geocoding_footnote),
+  number_of_certified_beds = coalesce(s.number_of_certified_beds, t.number_of_certified_beds),
+  average_number_of_residents_per_day = coalesce(s.average_number_of_residents_per_day, t.average_number_of_residents_per_day),
+  reported_total_nurse_staffing_hours_per_resident_per_day = coalesce(s.reported_total_nurse_staffing_hours_per_resident_per_day, t.reported_total_nurse_staffing_hours_per_resident_per_day),
+  adjusted_total_nurse_staffing_hours_per_resident_per_day = coalesce(s.adjusted_total_nurse_staffing_hours_per_resident_per_day, t.adjusted_total_nurse_staffing_hours_per_resident_per_day),
+  number_of_fines = coalesce(s.number_of_fines, t.number_of_fines),
+  total_amount_of_fines_in_dollars = coalesce(s.total_amount_of_fines_in_dollars, t.total_amount_of_fines_in_dollars),
+  number_of_payment_denials = coalesce(s.number_of_payment_denials, t.number_of_payment_denials),
+  total_number_of_penalties = coalesce(s.total_number_of_penalties, t.total_number_of_penalties),
+  processing_date = coalesce(s.processing_date, t.processing_date)
+WHEN NOT MATCHED THEN INSERT VALUES (
+  s.ccn, s.provider_name, s.provider_address, s.city, s.state, s.zip_code,
+  s.telephone_number, s.ownership_type, s.county, s.provider_ssa_county_code,
+  s.number_of_certified_beds, s.average_number_of_residents_per_day,
+  s.reported_total_nurse_staffing_hours_per_resident_per_day,
+  s.adjusted_total_nurse_staffing_hours_per_resident_per_day,
+  s.number_of_fines, s.total_amount_of_fines_in_dollars,
+  s.number_of_payment_denials, s.total_number_of_penalties,
+  NULL, NULL,                                                -- overall_rating, staffing_rating (not loaded yet)
+  s.facility_location, s.latitude, s.longitude, s.geocoding_footnote, s.processing_date
+);
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+
+# -----------------------------
+# Vectorized summary statistics
+# -----------------------------
+# Per-group count/mean/std/min/max/quantiles in one pass: values are sorted once
+# by (group, value), so every quantile of every group is a gather into the sorted
+# array (linear interpolation, same as pandas' default) instead of a Python call
+# per group. NaNs are ignored like pandas does; `size` counts all rows.
+# summary_sql pushes the same statistics down to the engine when the rows
+# themselves are not needed in the app.
+
+STATS = ("count", "mean", "std", "min", "max", "p10", "p50", "p90")
+
+
+def _quantile_level(name: str) -> float | None:
+    return int(name[1:]) / 100 if name.startswith("p") and name[1:].isdigit() else None
+
+
+def _grouped(codes: np.ndarray, values: np.ndarray, ngroups: int, stats) -> dict[str, np.ndarray]:
+    valid = (codes >= 0) & ~np.isnan(values)
+    c, v = codes[valid], values[valid]
+    order = np.lexsort((v, c))
+    c, v = c[order], v[order]
+
+    n = np.bincount(c, minlength=ngroups)
+    start = np.concatenate([[0], np.cumsum(n)[:-1]])
+    has = n > 0
+
+    def take(idx):
+        # Gather from the sorted values; groups without values -> NaN
+        if not len(v):
+            return np.full(ngroups, np.nan)
+        return np.where(has, v[np.clip(idx, 0, len(v) - 1)], np.nan)
+
+    out = {}
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.bincount(c, weights=v, minlength=ngroups) / n
+        for name in stats:
+            if name == "count":
+                out[name] = n
+            elif name == "mean":
+                out[name] = mean
+            elif name == "std":
+                ss = np.bincount(c, weights=(v - mean[c]) ** 2, minlength=ngroups)
+                out[name] = np.where(n > 1, ss / (n - 1), np.nan) ** 0.5
+            elif name == "min":
+                out[name] = take(start)
+            elif name == "max":
+                out[name] = take(start + n - 1)
+            else:
+                q = _quantile_level(name)
+                if q is None:
+                    raise ValueError(f"unknown statistic {name!r}")
+                pos = (n - 1) * q
+                lo = np.floor(pos).astype(np.int64)
+                a, b = take(start + lo), take(start + np.ceil(pos).astype(np.int64))
+                out[name] = a + (b - a) * (pos - lo)
+    return out
+
+
+def group_stats(df: pd.DataFrame, by: list[str], value: str, stats=STATS,
+                prefix: str = "") -> pd.DataFrame:
+    # One row per group (sorted by `by`, unobserved categories dropped):
+    # by columns + <prefix><stat> for each stat + size
+    g = df.groupby(by, observed=True, sort=True)
+    sizes = g.size()
+    codes = g.ngroup().to_numpy(dtype=np.int64, na_value=-1)
+    values = pd.to_numeric(df[value], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    res = _grouped(codes, values, len(sizes), stats)
+    out = sizes.index.to_frame(index=False)
+    for name in stats:
+        out[prefix + name] = res[name]
+    out["size"] = sizes.to_numpy()
+    return out
+
+
+def describe(values, stats=STATS) -> dict:
+    # Whole-column version of group_stats (used for KPI rows)
+    v = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    res = _grouped(np.zeros(len(v), dtype=np.int64), v, 1, stats)
+    return {name: (int(res[name][0]) if name == "count" else float(res[name][0])) for name in stats}
+
+
+def summary_sql(base_sql: str, value_col: str) -> str:
+    # Same statistics computed by the engine (approximate quantiles); one row back
+    x = f"CAST({value_col} AS DOUBLE)"
+    return f"""
+      SELECT COUNT({value_col}) AS count,
+             AVG({x}) AS mean,
+             stddev_samp({x}) AS std,
+             MIN({x}) AS min,
+             MAX({x}) AS max,
+             approx_percentile({x}, 0.1) AS p10,
+             approx_percentile({x}, 0.5) AS p50,
+             approx_percentile({x}, 0.9) AS p90
+      FROM ({base_sql}) q
+    """
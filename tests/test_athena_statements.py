@@ -0,0 +1,66 @@
+import io
+import os
+import unittest
+from unittest import mock
+
+from pyathena.arrow.cursor import ArrowCursor
+from pyathena.cursor import Cursor
+
+from backends import FETCH_MODES, AthenaBackend
+from pipeline.runner import AthenaEngine, athena_engine
+
+# -----------------------------
+# Athena statement cursors (offline)
+# -----------------------------
+# Statements executed without reading rows (the app's UNLOAD for full extracts,
+# the runner's MERGE/INSERT/UPDATE steps) must open a cursor on the pooled
+# connection in every fetch mode. Cursor construction is real PyAthena; only
+# execute() is intercepted, so nothing reaches AWS.
+#
+#   python -m pytest tests
+
+
+class Executed(Exception):
+    pass
+
+
+def _backend(fetch_mode: str) -> AthenaBackend:
+    return AthenaBackend(region="us-east-1", s3_output="s3://kerok-test-output/", workgroup="primary",
+                         database="kerok-healthcare-bronze", catalog="AwsDataCatalog", fetch_mode=fetch_mode)
+
+
+class StatementCursorTest(unittest.TestCase):
+    def setUp(self):
+        env = mock.patch.dict(os.environ, {"AWS_ACCESS_KEY_ID": "test", "AWS_SECRET_ACCESS_KEY": "test"})
+        env.start()
+        self.addCleanup(env.stop)
+        self.executed = []
+
+        def execute(cur, sql, *args, **kwargs):
+            self.executed.append(sql)
+            raise Executed(sql)
+
+        for cls in (Cursor, ArrowCursor):
+            patcher = mock.patch.object(cls, "execute", autospec=True, side_effect=execute)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_export_reaches_unload_in_every_fetch_mode(self):
+        for mode in FETCH_MODES:
+            with self.subTest(fetch_mode=mode):
+                with self.assertRaises(Executed):
+                    _backend(mode).export("SELECT 1 AS x", "csv", io.BytesIO())
+                self.assertTrue(self.executed[-1].startswith("UNLOAD (SELECT 1 AS x)"))
+
+    def test_runner_statements_in_every_fetch_mode(self):
+        engines = [AthenaEngine(_backend(mode)) for mode in FETCH_MODES]
+        with mock.patch.dict(os.environ, {"ATHENA_S3_OUTPUT": "s3://kerok-test-output/"}):
+            engines.append(athena_engine())
+        for engine in engines:
+            with self.subTest(fetch_mode=engine.backend.fetch_mode):
+                with self.assertRaises(Executed):
+                    engine.execute("UPDATE kerok_healthcare_ops_file_log SET status = 'DONE' WHERE FALSE")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import datetime as dt
+import unittest
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+from paging import last_key, ranked_sql, seek_predicate, strip_keys
+
+# -----------------------------
+# SQL ranking + keyset pagination (DuckDB)
+# -----------------------------
+# Walking a mixed ASC/DESC order page by page with seeks must visit the same rows
+# in the same order as OFFSET pages and as a full sort, ties included.
+#
+#   python -m pytest tests
+
+ORDER = [("score", True), ("state", False), ("ccn", False)]
+BASE = "SELECT ccn, state, score FROM facilities"
+
+
+def _facilities(n: int = 53) -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    return pd.DataFrame({
+        "ccn": [f"{i:06d}" for i in range(n)],
+        "state": rng.choice(["AL", "CA", "NY"], n),
+        "score": rng.integers(0, 4, n).astype("float64"),  # heavy ties on the first key
+    })
+
+
+class RankedSqlTest(unittest.TestCase):
+    def setUp(self):
+        self.con = duckdb.connect()
+        self.addCleanup(self.con.close)
+        self.df = _facilities()
+        self.con.register("facilities", self.df)
+        self.expected = self.df.sort_values(["score", "state", "ccn"], ascending=[False, True, True])["ccn"].tolist()
+
+    def _page(self, **kwargs) -> pd.DataFrame:
+        return self.con.execute(ranked_sql(BASE, ORDER, 10, **kwargs)).df()
+
+    def test_seek_pages_follow_the_full_order(self):
+        seen, after = [], None
+        while True:
+            page = self._page(after=after)
+            if page.empty:
+                break
+            seen += page["ccn"].tolist()
+            after = last_key(page, ORDER)
+        self.assertEqual(seen, self.expected)
+
+    def test_offset_pages_match_seek_pages(self):
+        after = None
+        for n in range(6):
+            with self.subTest(page=n + 1):
+                seek = self._page(after=after)
+                offset = self._page(offset=n * 10)
+                self.assertEqual(seek["ccn"].tolist(), offset["ccn"].tolist())
+                after = last_key(seek, ORDER)
+
+    def test_offset_ignored_when_seeking(self):
+        sql = ranked_sql(BASE, ORDER, 10, after=(3.0, "AL", "000001"), offset=20)
+        self.assertNotIn("OFFSET", sql)
+        self.assertIn("OFFSET 20", ranked_sql(BASE, ORDER, 10, offset=20))
+
+    def test_strip_keys(self):
+        self.assertEqual(list(strip_keys(self._page(), ORDER).columns), ["ccn", "state", "score"])
+
+
+class SeekPredicateTest(unittest.TestCase):
+    def test_lexicographic_mixed_directions(self):
+        self.assertEqual(seek_predicate([("a", True), ("b", False)], (3, "x'y")),
+                         "((_k0 < 3) OR (_k0 = 3 AND _k1 > 'x''y'))")
+
+    def test_last_key_plain_values(self):
+        page = pd.DataFrame({"_k0": [np.float64(1.5), np.float64(2.5)],
+                             "_k1": pd.to_datetime(["2024-04-01", "2024-04-02"])})
+        key = last_key(page, [("x", False), ("d", False)])
+        self.assertEqual(key, (2.5, dt.datetime(2024, 4, 2)))
+        self.assertIs(type(key[0]), float)
+        self.assertIsNone(last_key(page.iloc[:0], [("x", False), ("d", False)]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import datetime as dt
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from queries import Filters, Query, build
+
+# -----------------------------
+# Canonical, parameterized queries
+# -----------------------------
+# The same logical request must give the same Query.key however the filters were
+# picked: value order, duplicates, numpy/pandas scalars, whitespace, and a
+# selection covering every known value ("any non-null").
+#
+#   python -m pytest tests
+
+TEMPLATE = """
+  SELECT ccn, state, month
+  FROM gold_facility_monthly
+  WHERE {where}
+"""
+STATES = ["AL", "CA", "NY"]
+
+
+class FiltersTest(unittest.TestCase):
+    def test_order_and_duplicates_collapse(self):
+        a = Filters.of(state=["NY", "AL", "NY"], ccn=["015000"])
+        b = Filters.of(ccn=["015000", "015000"], state=["AL", "NY"])
+        self.assertEqual(a, b)
+        self.assertEqual(a.values, (("ccn", ("015000",)), ("state", ("AL", "NY"))))
+
+    def test_empty_selection_is_no_filter(self):
+        self.assertEqual(Filters.of(state=[], ccn=None), Filters())
+        self.assertEqual(Filters().where(), ("TRUE", ()))
+
+    def test_full_universe_collapses_to_not_null(self):
+        f = Filters.of(state=list(reversed(STATES)), universe={"state": STATES})
+        self.assertEqual(f.values, (("state", None),))
+        self.assertEqual(f.where(), ("state IS NOT NULL", ()))
+        self.assertEqual(Filters.of(state=STATES[:2], universe={"state": STATES}).values,
+                         (("state", ("AL", "CA")),))
+
+    def test_scalars_canonicalized(self):
+        a = Filters.of(ranges={"month": (pd.Timestamp("2024-04-01"), pd.Timestamp("2024-06-01"))},
+                       beds=[np.int64(10)])
+        b = Filters.of(ranges={"month": (dt.date(2024, 4, 1), dt.date(2024, 6, 1))}, beds=[10])
+        self.assertEqual(a, b)
+        self.assertEqual(b.where(), ("beds IN (?) AND month BETWEEN ? AND ?",
+                                     (10, dt.date(2024, 4, 1), dt.date(2024, 6, 1))))
+
+
+class QueryKeyTest(unittest.TestCase):
+    def test_same_request_same_key(self):
+        a = build(TEMPLATE, Filters.of(state=["NY", "AL"]))
+        b = build("SELECT ccn, state, month FROM gold_facility_monthly WHERE {where}",
+                  Filters.of(state=["AL", "NY", "AL"]))
+        self.assertEqual(a, b)
+        self.assertEqual(a.key, b.key)
+
+    def test_different_values_different_key(self):
+        keys = {build(TEMPLATE, Filters.of(state=s)).key for s in (["AL"], ["CA"], ["AL", "CA"], None)}
+        self.assertEqual(len(keys), 4)
+        # A value equal to its SQL text elsewhere must not collide with the parameter
+        self.assertNotEqual(Query("SELECT ?", (1,)).key, Query("SELECT ?", ("1",)).key)
+
+    def test_whitespace_inside_literals_kept(self):
+        q = Query.of("SELECT  'a  b'   AS x,\n  1")
+        self.assertEqual(q.sql, "SELECT 'a  b' AS x, 1")
+
+    def test_inline(self):
+        q = build(TEMPLATE, Filters.of(state=["O'X"], ranges={"month": (dt.date(2024, 4, 1), dt.date(2024, 6, 1))}))
+        self.assertEqual(q.inline(), "SELECT ccn, state, month FROM gold_facility_monthly WHERE "
+                                     "state IN ('O''X') AND month BETWEEN DATE '2024-04-01' AND DATE '2024-06-01'")
+
+    def test_one_where_slot(self):
+        with self.assertRaises(ValueError):
+            build("SELECT 1")
+
+
+if __name__ == "__main__":
+    unittest.main()
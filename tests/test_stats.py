@@ -0,0 +1,70 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from stats import STATS, describe, group_stats
+
+# -----------------------------
+# Vectorized summary statistics vs pandas
+# -----------------------------
+# group_stats gathers every quantile from one sorted array; it must agree with
+# pandas' groupby (linear interpolation, NaNs ignored), including groups that
+# have a single value or only NaNs.
+#
+#   python -m pytest tests
+
+
+def _frame(n: int = 2000) -> pd.DataFrame:
+    rng = np.random.default_rng(11)
+    df = pd.DataFrame({
+        "state": rng.choice(["AL", "CA", "NY", "TX"], n),
+        "owner": pd.Categorical(rng.choice(["For profit", "Non profit", "Government"], n),
+                                categories=["For profit", "Non profit", "Government", "Unused"]),
+        "hprd": rng.gamma(4.0, 1.0, n),
+    })
+    df.loc[rng.random(n) < 0.1, "hprd"] = np.nan
+    # WY: a single value; VT: only NaNs
+    lone = pd.DataFrame({"state": ["WY", "VT", "VT"], "hprd": [3.25, np.nan, np.nan],
+                         "owner": pd.Categorical(["Government"] * 3, categories=df["owner"].cat.categories)})
+    return pd.concat([df, lone], ignore_index=True)
+
+
+def _pandas_stats(df: pd.DataFrame, by: list[str]) -> pd.DataFrame:
+    g = df.groupby(by, observed=True, sort=True)["hprd"]
+    out = g.agg(["count", "mean", "std", "min", "max"])
+    for name, q in (("p10", 0.1), ("p50", 0.5), ("p90", 0.9)):
+        out[name] = g.quantile(q)
+    out["size"] = g.size()
+    return out.reset_index()
+
+
+class GroupStatsTest(unittest.TestCase):
+    def test_matches_pandas(self):
+        df = _frame()
+        for by in (["state"], ["state", "owner"]):
+            with self.subTest(by=by):
+                got = group_stats(df, by, "hprd")
+                expected = _pandas_stats(df, by)
+                pd.testing.assert_frame_equal(got[by], expected[by])
+                for name in [*STATS, "size"]:
+                    np.testing.assert_allclose(got[name].to_numpy(dtype="float64"),
+                                               expected[name].to_numpy(dtype="float64"), rtol=1e-12,
+                                               err_msg=name)
+
+    def test_unknown_statistic(self):
+        with self.assertRaises(ValueError):
+            group_stats(_frame(), ["state"], "hprd", stats=("p10", "median"))
+
+    def test_describe_matches_pandas(self):
+        s = _frame()["hprd"]
+        got = describe(s)
+        self.assertEqual(got["count"], s.count())
+        for name, expected in (("mean", s.mean()), ("std", s.std()), ("min", s.min()), ("max", s.max()),
+                               ("p10", s.quantile(0.1)), ("p50", s.quantile(0.5)), ("p90", s.quantile(0.9))):
+            self.assertAlmostEqual(got[name], expected, places=12, msg=name)
+        self.assertTrue(np.isnan(describe([np.nan])["p50"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
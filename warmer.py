@@ -0,0 +1,255 @@
+import argparse
+import datetime as dt
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from queries import Query
+from result_cache import ResultCache
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+# -----------------------------
+# Result cache pre-warmer
+# -----------------------------
+# After the pipeline publishes new data (PublishManifest, after MarkDone), every
+# cached result is keyed on a stale data version (data_version.py), so the
+# first user to open each tab would pay the engine cost. The warmer fills the
+# host's shared disk cache (result_cache.py) under the new version before users
+# arrive:
+#   1. the default view: each tab of app.py rendered once headless (streamlit
+#      AppTest), so its queries are exactly what a fresh session runs (first six
+#      states, the last ~3 months, the latest month in tabs 4-6);
+#   2. the most requested queries recorded by the app processes (QueryLog),
+#      replayed straight against the engine with bounded concurrency.
+#
+#   python warmer.py once             # warm the current data version
+#   python warmer.py watch            # sidecar: warm whenever the version changes
+#
+# It reads the same environment as the app (QUERY_BACKEND, ATHENA_*, DUCKDB_*,
+# RESULT_CACHE_*), so run it on the app host against the same cache directory.
+
+QUERY_LOG_NAME = "query_log.json"
+
+
+# -----------------------------
+# Popular query log (written by the app)
+# -----------------------------
+def _encode(v):
+    if isinstance(v, dt.datetime):
+        return {"ts": v.isoformat()}
+    if isinstance(v, dt.date):
+        return {"date": v.isoformat()}
+    if isinstance(v, Decimal):
+        return {"dec": str(v)}
+    return v
+
+
+def _decode(v):
+    if isinstance(v, dict):
+        if "ts" in v:
+            return dt.datetime.fromisoformat(v["ts"])
+        if "date" in v:
+            return dt.date.fromisoformat(v["date"])
+        return Decimal(v["dec"])
+    return v
+
+
+class QueryLog:
+    # Request counts per canonical query (Query.key). Each app process counts in
+    # memory and merges into one JSON file every flush_seconds; concurrent
+    # merges from several processes can drop a few counts, which only blurs the
+    # ranking.
+    def __init__(self, path: str, flush_seconds: float = 60.0, max_entries: int = 2000):
+        self.path = path
+        self.flush_seconds = flush_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._pending: dict[str, dict] = {}
+        self._flushed = time.monotonic()
+
+    def record(self, q: Query):
+        with self._lock:
+            entry = self._pending.get(q.key)
+            if entry is None:
+                self._pending[q.key] = {"sql": q.sql, "params": [_encode(p) for p in q.params], "count": 1}
+            else:
+                entry["count"] += 1
+            due = time.monotonic() - self._flushed >= self.flush_seconds
+        if due:
+            self.flush()
+
+    def load(self) -> dict[str, dict]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._flushed = time.monotonic()
+        if not pending:
+            return
+        now = time.time()
+        entries = self.load()
+        for key, e in pending.items():
+            old = entries.get(key)
+            entries[key] = {**e, "count": e["count"] + (old["count"] if old else 0), "last_seen": now}
+        if len(entries) > self.max_entries:
+            keep = sorted(entries, key=lambda k: (entries[k]["count"], entries[k]["last_seen"]), reverse=True)
+            entries = {k: entries[k] for k in keep[:self.max_entries]}
+        tmp = f"{self.path}.{uuid.uuid4().hex}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(entries, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass  # best-effort, like the result cache
+
+    def top(self, n: int, max_age_days: float = 7.0) -> list[Query]:
+        # Most requested queries seen within max_age_days, most requested first
+        cutoff = time.time() - max_age_days * 86400
+        entries = [e for e in self.load().values() if e.get("last_seen", 0) >= cutoff]
+        entries.sort(key=lambda e: e["count"], reverse=True)
+        return [Query(e["sql"], tuple(_decode(p) for p in e["params"])) for e in entries[:n]]
+
+
+# -----------------------------
+# Warming
+# -----------------------------
+def _env_backend():
+    # Same settings as app._backend (see .env.example)
+    from backends import AthenaBackend, DuckDBBackend
+    fetch_mode = os.getenv("QUERY_FETCH_MODE", "arrow").strip().lower()
+    if os.getenv("QUERY_BACKEND", "athena").strip().lower() == "duckdb":
+        return DuckDBBackend(os.getenv("DUCKDB_DATA_DIR", "data/gold"),
+                             database=os.getenv("DUCKDB_DATABASE", ":memory:"), fetch_mode=fetch_mode)
+    return AthenaBackend(
+        region=os.getenv("AWS_REGION") or os.getenv("AWS_DEFAULT_REGION") or "us-east-1",
+        s3_output=os.getenv("ATHENA_S3_OUTPUT"),
+        workgroup=os.getenv("ATHENA_WORKGROUP", "primary"),
+        database=os.getenv("ATHENA_DATABASE", "kerok-healthcare-bronze"),
+        catalog=os.getenv("ATHENA_CATALOG", "AwsDataCatalog"),
+        fetch_mode=fetch_mode,
+        result_reuse_minutes=int(os.getenv("ATHENA_RESULT_REUSE_MINUTES", "60")),
+    )
+
+
+def _env_cache() -> ResultCache:
+    max_mb = int(os.getenv("RESULT_CACHE_MAX_MB", "512"))
+    if max_mb <= 0:
+        raise SystemExit("RESULT_CACHE_MAX_MB=0: the disk result cache is disabled, nothing to warm")
+    root = os.getenv("RESULT_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "kerok-healthcare-results")
+    return ResultCache(root, max_bytes=max_mb * 1024 * 1024,
+                       ttl_seconds=int(os.getenv("RESULT_CACHE_TTL_SECONDS", "86400")) or None)
+
+
+def env_query_log() -> QueryLog:
+    cache_dir = os.getenv("RESULT_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "kerok-healthcare-results")
+    return QueryLog(os.path.join(cache_dir, QUERY_LOG_NAME))
+
+
+def warm_defaults(timeout: float = 900) -> dict:
+    # One headless render of the app's default view; its queries land in the disk
+    # cache through the app's own path. The warmer's requests are not logged.
+    from streamlit.testing.v1 import AppTest
+    os.environ.update(QUERY_LOG_FLUSH_SECONDS="0", DATA_VERSION_CHECK_SECONDS="0")
+    t0 = time.perf_counter()
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    at.run()
+    # Only the open tab renders; open each one as a user would (AppTest does not
+    # keep the selected tab between runs, so it is set in session state)
+    for label in [t.label for t in at.tabs][1:]:
+        if at.exception:
+            break
+        at.session_state["active_tab"] = label
+        at.run()
+    if at.exception:
+        raise RuntimeError(f"default view raised {at.exception[0].value}")
+    return {"total_s": round(time.perf_counter() - t0, 4)}
+
+
+def warm_queries(backend, cache: ResultCache, version, queries: list[Query], concurrency: int = 4) -> dict:
+    # Run each query missing from the cache under this data version (same key as app._fetch)
+    age = version.age_seconds()
+    reuse = None if age is None else max(0, int(age // 60))
+    v = version.current()
+
+    def one(q: Query) -> str:
+        key = ResultCache.make_key(backend.namespace, v, q.key)
+        if cache.has(key):
+            return "cached"
+        try:
+            cache.put(key, backend.query(q.sql, params=q.params, reuse_minutes=reuse))
+        except Exception as e:
+            print(f"warm failed ({type(e).__name__}: {e}): {q.sql[:120]}", file=sys.stderr)
+            return "failed"
+        return "warmed"
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="warm") as pool:
+        outcomes = list(pool.map(one, queries))
+    return {"version": v, "queries": len(queries), **{k: outcomes.count(k) for k in ("warmed", "cached", "failed")},
+            "total_s": round(time.perf_counter() - t0, 4)}
+
+
+def warm(args, backend, cache: ResultCache, version) -> dict:
+    os.environ["QUERY_MAX_CONCURRENCY"] = str(args.concurrency)
+    out = {"version": version.current()}
+    if not args.skip_defaults:
+        out["defaults"] = warm_defaults()
+    top = env_query_log().top(args.top, args.max_age_days) if args.top > 0 else []
+    out["popular"] = warm_queries(backend, cache, version, top, args.concurrency)
+    print(json.dumps(out), flush=True)
+    return out
+
+
+def main(argv: list[str] | None = None) -> int:
+    from data_version import DataVersion, probe_version
+    p = argparse.ArgumentParser(description="Warm the dashboard's shared result cache for the current data.")
+    p.add_argument("mode", choices=["once", "watch"])
+    p.add_argument("--top", type=int, default=int(os.getenv("WARM_TOP_QUERIES", "100")),
+                   help="Most requested queries to replay (0 = defaults only)")
+    p.add_argument("--max-age-days", type=float, default=7.0, help="Ignore queries not requested for this long")
+    p.add_argument("--concurrency", type=int, default=int(os.getenv("WARM_CONCURRENCY", "4")))
+    p.add_argument("--interval", type=float, default=float(os.getenv("DATA_VERSION_CHECK_SECONDS", "60")),
+                   help="watch: seconds between data version probes")
+    p.add_argument("--skip-defaults", action="store_true", help="Do not render the default view")
+    args = p.parse_args(argv)
+
+    backend, cache = _env_backend(), _env_cache()
+    version = DataVersion(lambda: probe_version(lambda sql: backend.query(sql, reuse_minutes=0)),
+                          interval=0 if args.mode == "once" else args.interval)
+    if args.mode == "once":
+        warm(args, backend, cache, version)
+        return 0
+    warmed = None
+    while True:  # until interrupted
+        v = version.current()
+        # Without a version source (time-bucket fallback) warm only once
+        if v != warmed and (warmed is None or version.age_seconds() is not None):
+            try:
+                warm(args, backend, cache, version)
+                warmed = v
+            except Exception as e:  # keep watching; retried next interval
+                print(f"warm failed for {v}: {type(e).__name__}: {e}", file=sys.stderr, flush=True)
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        sys.exit(0)